@@ -16,6 +16,7 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from .models import UserGoogleAuth
+from .token_broker import token_broker
 
 logger = logging.getLogger(__name__)
 
@@ -443,6 +444,8 @@ class UserGoogleAuthService:
                 auth_record.last_error = None
                 auth_record.save()
             
+            # Drop any token cached for a previous connection
+            token_broker.invalidate(user.id)
             return auth_record
             
         except Exception as e:
@@ -639,6 +642,7 @@ class UserGoogleAuthService:
                 auth_record.is_active = False
                 auth_record.save()
             
+            token_broker.invalidate(user.id)
             return True
             
         except Exception as e:
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0008_add_unique_email_constraint"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="usergoogleauth",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "-created_at"],
+                name="gauth_user_active_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="usergoogleauth",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "-last_used"],
+                name="gauth_user_active_used_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="usergoogleauth",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["google_email"],
+                name="gauth_active_email_idx",
+            ),
+        ),
+    ]
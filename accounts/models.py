@@ -73,6 +73,21 @@ class UserGoogleAuth(models.Model):
         # Allow multiple users to connect to the same Google account
         # But prevent the same user from having multiple connections to the same Google account
         unique_together = ['user', 'google_user_id']
+        # Only active connections are ever looked up, so the indexes skip revoked ones
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'], condition=models.Q(is_active=True),
+                name='gauth_user_active_created_idx'
+            ),
+            models.Index(
+                fields=['user', '-last_used'], condition=models.Q(is_active=True),
+                name='gauth_user_active_used_idx'
+            ),
+            models.Index(
+                fields=['google_email'], condition=models.Q(is_active=True),
+                name='gauth_active_email_idx'
+            ),
+        ]
 
 
 @receiver(post_save, sender=User)
@@ -1,3 +1,158 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import UserGoogleAuth
+from .token_broker import GoogleTokenBroker
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are checked against PostgreSQL")
+class UserGoogleAuthQueryPlanTests(TestCase):
+    """
+    Regression guard for the partial is_active indexes: on a seeded, analyzed
+    database the active-connection lookups must not fall back to Seq Scans
+    """
+
+    USERS = 500
+    CONNECTIONS_PER_USER = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f'plan-user-{i}') for i in range(cls.USERS)])
+        token_expiry = timezone.now() + timedelta(hours=1)
+        UserGoogleAuth.objects.bulk_create([
+            UserGoogleAuth(
+                user=user,
+                access_token='access',
+                refresh_token='refresh',
+                token_expiry=token_expiry,
+                google_user_id=f'{user.id}-{c}',
+                google_email=f'user{user.id}-{c}@example.com',
+                google_name=f'User {user.id}',
+                scopes='openid,email',
+                # Most historical connections have been revoked
+                is_active=c == 0,
+            )
+            for user in users
+            for c in range(cls.CONNECTIONS_PER_USER)
+        ])
+        with connection.cursor() as cursor:
+            for model in (User, UserGoogleAuth):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        cls.user = users[len(users) // 2]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on {queryset.model._meta.db_table}', plan, plan)
+        self.assertIn(index_name, plan, plan)
+
+    def test_latest_active_connection_uses_created_index(self):
+        queryset = UserGoogleAuth.objects.filter(user=self.user, is_active=True).order_by('-created_at')[:1]
+        self.assertUsesIndex(queryset, 'gauth_user_active_created_idx')
+
+    def test_connected_accounts_use_last_used_index(self):
+        queryset = UserGoogleAuth.objects.filter(user=self.user, is_active=True).order_by('-last_used')
+        self.assertUsesIndex(queryset, 'gauth_user_active_used_idx')
+
+    def test_active_email_lookup_uses_partial_index(self):
+        queryset = UserGoogleAuth.objects.filter(google_email='user1-0@example.com', is_active=True)
+        self.assertUsesIndex(queryset, 'gauth_active_email_idx')
+
+
+class _Lock:
+    def __init__(self, acquired=True, on_acquire=None):
+        self.acquired = acquired
+        self.on_acquire = on_acquire
+        self.released = False
+
+    def acquire(self, blocking=True):
+        if self.on_acquire:
+            self.on_acquire()
+        return self.acquired
+
+    def release(self):
+        self.released = True
+
+
+@override_settings(CACHES=LOCMEM_CACHE, GOOGLE_TOKEN_RENEW_MARGIN_SECONDS=600)
+class GoogleTokenBrokerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.broker = GoogleTokenBroker()
+        self.user = User.objects.create(username='broker-user')
+        self.auth = UserGoogleAuth.objects.create(
+            user=self.user,
+            access_token='current',
+            refresh_token='refresh',
+            token_expiry=timezone.now() + timedelta(hours=1),
+            google_user_id='g-1',
+            google_email='broker@example.com',
+            google_name='Broker User',
+            scopes='openid,email',
+        )
+        patcher = mock.patch('accounts.google_oauth_service.UserGoogleAuthService.refresh_user_tokens',
+                             side_effect=self.refresh)
+        self.refresh_user_tokens = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def refresh(self, user):
+        self.auth.access_token = 'renewed'
+        self.auth.token_expiry = timezone.now() + timedelta(hours=1)
+        self.auth.save()
+        return self.auth
+
+    def expire_in(self, seconds):
+        UserGoogleAuth.objects.filter(pk=self.auth.pk).update(token_expiry=timezone.now() + timedelta(seconds=seconds))
+
+    def test_fresh_token_is_served_from_the_cache(self):
+        self.assertEqual(self.broker.get_access_token(self.user.id), 'current')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.broker.get_access_token(self.user.id), 'current')
+        self.refresh_user_tokens.assert_not_called()
+
+    def test_token_inside_the_renew_margin_is_renewed_ahead_of_expiry(self):
+        self.expire_in(300)
+
+        with mock.patch.object(cache, 'lock', create=True, return_value=_Lock()):
+            self.assertEqual(self.broker.get_access_token(self.user.id), 'renewed')
+        self.refresh_user_tokens.assert_called_once()
+
+    def test_rejected_token_is_replaced_only_once(self):
+        self.broker.get_access_token(self.user.id)
+
+        with mock.patch.object(cache, 'lock', create=True, return_value=_Lock()):
+            self.assertEqual(self.broker.get_access_token(self.user.id, rejected_token='current'), 'renewed')
+            # A second caller holding the same rejected token gets the replacement
+            self.assertEqual(self.broker.get_access_token(self.user.id, rejected_token='current'), 'renewed')
+        self.refresh_user_tokens.assert_called_once()
+
+    def test_lock_waiter_reuses_the_token_the_holder_stored(self):
+        self.expire_in(300)
+
+        def holder_refreshes():
+            cache.set(self.broker._token_key(self.user.id),
+                      {'access_token': 'from-holder', 'expires_at': timezone.now().timestamp() + 3600})
+
+        lock = _Lock(on_acquire=holder_refreshes)
+        with mock.patch.object(cache, 'lock', create=True, return_value=lock):
+            self.assertEqual(self.broker.get_access_token(self.user.id), 'from-holder')
+        self.refresh_user_tokens.assert_not_called()
+        self.assertTrue(lock.released)
+
+    def test_lock_timeout_does_not_refresh(self):
+        self.expire_in(300)
+
+        with mock.patch.object(cache, 'lock', create=True, return_value=_Lock(acquired=False)):
+            self.assertIsNone(self.broker.get_access_token(self.user.id))
+        self.refresh_user_tokens.assert_not_called()
+
+    def test_inactive_connection_has_no_token(self):
+        UserGoogleAuth.objects.filter(pk=self.auth.pk).update(is_active=False)
+        self.assertIsNone(self.broker.get_access_token(self.user.id))
@@ -0,0 +1,151 @@
+"""
+Google OAuth token broker
+Hands out valid access tokens from Redis, renewing them before they expire with
+at most one refresh per user in flight across all workers
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import UserGoogleAuth
+
+logger = logging.getLogger(__name__)
+
+
+class GoogleTokenBroker:
+    """
+    Access-token cache and refresh coordinator keyed by user
+
+    Tokens are renewed once they are within ``renew_margin_seconds`` of expiry,
+    which is wider than UserGoogleAuth.needs_refresh()'s 5-minute window, so
+    callers never hold a token that Google is about to reject.
+    """
+
+    KEY_PREFIX = "google_token"
+
+    def __init__(self):
+        self.renew_margin_seconds = getattr(settings, 'GOOGLE_TOKEN_RENEW_MARGIN_SECONDS', 600)
+        self.lock_seconds = getattr(settings, 'GOOGLE_TOKEN_REFRESH_LOCK_SECONDS', 30)
+        self.wait_seconds = getattr(settings, 'GOOGLE_TOKEN_REFRESH_WAIT_SECONDS', 15)
+
+    def _token_key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{user_id}"
+
+    def _lock_key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}:refresh:{user_id}"
+
+    def _is_fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and entry['expires_at'] - time.time() > self.renew_margin_seconds
+
+    def _read(self, user_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            return cache.get(self._token_key(user_id))
+        except Exception as e:
+            logger.warning(f"Token cache read failed for user {user_id}: {e}")
+            return None
+
+    def _store(self, user_id: int, auth_record: UserGoogleAuth) -> Dict[str, Any]:
+        entry = {
+            'access_token': auth_record.access_token,
+            'expires_at': auth_record.token_expiry.timestamp(),
+        }
+        # Drop the entry from Redis as soon as it stops being usable
+        timeout = int(entry['expires_at'] - time.time() - self.renew_margin_seconds)
+        if timeout > 0:
+            try:
+                cache.set(self._token_key(user_id), entry, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Token cache write failed for user {user_id}: {e}")
+        return entry
+
+    def get_access_token(self, user_id: int, rejected_token: str = None) -> Optional[str]:
+        """
+        Get a valid access token for a user
+
+        Args:
+            user_id: Django user ID
+            rejected_token: Token Google just rejected; forces a refresh unless
+                another caller has already replaced it
+
+        Returns:
+            Access token string, or None if the user has no usable Google connection
+        """
+        entry = self._read(user_id)
+        if self._is_fresh(entry) and entry['access_token'] != rejected_token:
+            return entry['access_token']
+
+        auth_record = self._active_auth(user_id)
+        if auth_record is None:
+            return None
+
+        if auth_record.access_token != rejected_token and \
+                auth_record.token_expiry.timestamp() - time.time() > self.renew_margin_seconds:
+            return self._store(user_id, auth_record)['access_token']
+
+        return self._refresh(user_id, rejected_token)
+
+    def invalidate(self, user_id: int):
+        """Forget the cached token (e.g. after the user disconnects Google)"""
+        try:
+            cache.delete(self._token_key(user_id))
+        except Exception as e:
+            logger.warning(f"Token cache invalidation failed for user {user_id}: {e}")
+
+    @staticmethod
+    def _active_auth(user_id: int) -> Optional[UserGoogleAuth]:
+        return UserGoogleAuth.objects.filter(user_id=user_id, is_active=True).first()
+
+    def _refresh(self, user_id: int, rejected_token: str = None) -> Optional[str]:
+        """Refresh under a per-user distributed lock; waiters reuse the winner's token"""
+        try:
+            lock = cache.lock(self._lock_key(user_id), timeout=self.lock_seconds,
+                              blocking_timeout=self.wait_seconds)
+            acquired = lock.acquire(blocking=True)
+        except Exception as e:
+            logger.warning(f"Token refresh lock unavailable for user {user_id}, refreshing directly: {e}")
+            return self._refresh_now(user_id)
+
+        if not acquired:
+            # The lock holder is taking too long; use whatever it managed to store
+            entry = self._read(user_id)
+            if entry and entry['access_token'] != rejected_token:
+                return entry['access_token']
+            logger.warning(f"Timed out waiting for token refresh for user {user_id}")
+            return None
+
+        try:
+            # Another worker may have refreshed while we waited for the lock
+            entry = self._read(user_id)
+            if self._is_fresh(entry) and entry['access_token'] != rejected_token:
+                return entry['access_token']
+            return self._refresh_now(user_id)
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # Lock already expired; nothing to release
+                pass
+
+    def _refresh_now(self, user_id: int) -> Optional[str]:
+        from django.contrib.auth.models import User
+        from .google_oauth_service import UserGoogleAuthService
+
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return None
+
+        auth_record = UserGoogleAuthService.refresh_user_tokens(user)
+        if not auth_record:
+            logger.error(f"Failed to refresh token for user {user_id}")
+            return None
+
+        logger.info(f"Refreshed Google access token for user {user_id}")
+        return self._store(user_id, auth_record)['access_token']
+
+
+token_broker = GoogleTokenBroker()
@@ -17,6 +17,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .google_oauth_service import GoogleOAuthService, UserGoogleAuthService
+from .token_broker import token_broker
 from django.utils import timezone
 
 
@@ -786,6 +787,7 @@ def google_oauth_disconnect(request):
         if auth_record:
             auth_record.is_active = False
             auth_record.save()
+            token_broker.invalidate(request.user.id)
             
             response_data = {
                 'success': True,
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AdExpertConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ad_expert"
+
+    def ready(self):
+        # Build the shared LangGraph runtime before the first chat request
+        if getattr(settings, 'LANGGRAPH_WARMUP_ON_READY', False):
+            from .langgraph_runtime import warm_up
+            warm_up()
+        # Spawn the chart render workers before the first create_data_visualization call
+        if getattr(settings, 'VISUALIZATION_WARMUP_ON_READY', False):
+            from .chart_renderer import chart_renderer
+            chart_renderer.warm_up()
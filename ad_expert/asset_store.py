@@ -0,0 +1,335 @@
+"""
+Generated asset store
+Content-addressed storage for generated images and visualizations: writes are
+streamed to disk in chunks, files are named by their SHA-256 so identical assets
+are stored once, and a size/age policy evicts the least recently used files
+(reads and dedup hits refresh an asset's age). The backend is pluggable (local
+filesystem or an S3-compatible bucket such as MinIO)
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# An asset's age is refreshed at most this often per process (eviction works in days)
+TOUCH_INTERVAL_SECONDS = 3600
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+}
+
+
+class AssetTooLarge(ValueError):
+    """Raised when an asset exceeds ASSET_STORE_MAX_ASSET_BYTES"""
+
+
+class LocalAssetBackend:
+    """Assets as files under a root directory, sharded by the first two hash characters"""
+
+    def __init__(self, root: str):
+        self.root = root
+        # Temp files live on the same filesystem as the assets so save() is a real rename
+        self.temp_dir = os.path.join(root, ".tmp")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def save(self, key: str, temp_path: str):
+        """Move a fully written temp file into place (atomic; readers never see a partial file)"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def touch(self, key: str):
+        """Mark the asset as used now (eviction orders by mtime)"""
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Stored assets as {key, size, modified}"""
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    yield {"key": entry.name, "size": stat.st_size, "modified": stat.st_mtime}
+
+
+class S3AssetBackend:
+    """Assets as objects in an S3-compatible bucket (AWS S3, MinIO, ...)"""
+
+    def __init__(self, bucket: str, prefix: str = "assets/", endpoint_url: str = None):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError:
+            return False
+
+    def save(self, key: str, temp_path: str):
+        extension = key.rsplit(".", 1)[-1]
+        try:
+            # upload_file sends large files as a multipart upload in chunks
+            self.client.upload_file(
+                temp_path, self.bucket, self._object_key(key),
+                ExtraArgs={"ContentType": CONTENT_TYPES.get(extension, "application/octet-stream")}
+            )
+        finally:
+            os.remove(temp_path)
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+
+    def touch(self, key: str):
+        """
+        Mark the asset as used now (eviction orders by LastModified)
+
+        S3 has no utime; an in-place server-side copy with replaced metadata is
+        the only way to move LastModified, and no object data passes through us.
+        """
+        object_key = self._object_key(key)
+        self.client.copy_object(
+            Bucket=self.bucket, Key=object_key,
+            CopySource={"Bucket": self.bucket, "Key": object_key},
+            MetadataDirective="REPLACE",
+            ContentType=CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream"),
+            Metadata={"touched-at": str(int(time.time()))},
+        )
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                yield {
+                    "key": obj["Key"][len(self.prefix):],
+                    "size": obj["Size"],
+                    "modified": obj["LastModified"].timestamp(),
+                }
+
+
+class AssetStore:
+    """
+    Content-addressed asset store
+
+    Keys are ``<sha256>.<extension>``. Writes go through a temp file while the
+    hash is computed, so nothing is held fully in memory and an existing asset
+    with the same content is reused instead of written again.
+    """
+
+    def __init__(self):
+        self.url_prefix = "/ad-expert/assets/"
+        self.max_asset_bytes = getattr(settings, 'ASSET_STORE_MAX_ASSET_BYTES', 20 * 1024 * 1024)
+        self.max_total_bytes = getattr(settings, 'ASSET_STORE_MAX_TOTAL_BYTES', 2 * 1024 ** 3)
+        self.max_age_days = getattr(settings, 'ASSET_STORE_MAX_AGE_DAYS', 30)
+        self.download_timeout = getattr(settings, 'ASSET_STORE_DOWNLOAD_TIMEOUT', 30)
+        self._backend = None
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend = getattr(settings, 'ASSET_STORE_BACKEND', 'local')
+            if backend == 's3':
+                self._backend = S3AssetBackend(
+                    bucket=settings.ASSET_STORE_S3_BUCKET,
+                    prefix=getattr(settings, 'ASSET_STORE_S3_PREFIX', 'assets/'),
+                    endpoint_url=getattr(settings, 'ASSET_STORE_S3_ENDPOINT_URL', None),
+                )
+            else:
+                self._backend = LocalAssetBackend(getattr(settings, 'ASSET_STORE_ROOT', 'generated_assets'))
+        return self._backend
+
+    @property
+    def temp_dir(self) -> str:
+        """
+        Where uploads are written while hashing: ASSET_STORE_TEMP_DIR, else the local
+        backend's own temp dir (os.replace across filesystems fails with EXDEV), else
+        the system temp dir for remote backends
+        """
+        temp_dir = (getattr(settings, 'ASSET_STORE_TEMP_DIR', None)
+                    or getattr(self.backend, 'temp_dir', None)
+                    or tempfile.gettempdir())
+        os.makedirs(temp_dir, exist_ok=True)
+        return temp_dir
+
+    @staticmethod
+    def is_valid_key(key: str) -> bool:
+        """Whether a key has the <sha256>.<extension> shape (guards the serve view against paths)"""
+        digest, _, extension = key.partition(".")
+        return len(digest) == 64 and all(c in "0123456789abcdef" for c in digest) and extension in CONTENT_TYPES
+
+    @staticmethod
+    def content_type(key: str) -> str:
+        return CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}{key}"
+
+    def put_stream(self, chunks: Iterable[bytes], extension: str) -> Dict[str, Any]:
+        """
+        Store an asset from an iterable of byte chunks
+
+        Returns:
+            Dict with key, url, size, content_type and whether the content was already stored
+
+        Raises:
+            AssetTooLarge: the content is bigger than ASSET_STORE_MAX_ASSET_BYTES
+        """
+        if extension not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported asset type '{extension}'")
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.temp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_asset_bytes:
+                        raise AssetTooLarge(f"Asset exceeds {self.max_asset_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            key = f"{digest.hexdigest()}.{extension}"
+            existed = self.backend.exists(key)
+            if existed:
+                os.remove(temp_path)
+                self.touch(key)
+            else:
+                self.backend.save(key, temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return {
+            "key": key,
+            "url": self.url(key),
+            "size": size,
+            "content_type": CONTENT_TYPES[extension],
+            "existed": existed,
+        }
+
+    def put_bytes(self, content: bytes, extension: str) -> Dict[str, Any]:
+        """Store an in-memory asset (e.g. a rendered chart)"""
+        return self.put_stream(
+            (content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)), extension
+        )
+
+    def put_base64(self, data: str, extension: str = "png") -> Dict[str, Any]:
+        """Store base64-encoded content, decoding it a chunk at a time"""
+        # A multiple of 4 characters always decodes to whole bytes
+        step = CHUNK_SIZE // 3 * 4
+        return self.put_stream((base64.b64decode(data[i:i + step]) for i in range(0, len(data), step)), extension)
+
+    def put_url(self, url: str, extension: str = "png") -> Dict[str, Any]:
+        """Download an asset to the store without buffering it in memory"""
+        with requests.get(url, stream=True, timeout=self.download_timeout) as response:
+            response.raise_for_status()
+            declared = int(response.headers.get("Content-Length") or 0)
+            if declared > self.max_asset_bytes:
+                raise AssetTooLarge(f"Asset exceeds {self.max_asset_bytes} bytes")
+            return self.put_stream(response.iter_content(chunk_size=CHUNK_SIZE), extension)
+
+    def exists(self, key: str) -> bool:
+        return self.backend.exists(key)
+
+    def open(self, key: str) -> BinaryIO:
+        stream = self.backend.open(key)
+        self.touch(key)
+        return stream
+
+    def touch(self, key: str):
+        """
+        Refresh an asset's age so eviction drops the least recently used assets,
+        not the oldest written ones (at most once per TOUCH_INTERVAL_SECONDS per key)
+        """
+        now = time.time()
+        with self._touched_lock:
+            if now - self._touched.get(key, 0) < TOUCH_INTERVAL_SECONDS:
+                return
+            if len(self._touched) > 10_000:
+                self._touched = {k: t for k, t in self._touched.items() if now - t < TOUCH_INTERVAL_SECONDS}
+            self._touched[key] = now
+        try:
+            self.backend.touch(key)
+        except Exception as e:
+            logger.warning(f"Failed to touch asset {key}: {e}")
+
+    def evict(self, max_total_bytes: int = None, max_age_days: int = None) -> Dict[str, int]:
+        """
+        Apply the eviction policy: drop assets older than ``max_age_days``, then the
+        oldest remaining ones until the store is under ``max_total_bytes``
+
+        Returns:
+            Dict with the number of assets and bytes removed
+        """
+        max_total_bytes = self.max_total_bytes if max_total_bytes is None else max_total_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = time.time() - max_age_days * 86400
+
+        entries = sorted(self.backend.entries(), key=lambda entry: entry["modified"])
+        total = sum(entry["size"] for entry in entries)
+        removed = {"assets": 0, "bytes": 0}
+        for entry in entries:
+            if entry["modified"] >= cutoff and total <= max_total_bytes:
+                break
+            try:
+                self.backend.delete(entry["key"])
+            except Exception as e:
+                logger.warning(f"Failed to evict asset {entry['key']}: {e}")
+                continue
+            total -= entry["size"]
+            removed["assets"] += 1
+            removed["bytes"] += entry["size"]
+        return removed
+
+
+asset_store = AssetStore()
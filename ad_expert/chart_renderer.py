@@ -0,0 +1,304 @@
+"""
+Local chart rendering for create_data_visualization
+Renders pie/bar/line/table charts with matplotlib (PNG/SVG) or as a Plotly JSON
+spec in a worker pool, caching renders by a content hash of (data, type, title);
+output is kept in the generated asset store
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = ("pie_chart", "bar_graph", "line_chart", "table")
+OUTPUT_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "plotly": "application/json"}
+DEFAULT_TITLES = {
+    "pie_chart": "Data Distribution",
+    "bar_graph": "Data Comparison",
+    "line_chart": "Data Trends",
+    "table": "Data Table",
+}
+# Keys that commonly wrap the actual rows in tool output
+WRAPPER_KEYS = ("data", "rows", "results", "campaigns", "performance_data", "keywords", "search_terms")
+
+
+class ChartDataError(ValueError):
+    """Raised when the supplied data cannot be turned into a chart"""
+
+
+def to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.strip().replace(",", "").replace("$", "").replace("%", "")
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_rows(data: str) -> List[Dict[str, Any]]:
+    """Parse JSON (rows, columns or label->value), CSV or "label: value" lines into rows"""
+    text = (data or "").strip()
+    if not text:
+        raise ChartDataError("No data provided")
+
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = None
+
+    if parsed is not None:
+        if isinstance(parsed, dict):
+            for key in WRAPPER_KEYS:
+                if isinstance(parsed.get(key), (list, dict)):
+                    parsed = parsed[key]
+                    break
+        if isinstance(parsed, dict) and {"labels", "values"} <= set(parsed):
+            return [{"label": label, "value": value} for label, value in zip(parsed["labels"], parsed["values"])]
+        if isinstance(parsed, dict) and parsed and all(isinstance(v, list) for v in parsed.values()):
+            # Columnar: {"column": [values...]}
+            length = min(len(v) for v in parsed.values())
+            return [{k: v[i] for k, v in parsed.items()} for i in range(length)]
+        if isinstance(parsed, dict):
+            return [{"label": k, "value": v} for k, v in parsed.items() if not isinstance(v, (dict, list))]
+        if isinstance(parsed, list) and all(isinstance(row, dict) for row in parsed):
+            return parsed
+        raise ChartDataError("Unsupported JSON structure; provide rows, columns or label -> value pairs")
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) > 1 and "," in lines[0]:
+        return list(csv.DictReader(io.StringIO("\n".join(lines))))
+
+    rows = []
+    for line in lines:
+        label, sep, value = line.partition(":")
+        if sep and to_number(value) is not None:
+            rows.append({"label": label.strip(" -*"), "value": value.strip()})
+    if not rows:
+        raise ChartDataError("Could not parse data; provide JSON, CSV or 'label: value' lines")
+    return rows
+
+
+def prepare_series(data: str) -> Tuple[List[str], List[str], Dict[str, List[Optional[float]]], List[Dict[str, Any]]]:
+    """
+    Split rows into a label column and numeric series
+
+    Returns:
+        (columns, labels, series by column name, rows)
+    """
+    rows = parse_rows(data)
+    if not rows:
+        raise ChartDataError("No rows to visualize")
+
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    numeric = [
+        column for column in columns
+        if all(to_number(row.get(column)) is not None for row in rows if row.get(column) not in (None, ""))
+        and any(row.get(column) not in (None, "") for row in rows)
+    ]
+    label_column = next((column for column in columns if column not in numeric), None)
+    value_columns = [column for column in numeric if column != label_column]
+    if label_column is None and len(value_columns) > 1:
+        # All-numeric rows (e.g. year, value): use the first column as labels
+        label_column, value_columns = value_columns[0], value_columns[1:]
+
+    labels = [str(row.get(label_column, index + 1)) if label_column else str(index + 1) for index, row in enumerate(rows)]
+    series = {column: [to_number(row.get(column)) for row in rows] for column in value_columns}
+    return columns, labels, series, rows
+
+
+def _plotly_spec(chart_type: str, title: str, columns, labels, series, rows) -> Dict[str, Any]:
+    if chart_type == "pie_chart":
+        name, values = next(iter(series.items()))
+        traces = [{"type": "pie", "labels": labels, "values": values, "name": name}]
+    elif chart_type == "bar_graph":
+        traces = [{"type": "bar", "x": labels, "y": values, "name": name} for name, values in series.items()]
+    elif chart_type == "line_chart":
+        traces = [{"type": "scatter", "mode": "lines+markers", "x": labels, "y": values, "name": name}
+                  for name, values in series.items()]
+    else:
+        traces = [{
+            "type": "table",
+            "header": {"values": columns},
+            "cells": {"values": [[row.get(column, "") for row in rows] for column in columns]},
+        }]
+    return {"data": traces, "layout": {"title": {"text": title}}}
+
+
+def _render_matplotlib(chart_type: str, title: str, output_format: str, columns, labels, series, rows) -> bytes:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    # Object-oriented API only: no pyplot global state
+    figure = Figure(figsize=(10, 6), dpi=100)
+    axes = figure.add_subplot(1, 1, 1)
+
+    if chart_type == "pie_chart":
+        name, values = next(iter(series.items()))
+        pairs = [(label, value) for label, value in zip(labels, values) if value and value > 0]
+        axes.pie([value for _, value in pairs], labels=[label for label, _ in pairs], autopct="%1.1f%%", startangle=90)
+        axes.axis("equal")
+    elif chart_type == "bar_graph":
+        width = 0.8 / len(series)
+        positions = range(len(labels))
+        for offset, (name, values) in enumerate(series.items()):
+            axes.bar([p + offset * width for p in positions], [v or 0 for v in values], width=width, label=name)
+        axes.set_xticks([p + width * (len(series) - 1) / 2 for p in positions])
+        axes.set_xticklabels(labels, rotation=45 if len(labels) > 6 else 0, ha="right" if len(labels) > 6 else "center")
+        if len(series) > 1:
+            axes.legend()
+    elif chart_type == "line_chart":
+        for name, values in series.items():
+            axes.plot(labels, values, marker="o", label=name)
+        if len(labels) > 10:
+            axes.tick_params(axis="x", labelrotation=45)
+        if len(series) > 1:
+            axes.legend()
+        axes.grid(True, alpha=0.3)
+    else:
+        axes.axis("off")
+        cell_text = [[str(row.get(column, "")) for column in columns] for row in rows]
+        table = axes.table(cellText=cell_text, colLabels=columns, loc="center")
+        table.auto_set_font_size(False)
+        table.set_fontsize(9)
+        table.scale(1, 1.3)
+
+    axes.set_title(title)
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=output_format)
+    return buffer.getvalue()
+
+
+def _import_matplotlib() -> bool:
+    """Pool warm-up task: load the Agg backend in the worker process"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure  # noqa: F401
+    return True
+
+
+def render_chart(data: str, chart_type: str, title: str, output_format: str) -> bytes:
+    """Render a chart to bytes (runs in a pool worker)"""
+    columns, labels, series, rows = prepare_series(data)
+    if chart_type != "table" and not series:
+        raise ChartDataError("Data has no numeric column to plot")
+    if output_format == "plotly":
+        spec = _plotly_spec(chart_type, title, columns, labels, series, rows)
+        return json.dumps(spec, separators=(",", ":"), default=str).encode("utf-8")
+    return _render_matplotlib(chart_type, title, output_format, columns, labels, series, rows)
+
+
+class ChartRenderer:
+    """Renders charts in a process pool and keeps one asset per content hash"""
+
+    CACHE_PREFIX = "chart_render"
+
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @staticmethod
+    def _settings(name: str, default):
+        from django.conf import settings
+        return getattr(settings, name, default)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a threaded web worker is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._settings('VISUALIZATION_RENDER_WORKERS', 2),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def warm_up(self) -> bool:
+        """
+        Start the render workers and import matplotlib in each of them
+
+        Spawned workers start from a fresh interpreter, so without this the first
+        charts after a deploy pay for process start-up and the matplotlib import.
+
+        Returns:
+            bool: True if every worker is ready, False otherwise
+        """
+        try:
+            executor = self._get_executor()
+            workers = self._settings('VISUALIZATION_RENDER_WORKERS', 2)
+            futures = [executor.submit(_import_matplotlib) for _ in range(workers)]
+            for future in futures:
+                future.result(timeout=self._settings('VISUALIZATION_RENDER_TIMEOUT', 20))
+            return True
+        except Exception as e:
+            logger.warning(f"Chart render pool warm-up failed, workers will start on first render: {e}")
+            return False
+
+    @staticmethod
+    def content_hash(data: str, chart_type: str, title: str, output_format: str) -> str:
+        """Cache key for a render; whitespace-only differences in JSON data share an entry"""
+        try:
+            canonical = json.dumps(json.loads(data), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            canonical = (data or "").strip()
+        return hashlib.sha256(f"{chart_type}|{title}|{output_format}|{canonical}".encode("utf-8")).hexdigest()
+
+    def render(self, data: str, chart_type: str, title: str = None, output_format: str = "png") -> Dict[str, Any]:
+        """
+        Render (or reuse) a chart
+
+        Returns:
+            Dict with asset key, url, format, content type and whether it was cached
+        """
+        from django.core.cache import cache
+        from .asset_store import asset_store
+
+        if chart_type not in CHART_TYPES:
+            raise ChartDataError(f"Unsupported visualization type '{chart_type}'; use one of {', '.join(CHART_TYPES)}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ChartDataError(f"Unsupported output format '{output_format}'; use one of {', '.join(OUTPUT_FORMATS)}")
+
+        title = title or DEFAULT_TITLES[chart_type]
+        digest = self.content_hash(data, chart_type, title, output_format)
+        extension = "json" if output_format == "plotly" else output_format
+        result = {
+            "format": output_format,
+            "content_type": OUTPUT_FORMATS[output_format],
+            "content_hash": digest,
+        }
+
+        # Render inputs -> asset key, so a repeated chart skips rendering entirely
+        cache_key = f"{self.CACHE_PREFIX}:{digest}"
+        key = cache.get(cache_key)
+        if key and asset_store.exists(key):
+            asset_store.touch(key)
+            return {**result, "key": key, "url": asset_store.url(key), "cached": True}
+
+        timeout = self._settings('VISUALIZATION_RENDER_TIMEOUT', 20)
+        try:
+            content = self._get_executor().submit(render_chart, data, chart_type, title, output_format).result(timeout=timeout)
+        except BrokenProcessPool:
+            logger.warning("Chart render pool broke; rendering in-process")
+            with self._executor_lock:
+                self._executor = None
+            content = render_chart(data, chart_type, title, output_format)
+
+        asset = asset_store.put_bytes(content, extension)
+        cache.set(cache_key, asset["key"], timeout=self._settings('ASSET_STORE_MAX_AGE_DAYS', 30) * 86400)
+        return {**result, "key": asset["key"], "url": asset["url"], "cached": False}
+
+
+chart_renderer = ChartRenderer()
@@ -0,0 +1,236 @@
+"""
+Durable LangGraph checkpointing
+Pooled Postgres checkpointer with one thread per conversation, plus pruning so
+the checkpoint tables stay bounded
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+try:
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, ConnectionPool
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+    POSTGRES_CHECKPOINTER_AVAILABLE = True
+except ImportError:
+    POSTGRES_CHECKPOINTER_AVAILABLE = False
+    logger.warning("Postgres checkpointer not available. Conversation state will be rebuilt from ChatMessage rows.")
+
+THREAD_PREFIX = "conversation_"
+# LIKE pattern matching only this app's threads ("_" escaped so it isn't a wildcard);
+# other graphs sharing the checkpoint tables are never pruned
+THREAD_PATTERN = THREAD_PREFIX.replace("_", "\\_") + "%"
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+_async_checkpointer = None
+_async_checkpointer_lock = asyncio.Lock()
+
+
+def thread_id_for_conversation(conversation_id) -> str:
+    """Checkpoint thread ID for a conversation"""
+    return f"{THREAD_PREFIX}{conversation_id}"
+
+
+def _conninfo() -> Optional[str]:
+    db_config = settings.DATABASES['default']
+    if db_config['ENGINE'] != 'django.db.backends.postgresql':
+        return None
+    return make_conninfo(
+        dbname=db_config['NAME'],
+        user=db_config['USER'],
+        password=db_config['PASSWORD'],
+        host=db_config['HOST'],
+        port=db_config['PORT'],
+    )
+
+
+def _connection_kwargs() -> Dict[str, Any]:
+    # Settings required by the LangGraph Postgres savers
+    return {"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row}
+
+
+def _enabled() -> bool:
+    return POSTGRES_CHECKPOINTER_AVAILABLE and getattr(settings, 'LANGGRAPH_CHECKPOINTER_ENABLED', True)
+
+
+def get_checkpointer():
+    """
+    Get the process-wide Postgres checkpointer, creating its pool on first use
+
+    Returns:
+        PostgresSaver, or None if checkpointing is disabled or unavailable
+    """
+    global _checkpointer
+    if _checkpointer is not None or not _enabled():
+        return _checkpointer
+
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            conninfo = _conninfo()
+            if conninfo is None:
+                logger.warning("LangGraph checkpointer requires PostgreSQL; conversation state will be rebuilt per request")
+                return None
+            try:
+                pool = ConnectionPool(
+                    conninfo,
+                    min_size=1,
+                    max_size=getattr(settings, 'LANGGRAPH_CHECKPOINT_POOL_SIZE', 10),
+                    kwargs=_connection_kwargs(),
+                    open=True,
+                )
+                saver = PostgresSaver(pool)
+                # Creates/migrates the checkpoint tables; a no-op once they exist
+                saver.setup()
+                _checkpointer = saver
+                logger.info("LangGraph Postgres checkpointer initialized")
+            except Exception as e:
+                logger.error(f"Error initializing LangGraph checkpointer: {e}")
+                return None
+        return _checkpointer
+
+
+async def get_async_checkpointer():
+    """
+    Async counterpart of get_checkpointer for graph.ainvoke/astream
+
+    The pool is opened on the running event loop the first time it is needed.
+    """
+    global _async_checkpointer
+    if _async_checkpointer is not None or not _enabled():
+        return _async_checkpointer
+
+    async with _async_checkpointer_lock:
+        if _async_checkpointer is None:
+            conninfo = _conninfo()
+            # The sync saver owns table setup
+            if conninfo is None or get_checkpointer() is None:
+                return None
+            try:
+                pool = AsyncConnectionPool(
+                    conninfo,
+                    min_size=1,
+                    max_size=getattr(settings, 'LANGGRAPH_CHECKPOINT_POOL_SIZE', 10),
+                    kwargs=_connection_kwargs(),
+                    open=False,
+                )
+                await pool.open()
+                _async_checkpointer = AsyncPostgresSaver(pool)
+            except Exception as e:
+                logger.error(f"Error initializing async LangGraph checkpointer: {e}")
+                return None
+        return _async_checkpointer
+
+
+def delete_conversation_thread(conversation_id) -> bool:
+    """Drop every checkpoint stored for a conversation"""
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return False
+    try:
+        checkpointer.delete_thread(thread_id_for_conversation(conversation_id))
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to delete checkpoints for conversation {conversation_id}: {e}")
+        return False
+
+
+def prune_checkpoints(keep_per_thread: int = None, idle_days: int = None) -> Dict[str, int]:
+    """
+    Bound the checkpoint tables
+
+    Threads whose conversation is gone or idle for ``idle_days`` are dropped
+    (they are reseeded from ChatMessage rows if the conversation resumes), and
+    every other thread keeps only its latest ``keep_per_thread`` checkpoints.
+    Only ``conversation_<id>`` threads are touched.
+
+    Returns:
+        Counts of deleted threads, checkpoints, writes and blobs
+    """
+    from .models import Conversation
+
+    keep_per_thread = keep_per_thread or getattr(settings, 'LANGGRAPH_CHECKPOINT_KEEP_PER_THREAD', 3)
+    idle_days = idle_days or getattr(settings, 'LANGGRAPH_CHECKPOINT_IDLE_DAYS', 30)
+    stats = {'threads': 0, 'checkpoints': 0, 'writes': 0, 'blobs': 0}
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return stats
+
+    with checkpointer.conn.connection() as conn:
+        thread_ids = [
+            row['thread_id'] for row in conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id LIKE %s",
+                (THREAD_PATTERN,)
+            )
+        ]
+
+    conversation_ids = {thread_id[len(THREAD_PREFIX):] for thread_id in thread_ids}
+    active_ids = {
+        str(pk) for pk in Conversation.objects.filter(
+            id__in=[cid for cid in conversation_ids if cid.isdigit()],
+            deleted_at__isnull=True,
+            updated_at__gte=timezone.now() - timedelta(days=idle_days),
+        ).values_list('id', flat=True)
+    }
+    for conversation_id in conversation_ids - active_ids:
+        if delete_conversation_thread(conversation_id):
+            stats['threads'] += 1
+
+    with checkpointer.conn.connection() as conn:
+        stats['checkpoints'] = conn.execute(
+            """
+            DELETE FROM checkpoints c
+            USING (
+                SELECT thread_id, checkpoint_ns, checkpoint_id,
+                       row_number() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+                FROM checkpoints
+                WHERE thread_id LIKE %s
+            ) ranked
+            WHERE c.thread_id = ranked.thread_id
+              AND c.checkpoint_ns = ranked.checkpoint_ns
+              AND c.checkpoint_id = ranked.checkpoint_id
+              AND ranked.rn > %s
+            """,
+            (THREAD_PATTERN, keep_per_thread)
+        ).rowcount
+        stats['writes'] = conn.execute(
+            """
+            DELETE FROM checkpoint_writes w
+            WHERE w.thread_id LIKE %s
+              AND NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = w.thread_id
+                  AND c.checkpoint_ns = w.checkpoint_ns
+                  AND c.checkpoint_id = w.checkpoint_id
+              )
+            """,
+            (THREAD_PATTERN,)
+        ).rowcount
+        # Blobs are shared between checkpoints by channel version; keep any still referenced
+        stats['blobs'] = conn.execute(
+            """
+            DELETE FROM checkpoint_blobs b
+            WHERE b.thread_id LIKE %s
+              AND NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = b.thread_id
+                  AND c.checkpoint_ns = b.checkpoint_ns
+                  AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+              )
+            """,
+            (THREAD_PATTERN,)
+        ).rowcount
+
+    logger.info(f"Pruned LangGraph checkpoints: {stats}")
+    return stats
@@ -0,0 +1,206 @@
+"""
+Token-budgeted conversation context
+Keeps the most recent turns within a token budget and folds older turns into a
+rolling summary stored on Conversation
+"""
+
+import logging
+from typing import Any, List, Optional
+
+from django.conf import settings
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# ChatMessage-backed messages carry this id prefix so turns can be tied back to rows
+CHAT_MESSAGE_ID_PREFIX = "chat_"
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a Google Ads assistant.
+
+Update the existing summary with the new turns below. Keep facts the assistant will need later:
+selected customer IDs, campaigns and metrics discussed, conclusions, decisions and open requests.
+Drop pleasantries and formatting. Reply with the updated summary only, at most {max_words} words.
+
+Existing summary:
+{summary}
+
+New turns:
+{turns}"""
+
+
+def chat_message_id(pk: int) -> str:
+    """LangChain message id for a ChatMessage row"""
+    return f"{CHAT_MESSAGE_ID_PREFIX}{pk}"
+
+
+def _chat_message_pk(message: Any) -> Optional[int]:
+    message_id = getattr(message, 'id', None) or ''
+    if message_id.startswith(CHAT_MESSAGE_ID_PREFIX) and message_id[len(CHAT_MESSAGE_ID_PREFIX):].isdigit():
+        return int(message_id[len(CHAT_MESSAGE_ID_PREFIX):])
+    return None
+
+
+class ConversationContextManager:
+    """
+    Decide which messages are sent to the chat model
+
+    While the unsummarised turns fit in ``token_budget`` they are sent as-is.
+    Once they overflow, the oldest turns are folded into Conversation.context_summary
+    until the remainder fits in ``token_budget * retain_ratio``, so the summary
+    is only rewritten every few turns rather than on every request.
+    """
+
+    def __init__(self):
+        self.token_budget = getattr(settings, 'LANGGRAPH_CONTEXT_TOKEN_BUDGET', 6000)
+        self.retain_ratio = getattr(settings, 'LANGGRAPH_CONTEXT_RETAIN_RATIO', 0.5)
+        self.summary_model = getattr(settings, 'LANGGRAPH_SUMMARY_MODEL', 'gpt-4o-mini')
+        self.summary_max_words = getattr(settings, 'LANGGRAPH_SUMMARY_MAX_WORDS', 300)
+        # Long assistant reports are clipped before they are summarised
+        self.summary_input_chars = 2000
+        self._encoding = None
+        self._summary_llm = None
+
+    def _get_encoding(self):
+        if self._encoding is None and TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.encoding_for_model("gpt-4o")
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        return self._encoding
+
+    def count_text_tokens(self, text: str) -> int:
+        """Count tokens in a string (about 4 characters per token without tiktoken)"""
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return len(text) // 4 + 1
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_tokens(self, messages: List[Any]) -> int:
+        """Count prompt tokens for a list of LangChain messages"""
+        total = 0
+        for message in messages:
+            content = message.content if isinstance(message.content, str) else str(message.content)
+            total += MESSAGE_OVERHEAD_TOKENS + self.count_text_tokens(content)
+            for tool_call in getattr(message, 'tool_calls', None) or []:
+                total += self.count_text_tokens(f"{tool_call.get('name', '')}{tool_call.get('args', '')}")
+        return total
+
+    @staticmethod
+    def split_turns(messages: List[Any]) -> List[List[Any]]:
+        """Group messages into turns, each starting at a user message"""
+        turns = []
+        for message in messages:
+            if isinstance(message, SystemMessage):
+                continue
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def prepare(self, conversation, messages: List[Any]) -> Optional[str]:
+        """
+        Fit a conversation's messages into the token budget
+
+        Args:
+            conversation: Conversation the messages belong to (its summary may be updated)
+            messages: Full message history, ending with the new user message
+
+        Returns:
+            Id of the first message to send to the model, or None to send everything
+        """
+        turns = self.split_turns(messages)
+        summarized_until = conversation.context_summary_until_id
+        if summarized_until:
+            turns = [
+                turn for turn in turns
+                if _chat_message_pk(turn[0]) is None or _chat_message_pk(turn[0]) >= summarized_until
+            ]
+        if not turns:
+            return None
+
+        turn_tokens = [self.count_tokens(turn) for turn in turns]
+        if sum(turn_tokens) <= self.token_budget:
+            return turns[0][0].id
+
+        # Keep whole turns from the end, always including the current one
+        retained_tokens = turn_tokens[-1]
+        first_kept = len(turns) - 1
+        while first_kept > 0 and retained_tokens + turn_tokens[first_kept - 1] <= self.token_budget * self.retain_ratio:
+            first_kept -= 1
+            retained_tokens += turn_tokens[first_kept]
+
+        folded, kept = turns[:first_kept], turns[first_kept:]
+        if folded:
+            self._fold_into_summary(conversation, folded, kept[0][0])
+        return kept[0][0].id
+
+    def _fold_into_summary(self, conversation, folded: List[List[Any]], first_kept: Any):
+        until_id = _chat_message_pk(first_kept)
+        try:
+            summary = self._summarize(conversation.context_summary, folded)
+        except Exception as e:
+            # The turns are still dropped from the prompt; they get folded on a later turn
+            logger.error(f"Error summarizing conversation {conversation.id}: {e}")
+            return
+
+        conversation.context_summary = summary
+        if until_id is not None:
+            conversation.context_summary_until_id = until_id
+        conversation.save(update_fields=['context_summary', 'context_summary_until_id'])
+        logger.info(f"Folded {len(folded)} turns into the summary of conversation {conversation.id}")
+
+    def _summarize(self, summary: str, turns: List[List[Any]]) -> str:
+        lines = []
+        for turn in turns:
+            for message in turn:
+                # Tool payloads are summarised through the assistant replies that used them
+                if isinstance(message, ToolMessage) or not isinstance(message.content, str) or not message.content:
+                    continue
+                role = "User" if isinstance(message, HumanMessage) else "Assistant"
+                lines.append(f"{role}: {message.content[:self.summary_input_chars]}")
+
+        if not lines:
+            return summary or ""
+
+        if self._summary_llm is None:
+            from langchain.chat_models import init_chat_model
+            self._summary_llm = init_chat_model(self.summary_model, temperature=0)
+
+        response = self._summary_llm.invoke(SUMMARY_PROMPT.format(
+            max_words=self.summary_max_words,
+            summary=summary or "(none)",
+            turns="\n".join(lines)
+        ))
+        return response.content.strip()
+
+    @staticmethod
+    def window(messages: List[Any], start_id: Optional[str]) -> List[Any]:
+        """Messages from ``start_id`` onwards (all messages if it is not found)"""
+        if start_id:
+            for index, message in enumerate(messages):
+                if getattr(message, 'id', None) == start_id:
+                    return messages[index:]
+        return messages
+
+    @staticmethod
+    def summary_message(summary: str) -> Optional[SystemMessage]:
+        """System message carrying the rolling summary, if there is one"""
+        if not summary:
+            return None
+        return SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")
+
+
+context_manager = ConversationContextManager()
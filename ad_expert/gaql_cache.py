@@ -0,0 +1,257 @@
+"""
+Tenant-aware GAQL result cache
+Caches GoogleAdsAPI.search results in the default (Redis) cache with date-range-aware TTLs
+"""
+
+import hashlib
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class GAQLCache:
+    """
+    Cache for GAQL search results keyed by (login-customer-id, customer_id, normalised query, date window)
+
+    Entries are shared by every user allowed to query the customer. Callers must
+    check is_authorized first: a user is only served shared rows for customers
+    their own credentials can reach. Error responses are never cached.
+    """
+
+    KEY_PREFIX = "gaql_cache"
+    STATS_KEYS = ("hits", "stale_hits", "misses", "errors")
+
+    # TTLs (seconds) by GAQL date range; ranges that include today change constantly,
+    # closed ranges only move with Google's late conversion restatements
+    DATE_RANGE_TTLS = {
+        'TODAY': 300,
+        'THIS_WEEK_SUN_TODAY': 300,
+        'THIS_WEEK_MON_TODAY': 300,
+        'THIS_MONTH': 600,
+        'THIS_QUARTER': 600,
+        'THIS_YEAR': 600,
+        'YESTERDAY': 1800,
+        'LAST_7_DAYS': 1800,
+        'LAST_14_DAYS': 1800,
+        'LAST_30_DAYS': 1800,
+        'LAST_90_DAYS': 3600,
+        'LAST_BUSINESS_WEEK': 3600,
+        'LAST_WEEK_SUN_SAT': 3600,
+        'LAST_WEEK_MON_SUN': 3600,
+        'LAST_MONTH': 21600,
+        'LAST_QUARTER': 21600,
+        'LAST_YEAR': 86400,
+    }
+    # Queries without a date segment (settings, budgets, account metadata)
+    NO_DATE_RANGE_TTL = 600
+    # Explicit BETWEEN ranges ending this many days ago or earlier count as closed
+    CLOSED_RANGE_LAG_DAYS = 3
+    CLOSED_RANGE_TTL = 21600
+
+    DURING_RE = re.compile(r"segments\.date\s+DURING\s+([A-Z0-9_]+)", re.IGNORECASE)
+    BETWEEN_RE = re.compile(r"segments\.date\s+BETWEEN\s+'(\d{4}-\d{2}-\d{2})'\s+AND\s+'(\d{4}-\d{2}-\d{2})'", re.IGNORECASE)
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'GAQL_CACHE_ENABLED', True)
+        self.stale_while_revalidate = getattr(settings, 'GAQL_CACHE_STALE_WHILE_REVALIDATE', True)
+        self.stale_seconds = getattr(settings, 'GAQL_CACHE_STALE_SECONDS', 300)
+        self.access_ttl = getattr(settings, 'GAQL_CACHE_ACCESS_TTL_SECONDS', 900)
+        self._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gaql-cache-refresh")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Collapse whitespace so formatting differences share a cache entry"""
+        return " ".join(query.split())
+
+    @staticmethod
+    def clean_customer_id(customer_id: str) -> str:
+        """Digits-only customer id ('customers/123-456-7890' -> '1234567890')"""
+        return customer_id.replace('customers/', '').replace('-', '')
+
+    @staticmethod
+    def credential_scope(user_id: int = None, access_token: str = None) -> str:
+        """
+        Who a result was fetched for: the user when known, otherwise a hash of
+        the access token (never the token itself)
+        """
+        if user_id is not None:
+            return f"user:{user_id}"
+        return f"token:{hashlib.sha256((access_token or '').encode('utf-8')).hexdigest()[:32]}"
+
+    def is_authorized(self, customer_id: str, login_customer_id: str, scope: str,
+                      list_accessible: Callable[[], Optional[List[str]]]) -> bool:
+        """
+        Whether a caller may be served shared entries for a customer
+
+        The caller's accessible customers (listAccessibleCustomers) are cached per
+        credential scope for GAQL_CACHE_ACCESS_TTL_SECONDS. A customer reached through
+        a manager is allowed when the caller can access that manager, as Google
+        would also serve the request. When the list cannot be fetched the caller
+        is not authorised and must query Google directly.
+        """
+        access_key = f"{self.KEY_PREFIX}:access:{scope}"
+        try:
+            accessible = cache.get(access_key)
+        except Exception as e:
+            logger.warning(f"GAQL cache access lookup failed: {e}")
+            accessible = None
+
+        if accessible is None:
+            fetched = list_accessible()
+            if fetched is None:
+                return False
+            accessible = [self.clean_customer_id(customer) for customer in fetched]
+            try:
+                cache.set(access_key, accessible, timeout=self.access_ttl)
+            except Exception as e:
+                logger.warning(f"GAQL cache access write failed: {e}")
+
+        return (self.clean_customer_id(customer_id) in accessible
+                or bool(login_customer_id) and self.clean_customer_id(login_customer_id) in accessible)
+
+    def date_window(self, query: str) -> str:
+        """
+        The dates a query covers: explicit BETWEEN bounds, or a relative DURING range
+        pinned to today so results never carry over midnight
+        """
+        between = self.BETWEEN_RE.search(query)
+        if between:
+            return f"{between.group(1)}..{between.group(2)}"
+        during = self.DURING_RE.search(query)
+        if during:
+            return f"{during.group(1).upper()}@{date.today().isoformat()}"
+        return ""
+
+    def make_key(self, customer_id: str, query: str, login_customer_id: str = None, variant: Any = None) -> str:
+        """Build the cache key for a manager/customer/query/date-window combination"""
+        normalized = self.normalize_query(query)
+        digest = hashlib.sha256(
+            f"{login_customer_id or ''}|{variant}|{self.date_window(normalized)}|{normalized}".encode('utf-8')
+        ).hexdigest()
+        return f"{self.KEY_PREFIX}:{self.clean_customer_id(customer_id)}:{digest}"
+
+    def ttl_for_query(self, query: str) -> int:
+        """Pick a TTL from the query's date range"""
+        during = self.DURING_RE.search(query)
+        if during:
+            return self.DATE_RANGE_TTLS.get(during.group(1).upper(), self.DATE_RANGE_TTLS['LAST_30_DAYS'])
+
+        between = self.BETWEEN_RE.search(query)
+        if between:
+            try:
+                end_date = datetime.strptime(between.group(2), '%Y-%m-%d').date()
+            except ValueError:
+                return self.DATE_RANGE_TTLS['TODAY']
+            if end_date <= date.today() - timedelta(days=self.CLOSED_RANGE_LAG_DAYS):
+                return self.CLOSED_RANGE_TTL
+            return self.DATE_RANGE_TTLS['TODAY']
+
+        return self.NO_DATE_RANGE_TTL
+
+    def get_or_fetch(self, customer_id: str, query: str, fetch: Callable[[], Dict[str, Any]],
+                     login_customer_id: str = None, variant: Any = None) -> Dict[str, Any]:
+        """
+        Return a cached result or call ``fetch`` and cache it
+
+        Args:
+            customer_id: Google Ads customer ID
+            query: GAQL query text
+            fetch: Callable performing the real API request
+            login_customer_id: Manager account the request is made through
+            variant: Extra key component for options that change the result (e.g. row caps)
+
+        Returns:
+            GAQL result dict (as returned by GoogleAdsAPI.search)
+        """
+        if not self.enabled:
+            return fetch()
+
+        key = self.make_key(customer_id, query, login_customer_id, variant)
+        ttl = self.ttl_for_query(query)
+
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            logger.warning(f"GAQL cache read failed, querying Google Ads directly: {e}")
+            return fetch()
+
+        if entry:
+            age = time.time() - entry['fetched_at']
+            if age < entry['ttl']:
+                self._incr('hits')
+                return entry['data']
+            if self.stale_while_revalidate:
+                # Serve the stale copy now and refresh it off the request thread
+                self._incr('stale_hits')
+                self._schedule_refresh(key, ttl, fetch)
+                return entry['data']
+
+        self._incr('misses')
+        return self._fetch_and_store(key, ttl, fetch)
+
+    def _fetch_and_store(self, key: str, ttl: int, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        data = fetch()
+        if "error" in data:
+            self._incr('errors')
+            return data
+
+        entry = {'data': data, 'fetched_at': time.time(), 'ttl': ttl}
+        try:
+            # Keep the entry past its TTL so it can be served stale while refreshing
+            cache.set(key, entry, timeout=ttl + (self.stale_seconds if self.stale_while_revalidate else 0))
+        except Exception as e:
+            logger.warning(f"GAQL cache write failed: {e}")
+        return data
+
+    def _schedule_refresh(self, key: str, ttl: int, fetch: Callable[[], Dict[str, Any]]):
+        # Only one worker refreshes a given key at a time
+        lock_key = f"{key}:refreshing"
+        try:
+            if not cache.add(lock_key, 1, timeout=60):
+                return
+        except Exception as e:
+            logger.warning(f"GAQL cache refresh lock failed: {e}")
+            return
+
+        def refresh():
+            try:
+                self._fetch_and_store(key, ttl, fetch)
+            except Exception as e:
+                logger.error(f"GAQL cache background refresh failed: {e}")
+            finally:
+                cache.delete(lock_key)
+
+        self._refresh_executor.submit(refresh)
+
+    def _incr(self, name: str):
+        stats_key = f"{self.KEY_PREFIX}:stats:{name}"
+        try:
+            cache.add(stats_key, 0, timeout=None)
+            cache.incr(stats_key)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters shared by every worker"""
+        keys = [f"{self.KEY_PREFIX}:stats:{name}" for name in self.STATS_KEYS]
+        values = cache.get_many(keys)
+        return {name: int(values.get(key, 0)) for name, key in zip(self.STATS_KEYS, keys)}
+
+    def invalidate_customer(self, customer_id: str) -> int:
+        """Drop every cached query for a customer"""
+        try:
+            return cache.delete_pattern(f"{self.KEY_PREFIX}:{self.clean_customer_id(customer_id)}:*")
+        except Exception as e:
+            logger.warning(f"GAQL cache invalidation failed for customer {customer_id}: {e}")
+            return 0
+
+
+gaql_cache = GAQLCache()
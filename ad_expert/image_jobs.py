@@ -0,0 +1,219 @@
+"""
+Image generation jobs
+Tracks Celery image-generation jobs in the cache: submission with prompt-hash
+de-duplication, a per-user concurrency limit, pollable status, a worker
+heartbeat so jobs orphaned by a crashed worker can be taken over, and a
+queued-age timeout so jobs lost before a worker picked them up stop holding
+a slot
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "image_job"
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class ImageJobLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of image jobs running"""
+
+
+class ImageJobQueueUnavailable(Exception):
+    """Raised when the job could not be handed to the Celery broker"""
+
+
+def _job_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{job_id}"
+
+
+def _prompt_key(user_id, prompt_hash: str) -> str:
+    return f"{KEY_PREFIX}:prompt:{user_id}:{prompt_hash}"
+
+
+def _active_key(user_id) -> str:
+    return f"{KEY_PREFIX}:active:{user_id}"
+
+
+def _job_ttl() -> int:
+    return getattr(settings, 'IMAGE_JOB_TTL_SECONDS', 86400)
+
+
+def _stale_seconds() -> int:
+    return getattr(settings, 'IMAGE_JOB_STALE_SECONDS', 120)
+
+
+def _queued_timeout() -> int:
+    return getattr(settings, 'IMAGE_JOB_QUEUED_TIMEOUT_SECONDS', 600)
+
+
+def is_stale(job: Dict[str, Any]) -> bool:
+    """
+    A job nobody is working on any more: running without worker heartbeats
+    (e.g. the worker crashed) or still queued past IMAGE_JOB_QUEUED_TIMEOUT_SECONDS
+    (e.g. the message was lost)
+    """
+    if job["status"] == "queued":
+        return time.time() - job["created_at"] > _queued_timeout()
+    if job["status"] != "running":
+        return False
+    last_seen = job.get("heartbeat_at") or job.get("started_at") or job["updated_at"]
+    return time.time() - last_seen > _stale_seconds()
+
+
+@contextmanager
+def heartbeat(job_id: str):
+    """
+    Refresh the job's heartbeat_at from a background thread while the body runs
+
+    The thread is stopped before the block exits, so the worker's final status
+    update can never be overwritten by a late heartbeat.
+    """
+    stopped = threading.Event()
+    interval = max(_stale_seconds() / 4, 1)
+
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                update_image_job(job_id, heartbeat_at=time.time())
+            except Exception as e:
+                logger.warning(f"Image job {job_id} heartbeat failed: {e}")
+
+    thread = threading.Thread(target=beat, name=f"image-job-heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def prompt_hash(query: str, previous_image_url: str = None) -> str:
+    """Identity of an image request; whitespace and case differences share a job"""
+    normalized = " ".join((query or "").lower().split())
+    return hashlib.sha256(f"{previous_image_url or ''}|{normalized}".encode("utf-8")).hexdigest()
+
+
+def get_image_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Current state of a job, or None if it is unknown or expired"""
+    return cache.get(_job_key(job_id))
+
+
+def update_image_job(job_id: str, **fields) -> Optional[Dict[str, Any]]:
+    """Merge fields into a job record (only the job's worker writes to it)"""
+    job = get_image_job(job_id)
+    if job is None:
+        return None
+    job.update(fields, updated_at=time.time())
+    cache.set(_job_key(job_id), job, timeout=_job_ttl())
+    if job["status"] in TERMINAL_STATUSES:
+        _release_slot(job["user_id"], job_id)
+        prompt_key = _prompt_key(job["user_id"], job["prompt_hash"])
+        if job["status"] == "failed" and cache.get(prompt_key) == job_id:
+            # Let the same prompt be retried instead of returning the failure
+            cache.delete(prompt_key)
+    return job
+
+
+def _active_jobs(user_id) -> List[str]:
+    """Job ids still running for a user (finished, stale or expired jobs are dropped)"""
+    active = []
+    for job_id in cache.get(_active_key(user_id)) or []:
+        job = get_image_job(job_id)
+        if job and job["status"] not in TERMINAL_STATUSES and not is_stale(job):
+            active.append(job_id)
+    return active
+
+
+def _release_slot(user_id, job_id: str):
+    try:
+        with cache.lock(f"{_active_key(user_id)}:lock", timeout=10):
+            active = [active_id for active_id in _active_jobs(user_id) if active_id != job_id]
+            cache.set(_active_key(user_id), active, timeout=_job_ttl())
+    except Exception as e:
+        logger.warning(f"Failed to release image job slot for user {user_id}: {e}")
+
+
+def submit_image_job(query: str, previous_image_url: str = None, user_id: int = None) -> Dict[str, Any]:
+    """
+    Queue an image generation job (or return the existing one for the same prompt)
+
+    Args:
+        query: Image description
+        previous_image_url: Image being improved, if any
+        user_id: Requesting user
+
+    Returns:
+        The job record, with "deduplicated" set when an existing job was reused
+
+    Raises:
+        ImageJobLimitExceeded: the user already has IMAGE_JOB_MAX_CONCURRENT_PER_USER jobs running
+        ImageJobQueueUnavailable: the broker could not be reached (the job is marked failed)
+    """
+    digest = prompt_hash(query, previous_image_url)
+    max_per_user = getattr(settings, 'IMAGE_JOB_MAX_CONCURRENT_PER_USER', 2)
+
+    with cache.lock(f"{_active_key(user_id)}:lock", timeout=10):
+        existing_id = cache.get(_prompt_key(user_id, digest))
+        existing = get_image_job(existing_id) if existing_id else None
+        if existing and existing["status"] != "failed" and not is_stale(existing):
+            return {**existing, "deduplicated": True}
+
+        active = _active_jobs(user_id)
+        if len(active) >= max_per_user:
+            raise ImageJobLimitExceeded(
+                f"{len(active)} image generations are already in progress; wait for one to finish"
+            )
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "query": query,
+            "previous_image_url": previous_image_url,
+            "user_id": user_id,
+            "prompt_hash": digest,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+        }
+        cache.set(_job_key(job_id), job, timeout=_job_ttl())
+        cache.set(_prompt_key(user_id, digest), job_id, timeout=_job_ttl())
+        cache.set(_active_key(user_id), active + [job_id], timeout=_job_ttl())
+
+    from kombu.exceptions import OperationalError
+
+    from .tasks import generate_image_job
+    try:
+        generate_image_job.apply_async(args=[job_id], task_id=job_id)
+    except OperationalError as e:
+        update_image_job(job_id, status="failed", error=f"Could not queue image generation: {e}")
+        raise ImageJobQueueUnavailable(str(e)) from e
+    except Exception as e:
+        update_image_job(job_id, status="failed", error=f"Could not queue image generation: {e}")
+        raise
+    return {**job, "deduplicated": False}
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields safe to return to the client"""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "query": job["query"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "poll_url": f"/ad-expert/api/image-jobs/{job['job_id']}/",
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
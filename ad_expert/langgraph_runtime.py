@@ -0,0 +1,87 @@
+"""
+Process-wide LangGraph runtime registry
+Builds the chat LLM, tool bindings, long-term store and compiled graph once per worker
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LangGraphRuntime:
+    """Shared, request-independent LangGraph components"""
+    llm: Any
+    llm_with_tools: Any
+    checkpointer: Any
+    postgres_store: Any
+    workflow: Any
+    graph: Any
+    build_seconds: float = 0.0
+    # Same workflow compiled against the async checkpointer, built on first async use
+    async_graph: Any = None
+
+
+_runtimes: Dict[str, LangGraphRuntime] = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(name: str, builder: Callable[[], LangGraphRuntime]) -> LangGraphRuntime:
+    """
+    Get the runtime registered under ``name``, building it on first use
+
+    Args:
+        name: Registry key for the runtime
+        builder: Callable that builds the runtime (called at most once per process)
+
+    Returns:
+        The shared LangGraphRuntime
+    """
+    runtime = _runtimes.get(name)
+    if runtime is not None:
+        return runtime
+
+    with _runtimes_lock:
+        # Another thread may have finished building while we waited for the lock
+        runtime = _runtimes.get(name)
+        if runtime is None:
+            started = time.perf_counter()
+            runtime = builder()
+            runtime.build_seconds = time.perf_counter() - started
+            _runtimes[name] = runtime
+            logger.info(f"Built LangGraph runtime '{name}' in {runtime.build_seconds * 1000:.1f} ms")
+        return runtime
+
+
+def peek_runtime(name: str) -> Optional[LangGraphRuntime]:
+    """Return the runtime registered under ``name`` without building it"""
+    return _runtimes.get(name)
+
+
+def reset_runtime(name: Optional[str] = None) -> None:
+    """Drop one (or every) cached runtime so the next request rebuilds it"""
+    with _runtimes_lock:
+        if name is None:
+            _runtimes.clear()
+        else:
+            _runtimes.pop(name, None)
+
+
+def warm_up() -> bool:
+    """
+    Build the LanggraphView runtime ahead of the first request
+
+    Returns:
+        bool: True if the runtime is ready, False otherwise
+    """
+    try:
+        from .views import LanggraphView
+        LanggraphView.get_runtime()
+        return True
+    except Exception as e:
+        logger.warning(f"LangGraph runtime warm-up failed, it will be built on first request: {e}")
+        return False
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import logging
+
+from ad_expert.asset_store import asset_store
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Evict old generated images and visualizations from the asset store (Daily cron job)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=getattr(settings, 'ASSET_STORE_MAX_AGE_DAYS', 30),
+            help='Remove assets older than this many days (default: ASSET_STORE_MAX_AGE_DAYS)',
+        )
+        parser.add_argument(
+            '--max-total-mb',
+            type=int,
+            default=getattr(settings, 'ASSET_STORE_MAX_TOTAL_BYTES', 2 * 1024 ** 3) // (1024 * 1024),
+            help='Then remove the oldest assets until the store is under this size (default: ASSET_STORE_MAX_TOTAL_BYTES)',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('🧹 Evicting generated assets')
+        )
+        
+        try:
+            stats = asset_store.evict(
+                max_total_bytes=options['max_total_mb'] * 1024 * 1024,
+                max_age_days=options['max_age_days']
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Removed {stats['assets']} assets ({stats['bytes'] / (1024 * 1024):.1f} MB)"
+                )
+            )
+        except Exception as e:
+            logger.error(f"Asset eviction failed: {e}")
+            self.stdout.write(
+                self.style.ERROR(f'❌ Asset eviction failed: {e}')
+            )
+            raise
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import logging
+
+from ad_expert.checkpointing import prune_checkpoints
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Prune LangGraph conversation checkpoints (Daily cron job)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=getattr(settings, 'LANGGRAPH_CHECKPOINT_KEEP_PER_THREAD', 3),
+            help='Checkpoints to keep per conversation thread (default: LANGGRAPH_CHECKPOINT_KEEP_PER_THREAD)',
+        )
+        parser.add_argument(
+            '--idle-days',
+            type=int,
+            default=getattr(settings, 'LANGGRAPH_CHECKPOINT_IDLE_DAYS', 30),
+            help='Drop threads of conversations idle for this many days (default: LANGGRAPH_CHECKPOINT_IDLE_DAYS)',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('🧹 Pruning LangGraph checkpoints')
+        )
+        
+        try:
+            stats = prune_checkpoints(keep_per_thread=options['keep'], idle_days=options['idle_days'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Removed {stats['threads']} threads, {stats['checkpoints']} checkpoints, "
+                    f"{stats['writes']} writes and {stats['blobs']} blobs"
+                )
+            )
+        except Exception as e:
+            logger.error(f"Checkpoint pruning failed: {e}")
+            self.stdout.write(
+                self.style.ERROR(f'❌ Checkpoint pruning failed: {e}')
+            )
+            raise
@@ -0,0 +1,110 @@
+"""
+Chat message keyset pagination
+Pages through a conversation's messages by (created_at, id) instead of OFFSET, so
+every page costs one index range scan on chatmsg_conv_created_id_idx however
+deep the client has scrolled
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+MESSAGE_FIELDS = ('id', 'role', 'content', 'response_type', 'created_at')
+
+
+def encode_cursor(message) -> str:
+    """Opaque cursor pointing just past ``message``"""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, message_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def without_structured_data(queryset):
+    """Skip loading structured_data bodies, annotating has_structured_data instead"""
+    return queryset.only(*MESSAGE_FIELDS).annotate(
+        has_structured_data=ExpressionWrapper(Q(structured_data__isnull=False), output_field=BooleanField())
+    )
+
+
+def _ordered(queryset, order: str):
+    if order == 'asc':
+        return queryset.order_by('created_at', 'id')
+    return queryset.order_by('-created_at', '-id')
+
+
+def paginate_messages(queryset, cursor: Optional[str], page_size: int, order: str = 'desc',
+                      include_structured_data: bool = True) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of messages after ``cursor``
+
+    Args:
+        queryset: Messages of a single conversation
+        cursor: Cursor from a previous page, or None for the first page
+        page_size: Messages per page
+        order: 'desc' walks from the newest message back, 'asc' from the oldest forward
+        include_structured_data: If False the (potentially large) structured_data
+            column is not loaded; use has_structured_data to tell clients it exists
+
+    Returns:
+        (messages in walk order, cursor for the next page or None on the last page)
+    """
+    queryset = _ordered(queryset, order)
+
+    if cursor:
+        created_at, message_id = decode_cursor(cursor)
+        if order == 'asc':
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id))
+        else:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+
+    if not include_structured_data:
+        queryset = without_structured_data(queryset)
+
+    # One extra row tells us whether there is a next page without a count()
+    messages = list(queryset[:page_size + 1])
+    if len(messages) <= page_size:
+        return messages, None
+    messages = messages[:page_size]
+    return messages, encode_cursor(messages[-1])
+
+
+def page_messages(queryset, page: int, page_size: int, order: str = 'desc',
+                  include_structured_data: bool = True) -> List[Any]:
+    """
+    One page of messages by page number (OFFSET), in walk order
+
+    Deprecated: kept for one release for clients still sending ``page``. Page N
+    scans N * page_size rows; use paginate_messages instead.
+    """
+    queryset = _ordered(queryset, order)
+    if not include_structured_data:
+        queryset = without_structured_data(queryset)
+    offset = (max(page, 1) - 1) * page_size
+    return list(queryset[offset:offset + page_size])
+
+
+def serialize_message(message, include_structured_data: bool = True) -> Dict[str, Any]:
+    data = {
+        'id': message.id,
+        'role': message.role,
+        'content': message.content,
+        'response_type': message.response_type,
+        'created_at': message.created_at.isoformat(),
+    }
+    if include_structured_data:
+        data['structured_data'] = message.structured_data
+    else:
+        data['has_structured_data'] = getattr(message, 'has_structured_data', False)
+    return data
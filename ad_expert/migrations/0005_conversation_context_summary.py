@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-16 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ad_expert", "0004_conversation_pending_intent_result_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="context_summary",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="Rolling summary of turns that no longer fit in the LLM context window",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="context_summary_until_id",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="First ChatMessage ID not covered by context_summary",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_message_stats(apps, schema_editor):
+    Conversation = apps.get_model("ad_expert", "Conversation")
+    ChatMessage = apps.get_model("ad_expert", "ChatMessage")
+    stats = ChatMessage.objects.filter(conversation=OuterRef("pk")).order_by().values("conversation")
+    Conversation.objects.update(
+        message_count=Coalesce(
+            Subquery(stats.annotate(count=Count("id")).values("count")), 0
+        ),
+        last_message_at=Subquery(stats.annotate(latest=Max("created_at")).values("latest")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ad_expert", "0005_conversation_context_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="message_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Number of ChatMessages (kept in sync by ChatMessage signals)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="created_at of the latest ChatMessage",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_message_stats, migrations.RunPython.noop),
+    ]
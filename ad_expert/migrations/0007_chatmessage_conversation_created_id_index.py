@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ad_expert", "0006_conversation_message_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["conversation", "created_at", "id"], name="chatmsg_conv_created_id_idx"
+            ),
+        ),
+    ]
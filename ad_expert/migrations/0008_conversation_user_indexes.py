@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("ad_expert", "0007_chatmessage_conversation_created_id_index"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="conversation",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["user", "-updated_at"],
+                name="conv_user_live_updated_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="conversation",
+            index=models.Index(fields=["user", "-created_at"], name="conv_user_created_idx"),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import F, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -10,12 +13,22 @@ class Conversation(models.Model):
     customer_id = models.CharField(max_length=100, blank=True, null=True, help_text="Google Ads customer ID for this conversation")
     pending_query = models.TextField(blank=True, null=True, help_text="Query to execute after customer selection")
     pending_intent_result = models.JSONField(null=True, blank=True, help_text="Intent mapping result to execute after customer selection")
+    context_summary = models.TextField(blank=True, default='', help_text="Rolling summary of turns that no longer fit in the LLM context window")
+    context_summary_until_id = models.BigIntegerField(null=True, blank=True, help_text="First ChatMessage ID not covered by context_summary")
+    message_count = models.PositiveIntegerField(default=0, help_text="Number of ChatMessages (kept in sync by ChatMessage signals)")
+    last_message_at = models.DateTimeField(null=True, blank=True, help_text="created_at of the latest ChatMessage")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Sidebar list: a user's live conversations, most recently active first
+            models.Index(fields=['user', '-updated_at'], name='conv_user_live_updated_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            models.Index(fields=['user', '-created_at'], name='conv_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"Conversation {self.id} - {self.user.username}"
@@ -38,11 +51,43 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a conversation's history (see message_pagination)
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chatmsg_conv_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
 
 
+@receiver(post_save, sender=ChatMessage)
+def increment_conversation_message_count(sender, instance, created, **kwargs):
+    if not created:
+        return
+    Conversation.objects.filter(pk=instance.conversation_id).update(
+        message_count=F('message_count') + 1,
+        last_message_at=instance.created_at
+    )
+    # Keep a loaded conversation in step so a later full save() doesn't write stale counts
+    if ChatMessage.conversation.is_cached(instance):
+        instance.conversation.message_count += 1
+        instance.conversation.last_message_at = instance.created_at
+
+
+@receiver(post_delete, sender=ChatMessage)
+def decrement_conversation_message_count(sender, instance, origin=None, **kwargs):
+    # Cascade from a deleted conversation: there is no row left to update
+    if isinstance(origin, Conversation):
+        return
+    latest = ChatMessage.objects.filter(conversation_id=instance.conversation_id).order_by(
+        '-created_at', '-id'
+    ).values('created_at')[:1]
+    Conversation.objects.filter(pk=instance.conversation_id, message_count__gt=0).update(
+        message_count=F('message_count') - 1,
+        last_message_at=Subquery(latest)
+    )
+
+
 # OAuth connections are now handled by the accounts app
 # Google OAuth: Use UserGoogleAuth model from accounts app
 # Meta OAuth: Can be added to accounts app if needed
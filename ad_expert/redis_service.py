@@ -1,27 +1,76 @@
 """
 Redis Service for managing customer IDs and conversation data
+Talks to Redis directly through a shared connection pool: one hash per user and
+one per conversation, values serialised with orjson, and multi-field reads and
+writes pipelined so a request costs a single round trip
 """
 
-import json
 import logging
+import time
 from typing import Optional, List, Dict, Any
-from django.core.cache import cache
+
+import redis
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    def _dumps(value) -> bytes:
+        return orjson.dumps(value)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(value) -> bytes:
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    _loads = json.loads
+
+
 class RedisService:
-    """Service for managing data in Redis cache"""
+    """
+    Service for managing data in Redis
+    
+    Layout (every hash expires as a whole; each write refreshes its TTL):
+    - ``customer_id:user_{id}``: field per conversation id -> selected customer (24 hours)
+    - ``user_session:{id}``: ``accessible_customers`` (1 hour)
+    - ``conversation:{id}``: ``context`` (1 hour)
+    
+    A user's data lives under fixed keys, so clearing it is a plain DEL rather
+    than a KEYS/SCAN over the keyspace.
+    """
     
     # Key prefixes for different data types
     CUSTOMER_ID_PREFIX = "customer_id"
     CONVERSATION_PREFIX = "conversation"
     USER_SESSION_PREFIX = "user_session"
     
+    CUSTOMER_SELECTION_TTL = 86400
+    USER_SESSION_TTL = 3600
+    CONVERSATION_TTL = 3600
+    
+    _client = None
+    
     @classmethod
-    def _get_customer_key(cls, user_id: int, conversation_id: int) -> str:
-        """Generate Redis key for customer ID"""
-        return f"{cls.CUSTOMER_ID_PREFIX}:user_{user_id}:conv_{conversation_id}"
+    def _redis(cls) -> redis.Redis:
+        """Shared client; the pool is created on first use and reused by every thread"""
+        if cls._client is None:
+            pool = redis.ConnectionPool.from_url(
+                getattr(settings, 'REDIS_SERVICE_URL', None) or settings.REDIS_URL,
+                max_connections=getattr(settings, 'REDIS_SERVICE_MAX_CONNECTIONS', 50),
+                socket_timeout=getattr(settings, 'REDIS_SERVICE_SOCKET_TIMEOUT', 5),
+                health_check_interval=30,
+            )
+            cls._client = redis.Redis(connection_pool=pool)
+        return cls._client
+    
+    @classmethod
+    def _get_customer_key(cls, user_id: int) -> str:
+        """Generate Redis key for a user's customer ID selections (hash keyed by conversation)"""
+        return f"{cls.CUSTOMER_ID_PREFIX}:user_{user_id}"
     
     @classmethod
     def _get_conversation_key(cls, conversation_id: int) -> str:
@@ -33,6 +82,39 @@ class RedisService:
         """Generate Redis key for user session data"""
         return f"{cls.USER_SESSION_PREFIX}:{user_id}"
     
+    @staticmethod
+    def _load(raw) -> Optional[Any]:
+        return _loads(raw) if raw is not None else None
+    
+    @classmethod
+    def _queue_customer_id(cls, pipe, user_id: int, conversation_id: int, customer_id: str,
+                           accessible_customers: List[str] = None):
+        key = cls._get_customer_key(user_id)
+        pipe.hset(key, str(conversation_id), _dumps({
+            'customer_id': customer_id,
+            'accessible_customers': accessible_customers or [],
+            'selected_at': time.time()
+        }))
+        pipe.expire(key, cls.CUSTOMER_SELECTION_TTL)
+    
+    @classmethod
+    def _queue_accessible_customers(cls, pipe, user_id: int, accessible_customers: List[str]):
+        key = cls._get_user_session_key(user_id)
+        pipe.hset(key, mapping={
+            'accessible_customers': _dumps(accessible_customers),
+            'accessible_customers_at': _dumps(time.time())
+        })
+        pipe.expire(key, cls.USER_SESSION_TTL)
+    
+    @classmethod
+    def _queue_conversation_context(cls, pipe, conversation_id: int, context_data: Dict[str, Any]):
+        key = cls._get_conversation_key(conversation_id)
+        pipe.hset(key, mapping={
+            'context': _dumps(context_data),
+            'updated_at': _dumps(time.time())
+        })
+        pipe.expire(key, cls.CONVERSATION_TTL)
+    
     @classmethod
     def save_customer_id(cls, user_id: int, conversation_id: int, customer_id: str, 
                         accessible_customers: List[str] = None) -> bool:
@@ -49,17 +131,9 @@ class RedisService:
             bool: True if saved successfully, False otherwise
         """
         try:
-            key = cls._get_customer_key(user_id, conversation_id)
-            
-            # Prepare data to store
-            data = {
-                'customer_id': customer_id,
-                'accessible_customers': accessible_customers or [],
-                'selected_at': cache.get('current_timestamp', 'unknown')
-            }
-            
-            # Save with 24 hour expiration
-            cache.set(key, json.dumps(data), timeout=86400)
+            pipe = cls._redis().pipeline(transaction=False)
+            cls._queue_customer_id(pipe, user_id, conversation_id, customer_id, accessible_customers)
+            pipe.execute()
             
             logger.info(f"Saved customer ID {customer_id} for user {user_id}, conversation {conversation_id}")
             return True
@@ -81,17 +155,34 @@ class RedisService:
             Dict with customer data or None if not found
         """
         try:
-            key = cls._get_customer_key(user_id, conversation_id)
-            data = cache.get(key)
-            
-            if data:
-                return json.loads(data)
-            return None
+            return cls._load(cls._redis().hget(cls._get_customer_key(user_id), str(conversation_id)))
             
         except Exception as e:
             logger.error(f"Error getting customer ID from Redis: {e}")
             return None
     
+    @classmethod
+    def get_customer_ids(cls, user_id: int, conversation_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get several conversations' customer ID selections with one HMGET
+        
+        Returns:
+            Dict of conversation ID -> customer data, for conversations that have a selection
+        """
+        if not conversation_ids:
+            return {}
+        try:
+            values = cls._redis().hmget(cls._get_customer_key(user_id), [str(cid) for cid in conversation_ids])
+            return {
+                conversation_id: _loads(raw)
+                for conversation_id, raw in zip(conversation_ids, values)
+                if raw is not None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting customer IDs from Redis: {e}")
+            return {}
+    
     @classmethod
     def save_accessible_customers(cls, user_id: int, accessible_customers: List[str]) -> bool:
         """
@@ -105,15 +196,9 @@ class RedisService:
             bool: True if saved successfully, False otherwise
         """
         try:
-            key = f"{cls.USER_SESSION_PREFIX}:{user_id}:accessible_customers"
-            
-            data = {
-                'accessible_customers': accessible_customers,
-                'updated_at': cache.get('current_timestamp', 'unknown')
-            }
-            
-            # Save with 1 hour expiration
-            cache.set(key, json.dumps(data), timeout=3600)
+            pipe = cls._redis().pipeline(transaction=False)
+            cls._queue_accessible_customers(pipe, user_id, accessible_customers)
+            pipe.execute()
             
             logger.info(f"Saved {len(accessible_customers)} accessible customers for user {user_id}")
             return True
@@ -134,13 +219,7 @@ class RedisService:
             List of accessible customer IDs or None if not found
         """
         try:
-            key = f"{cls.USER_SESSION_PREFIX}:{user_id}:accessible_customers"
-            data = cache.get(key)
-            
-            if data:
-                parsed_data = json.loads(data)
-                return parsed_data.get('accessible_customers', [])
-            return None
+            return cls._load(cls._redis().hget(cls._get_user_session_key(user_id), 'accessible_customers'))
             
         except Exception as e:
             logger.error(f"Error getting accessible customers from Redis: {e}")
@@ -159,15 +238,9 @@ class RedisService:
             bool: True if saved successfully, False otherwise
         """
         try:
-            key = cls._get_conversation_key(conversation_id)
-            
-            data = {
-                'context': context_data,
-                'updated_at': cache.get('current_timestamp', 'unknown')
-            }
-            
-            # Save with 1 hour expiration
-            cache.set(key, json.dumps(data), timeout=3600)
+            pipe = cls._redis().pipeline(transaction=False)
+            cls._queue_conversation_context(pipe, conversation_id, context_data)
+            pipe.execute()
             
             logger.info(f"Saved conversation context for conversation {conversation_id}")
             return True
@@ -188,18 +261,64 @@ class RedisService:
             Dict with context data or None if not found
         """
         try:
-            key = cls._get_conversation_key(conversation_id)
-            data = cache.get(key)
-            
-            if data:
-                parsed_data = json.loads(data)
-                return parsed_data.get('context', {})
-            return None
+            return cls._load(cls._redis().hget(cls._get_conversation_key(conversation_id), 'context'))
             
         except Exception as e:
             logger.error(f"Error getting conversation context from Redis: {e}")
             return None
     
+    @classmethod
+    def get_request_state(cls, user_id: int, conversation_id: int) -> Dict[str, Any]:
+        """
+        Everything a chat request reads from Redis, in one pipelined round trip
+        
+        Returns:
+            Dict with customer_selection, accessible_customers and conversation_context
+            (each None if not cached)
+        """
+        try:
+            pipe = cls._redis().pipeline(transaction=False)
+            pipe.hget(cls._get_customer_key(user_id), str(conversation_id))
+            pipe.hget(cls._get_user_session_key(user_id), 'accessible_customers')
+            pipe.hget(cls._get_conversation_key(conversation_id), 'context')
+            selection, accessible_customers, context = pipe.execute()
+            return {
+                'customer_selection': cls._load(selection),
+                'accessible_customers': cls._load(accessible_customers),
+                'conversation_context': cls._load(context),
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting request state from Redis: {e}")
+            return {'customer_selection': None, 'accessible_customers': None, 'conversation_context': None}
+    
+    @classmethod
+    def save_request_state(cls, user_id: int, conversation_id: int, customer_id: str = None,
+                           accessible_customers: List[str] = None,
+                           context_data: Dict[str, Any] = None) -> bool:
+        """
+        Write any of a request's customer selection, accessible customers and
+        conversation context in one pipelined round trip (None arguments are skipped)
+        
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        try:
+            pipe = cls._redis().pipeline(transaction=False)
+            if customer_id is not None:
+                cls._queue_customer_id(pipe, user_id, conversation_id, customer_id, accessible_customers)
+            if accessible_customers is not None:
+                cls._queue_accessible_customers(pipe, user_id, accessible_customers)
+            if context_data is not None:
+                cls._queue_conversation_context(pipe, conversation_id, context_data)
+            if len(pipe):
+                pipe.execute()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving request state to Redis: {e}")
+            return False
+    
     @classmethod
     def delete_customer_selection(cls, user_id: int, conversation_id: int) -> bool:
         """
@@ -213,8 +332,7 @@ class RedisService:
             bool: True if deleted successfully, False otherwise
         """
         try:
-            key = cls._get_customer_key(user_id, conversation_id)
-            cache.delete(key)
+            cls._redis().hdel(cls._get_customer_key(user_id), str(conversation_id))
             
             logger.info(f"Deleted customer selection for user {user_id}, conversation {conversation_id}")
             return True
@@ -235,19 +353,10 @@ class RedisService:
             bool: True if cleared successfully, False otherwise
         """
         try:
-            # Get all keys for this user
-            pattern = f"{cls.USER_SESSION_PREFIX}:{user_id}:*"
-            keys = cache.keys(pattern)
-            
-            # Also get customer ID keys for this user
-            customer_pattern = f"{cls.CUSTOMER_ID_PREFIX}:user_{user_id}:*"
-            customer_keys = cache.keys(customer_pattern)
-            
-            all_keys = keys + customer_keys
-            
-            if all_keys:
-                cache.delete_many(all_keys)
-                logger.info(f"Cleared {len(all_keys)} Redis keys for user {user_id}")
+            # All of a user's data lives in these two hashes
+            deleted = cls._redis().delete(cls._get_user_session_key(user_id), cls._get_customer_key(user_id))
+            if deleted:
+                logger.info(f"Cleared {deleted} Redis keys for user {user_id}")
             
             return True
             
@@ -264,11 +373,7 @@ class RedisService:
             bool: True if connection successful, False otherwise
         """
         try:
-            cache.set('test_key', 'test_value', timeout=10)
-            result = cache.get('test_key')
-            cache.delete('test_key')
-            
-            return result == 'test_value'
+            return bool(cls._redis().ping())
             
         except Exception as e:
             logger.error(f"Redis connection test failed: {e}")
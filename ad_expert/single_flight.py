@@ -0,0 +1,128 @@
+"""
+Single-flight request coalescing
+Concurrent identical calls share one upstream request: in-process via a shared
+in-flight call, across workers via a Redis lock and a short-lived result key
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlightCall:
+    """A call in progress that other threads in this process can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls
+
+    Only successful results (dicts without an "error" key) are shared. When
+    the leader fails, waiting callers make their own request, since the
+    failure may be specific to the leader's credentials.
+    """
+
+    def __init__(self, namespace: str, lock_seconds: int = None, wait_seconds: int = None, result_seconds: int = 30):
+        self.namespace = namespace
+        self.lock_seconds = lock_seconds or getattr(settings, 'SINGLE_FLIGHT_LOCK_SECONDS', 90)
+        self.wait_seconds = wait_seconds or getattr(settings, 'SINGLE_FLIGHT_WAIT_SECONDS', 90)
+        self.result_seconds = result_seconds
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run ``fn`` once for all concurrent callers using the same key
+
+        Args:
+            key: Identity of the call (e.g. a GAQL cache key). Followers receive the
+                leader's result, so only callers authorised for the same data may share a key
+            fn: Callable making the upstream request
+
+        Returns:
+            The result of ``fn`` (possibly produced by another caller)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+
+        if not is_leader:
+            if call.done.wait(self.wait_seconds) and call.error is None and self._shareable(call.result):
+                return call.result
+            return fn()
+
+        try:
+            call.result = self._do_distributed(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            call.done.set()
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _do_distributed(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+
+        try:
+            lock = cache.lock(lock_key, timeout=self.lock_seconds)
+            acquired = lock.acquire(blocking=False)
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable, calling upstream directly: {e}")
+            return fn()
+
+        if acquired:
+            try:
+                result = fn()
+                if self._shareable(result):
+                    cache.set(result_key, result, timeout=self.result_seconds)
+                return result
+            finally:
+                try:
+                    lock.release()
+                except Exception:
+                    # Lock already expired; nothing to release
+                    pass
+
+        return self._wait_for_leader(lock_key, result_key, fn)
+
+    def _wait_for_leader(self, lock_key: str, result_key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Poll for the result another worker is fetching"""
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            result = cache.get(result_key)
+            if result is not None:
+                return result
+            if not cache.has_key(lock_key):
+                # Leader finished without a shareable result; check once more, then fetch ourselves
+                result = cache.get(result_key)
+                return result if result is not None else fn()
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        logger.warning(f"Timed out waiting for in-flight request {result_key}, calling upstream directly")
+        return fn()
+
+    @staticmethod
+    def _shareable(result: Any) -> bool:
+        return isinstance(result, dict) and "error" not in result
+
+
+gaql_single_flight = SingleFlight("gaql_flight")
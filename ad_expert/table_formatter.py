@@ -0,0 +1,203 @@
+"""
+Deterministic table formatting for format_tabular_data
+Types Google Ads columns (micros -> currency, ratio columns -> percent), sorts,
+truncates and streams markdown, HTML, JSON or CSV output
+"""
+
+import csv
+import hashlib
+import html
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from .chart_renderer import ChartDataError, parse_rows, to_number
+
+FORMAT_TYPES = ("markdown", "html", "json", "csv")
+
+# Google Ads reports these in micros (1/1,000,000 of the account currency)
+MICROS_COLUMNS = {"average_cpc", "average_cpm", "average_cost", "cost_per_conversion", "cost_per_all_conversions"}
+# Google Ads ratios are fractions (0.035 is 3.5%, 1.5 is 150%); columns named like
+# ctr_pct or ctr_percent already hold percentage points
+PERCENT_POINT_SUFFIXES = ("_pct", "_percent", "%")
+PERCENT_COLUMNS = {"ctr", "conversion_rate", "conversions_from_interactions_rate", "interaction_rate",
+                   "search_impression_share", "search_budget_lost_impression_share",
+                   "search_rank_lost_impression_share", "absolute_top_impression_percentage",
+                   "top_impression_percentage"}
+INTEGER_COLUMNS = {"impressions", "clicks", "interactions", "video_views"}
+
+
+class TableFormatter:
+    """Formats rows into tables; identical input always produces identical output"""
+
+    def __init__(self):
+        self.currency_symbol = getattr(settings, 'TABLE_CURRENCY_SYMBOL', '$')
+        self.default_max_rows = getattr(settings, 'TABLE_MAX_ROWS', 50)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = 256
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def column_kind(column: str) -> str:
+        """Display type of a column: currency, percent (a fraction), percent_points, integer or auto"""
+        name = column.lower().strip()
+        if name.endswith("_micros") or name in MICROS_COLUMNS:
+            return "currency"
+        if name.endswith(PERCENT_POINT_SUFFIXES):
+            return "percent_points"
+        if name in PERCENT_COLUMNS or name.endswith(("_rate", "_share", "_percentage")):
+            return "percent"
+        if name in INTEGER_COLUMNS:
+            return "integer"
+        return "auto"
+
+    @staticmethod
+    def column_label(column: str) -> str:
+        """Header text, e.g. cost_micros -> Cost, average_cpc -> Average Cpc"""
+        name = column[:-len("_micros")] if column.lower().endswith("_micros") else column
+        return name.replace("_", " ").replace(".", " ").strip().title()
+
+    def format_value(self, value: Any, kind: str) -> str:
+        """Display string for a cell"""
+        if value is None or value == "":
+            return ""
+        number = to_number(value)
+        if number is None or isinstance(value, bool):
+            return str(value)
+        if kind == "currency":
+            return f"{self.currency_symbol}{number / 1_000_000:,.2f}"
+        if kind in ("percent", "percent_points"):
+            # The column name decides the scale, never the magnitude: a 1.5 conversion
+            # rate is 150%. Strings that already carry a "%" are taken as written.
+            already_percent = kind == "percent_points" or (isinstance(value, str) and value.strip().endswith("%"))
+            return f"{number if already_percent else number * 100:.2f}%"
+        if kind == "integer" or (number.is_integer() and not (isinstance(value, str) and "." in value)):
+            return f"{int(number):,}"
+        return f"{number:,.2f}"
+
+    @staticmethod
+    def _sort(rows: List[Dict[str, Any]], sort_by: Optional[str]) -> List[Dict[str, Any]]:
+        if not sort_by:
+            return rows
+        descending = sort_by.startswith("-")
+        column = sort_by.lstrip("-")
+
+        def key(row):
+            value = row.get(column)
+            number = to_number(value)
+            # Missing values last; numbers before text so mixed columns still sort deterministically
+            return (value is None or value == "", number is None, number if number is not None else str(value))
+
+        present = [row for row in rows if row.get(column) not in (None, "")]
+        missing = [row for row in rows if row.get(column) in (None, "")]
+        return sorted(present, key=key, reverse=descending) + missing
+
+    def iter_table(self, rows: List[Dict[str, Any]], format_type: str = "markdown", title: str = None,
+                   sort_by: str = None, max_rows: int = None) -> Iterator[str]:
+        """
+        Yield the formatted table in chunks (one row at a time)
+
+        Args:
+            rows: Row dicts
+            format_type: 'markdown', 'html', 'json' or 'csv'
+            title: Optional table title
+            sort_by: Column to sort by; prefix with '-' for descending
+            max_rows: Rows to show before the "N more rows" footer
+        """
+        if format_type not in FORMAT_TYPES:
+            raise ChartDataError(f"Unsupported format '{format_type}'; use one of {', '.join(FORMAT_TYPES)}")
+
+        max_rows = max_rows or self.default_max_rows
+        columns = list(OrderedDict.fromkeys(column for row in rows for column in row))
+        kinds = [self.column_kind(column) for column in columns]
+        labels = [self.column_label(column) for column in columns]
+        ordered = self._sort(rows, sort_by)
+        shown, remaining = ordered[:max_rows], max(len(ordered) - max_rows, 0)
+        cells = ([self.format_value(row.get(column), kind) for column, kind in zip(columns, kinds)] for row in shown)
+        footer = f"{remaining} more row{'s' if remaining != 1 else ''}" if remaining else None
+
+        if format_type == "markdown":
+            def md(text):
+                return str(text).replace("|", "\\|").replace("\n", " ")
+            if title:
+                yield f"### {md(title)}\n\n"
+            yield "| " + " | ".join(md(label) for label in labels) + " |\n"
+            yield "| " + " | ".join("---:" if kind != "auto" else "---" for kind in kinds) + " |\n"
+            for row in cells:
+                yield "| " + " | ".join(md(cell) for cell in row) + " |\n"
+            if footer:
+                yield f"\n_{footer}_\n"
+
+        elif format_type == "html":
+            yield "<table>\n"
+            if title:
+                yield f"<caption>{html.escape(title)}</caption>\n"
+            yield "<thead><tr>" + "".join(f"<th>{html.escape(label)}</th>" for label in labels) + "</tr></thead>\n<tbody>\n"
+            for row in cells:
+                yield "<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>\n"
+            yield "</tbody>\n"
+            if footer:
+                yield f'<tfoot><tr><td colspan="{len(columns)}">{footer}</td></tr></tfoot>\n'
+            yield "</table>\n"
+
+        elif format_type == "json":
+            yield "{" + (f'"title":{json.dumps(title)},' if title else "") + f'"columns":{json.dumps(labels)},"rows":['
+            for index, row in enumerate(cells):
+                yield ("," if index else "") + json.dumps(row, ensure_ascii=False)
+            yield f'],"more_rows":{remaining}' + "}"
+
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+
+            def flush():
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                return chunk
+
+            writer.writerow(labels)
+            yield flush()
+            for row in cells:
+                writer.writerow(row)
+                yield flush()
+            if footer:
+                yield f"# {footer}\n"
+
+    def format(self, data: str, format_type: str = "markdown", title: str = None,
+               sort_by: str = None, max_rows: int = None) -> Dict[str, Any]:
+        """
+        Format raw data (JSON, CSV or "label: value" lines) into a table
+
+        Returns:
+            Dict with formatted_table, row_count and truncated_rows
+        """
+        cache_key = hashlib.sha256(
+            json.dumps([data, format_type, title, sort_by, max_rows]).encode("utf-8")
+        ).hexdigest()
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+        rows = parse_rows(data)
+        max_rows = max_rows or self.default_max_rows
+        result = {
+            "formatted_table": "".join(self.iter_table(rows, format_type, title, sort_by, max_rows)),
+            "row_count": len(rows),
+            "truncated_rows": max(len(rows) - max_rows, 0),
+        }
+
+        with self._cache_lock:
+            self._cache[cache_key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+table_formatter = TableFormatter()
@@ -0,0 +1,49 @@
+"""
+Celery tasks for the ad_expert app
+"""
+
+import logging
+import time
+
+from celery import shared_task
+
+from .image_jobs import get_image_job, heartbeat, is_stale, update_image_job
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=True)
+def generate_image_job(self, job_id: str):
+    """Run a queued image generation job and record its result"""
+    from .tools import run_image_generation
+
+    job = get_image_job(job_id)
+    if job is None:
+        logger.warning(f"Image job {job_id} expired before it ran")
+        return
+    if job["status"] == "succeeded" or (job["status"] == "running" and not is_stale(job)):
+        # Redelivered while the first delivery is still alive (or after it finished)
+        return
+    if job["status"] == "queued" and is_stale(job):
+        # Sat in the queue past IMAGE_JOB_QUEUED_TIMEOUT_SECONDS; the user has been
+        # free to submit the prompt again since, so don't spend a generation on it
+        update_image_job(job_id, status="failed", error="Image generation timed out waiting for a worker")
+        return
+    if job["status"] == "running":
+        logger.warning(f"Image job {job_id} stopped sending heartbeats; taking it over")
+
+    now = time.time()
+    update_image_job(job_id, status="running", started_at=now, heartbeat_at=now,
+                     attempts=job.get("attempts", 0) + 1)
+    try:
+        with heartbeat(job_id):
+            result = run_image_generation(job["query"], job.get("previous_image_url"), job.get("user_id"))
+    except Exception as e:
+        logger.error(f"Image job {job_id} failed: {e}")
+        update_image_job(job_id, status="failed", error=str(e))
+        return
+
+    if result.get("success"):
+        update_image_job(job_id, status="succeeded", result=result)
+    else:
+        update_image_job(job_id, status="failed", error=result.get("error", "Image generation failed"))
@@ -1,3 +1,1127 @@
-from django.test import TestCase
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .gaql_cache import GAQLCache, gaql_cache
+from .message_pagination import decode_cursor, encode_cursor, page_messages, paginate_messages
+from .models import ChatMessage, Conversation
+from .single_flight import SingleFlight
+
+
+class GAQLCacheTTLTests(SimpleTestCase):
+    def query(self, condition):
+        return f"SELECT campaign.id, metrics.clicks FROM campaign WHERE {condition}"
+
+    def test_during_ranges_use_their_own_ttl(self):
+        for date_range, ttl in gaql_cache.DATE_RANGE_TTLS.items():
+            with self.subTest(date_range=date_range):
+                self.assertEqual(gaql_cache.ttl_for_query(self.query(f"segments.date DURING {date_range}")), ttl)
+
+    def test_during_is_case_insensitive(self):
+        self.assertEqual(
+            gaql_cache.ttl_for_query(self.query("segments.date during last_90_days")),
+            gaql_cache.DATE_RANGE_TTLS['LAST_90_DAYS']
+        )
+
+    def test_unknown_during_range_falls_back(self):
+        self.assertEqual(
+            gaql_cache.ttl_for_query(self.query("segments.date DURING LAST_60_DAYS")),
+            gaql_cache.DATE_RANGE_TTLS['LAST_30_DAYS']
+        )
+
+    def test_closed_between_range(self):
+        end = date.today() - timedelta(days=gaql_cache.CLOSED_RANGE_LAG_DAYS)
+        start = end - timedelta(days=30)
+        condition = f"segments.date BETWEEN '{start.isoformat()}' AND '{end.isoformat()}'"
+        self.assertEqual(gaql_cache.ttl_for_query(self.query(condition)), gaql_cache.CLOSED_RANGE_TTL)
+
+    def test_open_between_range(self):
+        start = date.today() - timedelta(days=7)
+        condition = f"segments.date BETWEEN '{start.isoformat()}' AND '{date.today().isoformat()}'"
+        self.assertEqual(gaql_cache.ttl_for_query(self.query(condition)), gaql_cache.DATE_RANGE_TTLS['TODAY'])
+
+    def test_query_without_date_range(self):
+        self.assertEqual(
+            gaql_cache.ttl_for_query("SELECT customer.id, customer.currency_code FROM customer"),
+            gaql_cache.NO_DATE_RANGE_TTL
+        )
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class _Tomorrow(date):
+    @classmethod
+    def today(cls):
+        return date.today() + timedelta(days=1)
+
+
+class GAQLCacheKeyTests(SimpleTestCase):
+    QUERY = "SELECT campaign.id FROM campaign WHERE segments.date DURING LAST_7_DAYS"
+
+    def test_users_of_a_customer_share_a_key(self):
+        # No credential component: authorisation is checked before the cache is used
+        self.assertEqual(gaql_cache.make_key('1234567890', self.QUERY, '999'),
+                         gaql_cache.make_key('customers/123-456-7890', self.QUERY, '999'))
+        self.assertNotEqual(gaql_cache.make_key('1234567890', self.QUERY, '999'),
+                            gaql_cache.make_key('1234567890', self.QUERY, '888'))
+
+    def test_relative_ranges_do_not_carry_over_midnight(self):
+        today = gaql_cache.make_key('1234567890', self.QUERY)
+        with mock.patch('ad_expert.gaql_cache.date', _Tomorrow):
+            self.assertNotEqual(gaql_cache.make_key('1234567890', self.QUERY), today)
+
+    def test_token_scope_does_not_contain_the_token(self):
+        scope = gaql_cache.credential_scope(access_token='ya29.secret-token')
+        self.assertNotIn('secret', scope)
+        self.assertNotEqual(scope, gaql_cache.credential_scope(access_token='ya29.other-token'))
+
+    def test_whitespace_does_not_change_the_key(self):
+        self.assertEqual(
+            gaql_cache.make_key('1234567890', self.QUERY),
+            gaql_cache.make_key('customers/1234567890', "  ".join(self.QUERY.split()) + "\n")
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GAQLCacheAuthorizationTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = GAQLCache()
+        self.list_accessible = mock.Mock(return_value=['customers/1234567890', '5555555555'])
+
+    def authorized(self, customer_id, scope='user:1', login_customer_id=None):
+        return self.cache.is_authorized(customer_id, login_customer_id, scope, self.list_accessible)
+
+    def test_only_accessible_customers_are_authorized(self):
+        self.assertTrue(self.authorized('123-456-7890'))
+        self.assertFalse(self.authorized('9999999999'))
+        # The list is fetched once per credential scope
+        self.list_accessible.assert_called_once()
+
+    def test_customers_under_an_accessible_manager_are_authorized(self):
+        self.assertTrue(self.authorized('9999999999', login_customer_id='5555555555'))
+
+    def test_failed_lookup_is_not_authorized_or_cached(self):
+        self.list_accessible.return_value = None
+        self.assertFalse(self.authorized('1234567890', scope='user:2'))
+        self.list_accessible.return_value = ['1234567890']
+        self.assertTrue(self.authorized('1234567890', scope='user:2'))
+
+
+class _FakeLock:
+    def __init__(self, cache, key, acquirable):
+        self.cache, self.key, self.acquirable = cache, key, acquirable
+
+    def acquire(self, blocking=False):
+        if not self.acquirable:
+            return False
+        self.cache.data[self.key] = 1
+        return True
+
+    def release(self):
+        self.cache.data.pop(self.key, None)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class _FakeRedisCache:
+    """The subset of the django-redis cache API SingleFlight uses"""
+
+    def __init__(self, lock_acquirable=True):
+        self.data = {}
+        self.lock_acquirable = lock_acquirable
+
+    def lock(self, key, timeout=None):
+        return _FakeLock(self, key, self.lock_acquirable)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def has_key(self, key):
+        return key in self.data
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def flight(self, fake_cache):
+        patcher = mock.patch('ad_expert.single_flight.cache', fake_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return SingleFlight("test_flight", lock_seconds=5, wait_seconds=2)
+
+    def test_in_process_callers_join_the_leader(self):
+        flight = self.flight(_FakeRedisCache())
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def leader_fn():
+            calls.append('leader')
+            started.set()
+            release.wait(2)
+            return {"results": [1]}
+
+        results = {}
+        leader = threading.Thread(target=lambda: results.update(leader=flight.do("k", leader_fn)))
+        leader.start()
+        started.wait(2)
+        follower = threading.Thread(
+            target=lambda: results.update(follower=flight.do("k", lambda: calls.append('follower') or {}))
+        )
+        follower.start()
+        release.set()
+        leader.join(2)
+        follower.join(2)
+
+        self.assertEqual(calls, ['leader'])
+        self.assertEqual(results, {"leader": {"results": [1]}, "follower": {"results": [1]}})
+
+    def test_followers_do_not_share_error_results(self):
+        flight = self.flight(_FakeRedisCache())
+        started, release = threading.Event(), threading.Event()
+
+        def leader_fn():
+            started.set()
+            release.wait(2)
+            return {"error": "PERMISSION_DENIED"}
+
+        leader = threading.Thread(target=lambda: flight.do("k", leader_fn))
+        leader.start()
+        started.wait(2)
+        results = []
+        follower = threading.Thread(target=lambda: results.append(flight.do("k", lambda: {"results": [2]})))
+        follower.start()
+        release.set()
+        leader.join(2)
+        follower.join(2)
+
+        self.assertEqual(results, [{"results": [2]}])
+
+    def test_leader_publishes_result_for_other_workers(self):
+        fake_cache = _FakeRedisCache()
+        flight = self.flight(fake_cache)
+
+        self.assertEqual(flight.do("k", lambda: {"results": [1]}), {"results": [1]})
+        self.assertEqual(fake_cache.get("test_flight:result:k"), {"results": [1]})
+        self.assertFalse(fake_cache.has_key("test_flight:lock:k"))
+
+    def test_follower_worker_waits_for_leader_result(self):
+        fake_cache = _FakeRedisCache(lock_acquirable=False)
+        fake_cache.set("test_flight:lock:k", 1)
+        flight = self.flight(fake_cache)
+        upstream = mock.Mock(return_value={"results": ["own"]})
+
+        # Another worker publishes its result while this one is polling
+        threading.Timer(0.1, fake_cache.set, args=("test_flight:result:k", {"results": ["leader"]})).start()
+
+        self.assertEqual(flight.do("k", upstream), {"results": ["leader"]})
+        upstream.assert_not_called()
+
+    def test_follower_worker_fetches_itself_when_leader_died(self):
+        # The lock expired without a result being published
+        fake_cache = _FakeRedisCache(lock_acquirable=False)
+        flight = self.flight(fake_cache)
+        upstream = mock.Mock(return_value={"results": ["own"]})
+
+        self.assertEqual(flight.do("k", upstream), {"results": ["own"]})
+        upstream.assert_called_once()
+
+    def test_follower_worker_times_out(self):
+        fake_cache = _FakeRedisCache(lock_acquirable=False)
+        fake_cache.set("test_flight:lock:k", 1)
+        flight = self.flight(fake_cache)
+        flight.wait_seconds = 0.2
+        upstream = mock.Mock(return_value={"results": ["own"]})
+
+        self.assertEqual(flight.do("k", upstream), {"results": ["own"]})
+        upstream.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GoogleAdsAPISharingTests(SimpleTestCase):
+    QUERY = "SELECT campaign.id FROM campaign WHERE segments.date DURING LAST_7_DAYS"
+
+    def setUp(self):
+        from .tools import GoogleAdsAPI
+
+        self.api = GoogleAdsAPI()
+        self.api.list_accessible_customers = lambda access_token, user_id=None: (
+            ['7777777777'] if user_id == 3 else ['1234567890']
+        )
+        self.api._search_uncached = mock.Mock(return_value={"results": [{"campaign": {"id": "1"}}]})
+
+    def test_authorised_users_share_one_fetch(self):
+        self.api.search('1234567890', 'token-a', self.QUERY, user_id=1)
+        self.api.search('1234567890', 'token-b', self.QUERY, user_id=2)
+        self.assertEqual(self.api._search_uncached.call_count, 1)
+
+    def test_unauthorised_user_goes_to_google(self):
+        self.api.search('1234567890', 'token-a', self.QUERY, user_id=1)
+        self.api.search('1234567890', 'token-c', self.QUERY, user_id=3)
+        self.assertEqual(self.api._search_uncached.call_count, 2)
+
+    def test_flight_key_is_shared_across_authorised_users(self):
+        with mock.patch('ad_expert.single_flight.gaql_single_flight.do', return_value={}) as do:
+            self.api.search('1234567890', 'token-a', self.QUERY, user_id=1, use_cache=False)
+            self.api.search('1234567890', 'token-b', self.QUERY, user_id=2, use_cache=False)
+        self.assertEqual(do.call_args_list[0].args[0], do.call_args_list[1].args[0])
+
+
+class StreamedBatchDecodingTests(SimpleTestCase):
+    def test_multibyte_characters_split_across_chunks(self):
+        from .tools import _iter_json_array
+
+        payload = '[{"results": [{"keyword": "café ☃"}]}, {"results": []}]'.encode('utf-8')
+        chunks = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+
+        self.assertEqual(
+            list(_iter_json_array(chunks)),
+            [{"results": [{"keyword": "café ☃"}]}, {"results": []}],
+        )
+
+
+@override_settings(IMAGE_JOB_MAX_CONCURRENT_PER_USER=1, IMAGE_JOB_QUEUED_TIMEOUT_SECONDS=600)
+class ImageJobSubmissionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('ad_expert.image_jobs.cache', _FakeRedisCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        apply_async = mock.patch('ad_expert.tasks.generate_image_job.apply_async')
+        self.apply_async = apply_async.start()
+        self.addCleanup(apply_async.stop)
+
+    def test_job_lost_in_the_queue_stops_holding_the_slot(self):
+        from .image_jobs import ImageJobLimitExceeded, get_image_job, submit_image_job
+
+        first = submit_image_job("a red car", user_id=1)
+        with self.assertRaises(ImageJobLimitExceeded):
+            submit_image_job("a blue car", user_id=1)
+
+        with mock.patch('ad_expert.image_jobs.time.time', return_value=first["created_at"] + 601):
+            second = submit_image_job("a blue car", user_id=1)
+            self.assertFalse(second["deduplicated"])
+            self.assertEqual(get_image_job(second["job_id"])["status"], "queued")
+
+    def test_late_task_fails_a_timed_out_job_without_generating(self):
+        from .image_jobs import get_image_job, submit_image_job
+        from .tasks import generate_image_job
+
+        job = submit_image_job("a red car", user_id=1)
+        with mock.patch('ad_expert.image_jobs.time.time', return_value=job["created_at"] + 601), \
+                mock.patch('ad_expert.tools.run_image_generation') as run:
+            generate_image_job.run(job["job_id"])
+
+        run.assert_not_called()
+        self.assertEqual(get_image_job(job["job_id"])["status"], "failed")
+
+    def test_only_a_broker_outage_generates_inline(self):
+        from kombu.exceptions import OperationalError
+
+        from .tools import generate_image
+
+        self.apply_async.side_effect = OperationalError("connection refused")
+        with mock.patch('ad_expert.tools.run_image_generation', return_value={"success": True}) as run:
+            self.assertEqual(generate_image.func("a red car", user_id=1), {"success": True})
+        run.assert_called_once()
+
+    def test_bookkeeping_failure_is_a_503_not_an_inline_generation(self):
+        from .tools import generate_image
+
+        with mock.patch('ad_expert.image_jobs.cache.lock', side_effect=ConnectionError("redis down")), \
+                mock.patch('ad_expert.tools.run_image_generation') as run:
+            result = generate_image.func("a red car", user_id=1)
+
+        run.assert_not_called()
+        self.assertEqual(result["status_code"], 503)
+        self.assertIn("retry_after", result)
+
+
+class ChartRenderTests(SimpleTestCase):
+    DATA = '[{"campaign": "Brand", "clicks": 120, "cost": 45.5}, {"campaign": "Generic", "clicks": 80, "cost": 30}]'
+
+    def png_size(self, content):
+        self.assertEqual(content[:8], b'\x89PNG\r\n\x1a\n')
+        self.assertEqual(content[12:16], b'IHDR')
+        return int.from_bytes(content[16:20], 'big'), int.from_bytes(content[20:24], 'big')
+
+    def test_png_charts_have_the_figure_size(self):
+        from .chart_renderer import CHART_TYPES, render_chart
+
+        for chart_type in CHART_TYPES:
+            with self.subTest(chart_type=chart_type):
+                content = render_chart(self.DATA, chart_type, "Campaigns", "png")
+                self.assertEqual(self.png_size(content), (1000, 600))
+
+    def test_png_render_is_deterministic(self):
+        from .chart_renderer import render_chart
+
+        self.assertEqual(
+            render_chart(self.DATA, "bar_graph", "Campaigns", "png"),
+            render_chart(self.DATA, "bar_graph", "Campaigns", "png"),
+        )
+
+    def test_plotly_spec_carries_the_exact_values(self):
+        import json
+
+        from .chart_renderer import render_chart
+
+        spec = json.loads(render_chart(self.DATA, "bar_graph", "Campaigns", "plotly"))
+        self.assertEqual([trace["name"] for trace in spec["data"]], ["clicks", "cost"])
+        self.assertEqual(spec["data"][0], {"type": "bar", "x": ["Brand", "Generic"], "y": [120.0, 80.0], "name": "clicks"})
+
+    def test_data_without_numbers_is_rejected(self):
+        from .chart_renderer import ChartDataError, render_chart
+
+        with self.assertRaises(ChartDataError):
+            render_chart('[{"campaign": "Brand"}]', "pie_chart", "Campaigns", "png")
+
+
+@override_settings(TABLE_CURRENCY_SYMBOL='$', TABLE_MAX_ROWS=50)
+class TableFormatterTests(SimpleTestCase):
+    def setUp(self):
+        from .table_formatter import TableFormatter
+
+        self.formatter = TableFormatter()
+
+    def cell(self, column, value):
+        return self.formatter.format_value(value, self.formatter.column_kind(column))
+
+    def test_ratio_columns_are_scaled_by_name_not_magnitude(self):
+        self.assertEqual(self.cell('ctr', 0.035), '3.50%')
+        self.assertEqual(self.cell('conversion_rate', 1.5), '150.00%')
+        self.assertEqual(self.cell('search_impression_share', 1), '100.00%')
+
+    def test_percent_point_columns_and_strings_are_not_rescaled(self):
+        self.assertEqual(self.cell('ctr_pct', 3.5), '3.50%')
+        self.assertEqual(self.cell('ctr', '3.5%'), '3.50%')
+
+    def test_micros_and_integers(self):
+        self.assertEqual(self.cell('cost_micros', 1234567890), '$1,234.57')
+        self.assertEqual(self.cell('average_cpc', '2500000'), '$2.50')
+        self.assertEqual(self.cell('clicks', '1200'), '1,200')
+        self.assertEqual(self.cell('campaign', None), '')
+
+    def test_sort_truncate_and_footer(self):
+        data = '[{"campaign": "A", "cost_micros": 1000000}, {"campaign": "B"}, {"campaign": "C", "cost_micros": 3000000}]'
+        table = self.formatter.format(data, 'csv', sort_by='-cost_micros', max_rows=2)
+
+        self.assertEqual(table['formatted_table'], 'Campaign,Cost\nC,$3.00\nA,$1.00\n# 1 more row\n')
+        self.assertEqual((table['row_count'], table['truncated_rows']), (3, 1))
+
+    def test_markdown_escapes_pipes_and_right_aligns_typed_columns(self):
+        table = self.formatter.format('[{"campaign": "a|b", "ctr": 0.5}]', 'markdown')['formatted_table']
+        self.assertEqual(table, '| Campaign | Ctr |\n| --- | ---: |\n| a\\|b | 50.00% |\n')
+
+    def test_json_output_parses(self):
+        import json
+
+        table = json.loads(self.formatter.format('{"Brand": 10, "Generic": 5}', 'json', title='Clicks')['formatted_table'])
+        self.assertEqual(table, {'title': 'Clicks', 'columns': ['Label', 'Value'],
+                                 'rows': [['Brand', '10'], ['Generic', '5']], 'more_rows': 0})
+
+
+class AssetStoreTouchTests(SimpleTestCase):
+    def setUp(self):
+        import tempfile
+
+        from .asset_store import AssetStore
+
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        with override_settings(ASSET_STORE_BACKEND='local', ASSET_STORE_ROOT=root.name):
+            self.store = AssetStore()
+            self.backend = self.store.backend
+
+    def age(self, key, days):
+        import os
+        import time
+
+        past = time.time() - days * 86400
+        os.utime(self.backend._path(key), (past, past))
+        self.store._touched.clear()
+
+    def test_dedup_hit_refreshes_the_asset(self):
+        key = self.store.put_bytes(b'png bytes', 'png')['key']
+        self.age(key, 40)
+
+        self.assertTrue(self.store.put_bytes(b'png bytes', 'png')['existed'])
+        self.assertEqual(self.store.evict(max_age_days=30), {'assets': 0, 'bytes': 0})
+
+    def test_read_refreshes_the_asset_and_unused_ones_are_evicted(self):
+        used = self.store.put_bytes(b'used', 'png')['key']
+        unused = self.store.put_bytes(b'unused', 'png')['key']
+        self.age(used, 40)
+        self.age(unused, 40)
+
+        self.store.open(used).close()
+
+        self.assertEqual(self.store.evict(max_age_days=30), {'assets': 1, 'bytes': len(b'unused')})
+        self.assertTrue(self.store.exists(used))
+        self.assertFalse(self.store.exists(unused))
+
+
+class MessageCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 16, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        cursor = encode_cursor(SimpleNamespace(created_at=created_at, id=42))
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), (created_at, 42))
+
+    def test_malformed_cursors_raise_value_error(self):
+        for cursor in ('not a cursor', encode_cursor(SimpleNamespace(created_at=date(2026, 1, 1), id='x')),
+                       'MjAyNi0xMC0xNg', '%%%'):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_cursor(cursor)
+
+
+class MessagePaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='pages', password='x')
+        self.conversation = Conversation.objects.create(user=user, title='Pages')
+        base = timezone.now()
+        # Five messages; the middle three share a timestamp, so ties are broken by id
+        offsets = [0, 1, 1, 1, 2]
+        self.messages = []
+        for index, offset in enumerate(offsets):
+            message = ChatMessage.objects.create(conversation=self.conversation, role='user', content=str(index))
+            ChatMessage.objects.filter(pk=message.pk).update(created_at=base + timedelta(seconds=offset))
+            self.messages.append(message.pk)
+
+    def walk(self, order, page_size):
+        pages, cursor = [], None
+        while True:
+            messages, cursor = paginate_messages(self.conversation.messages.all(), cursor, page_size, order)
+            pages.append([message.pk for message in messages])
+            if cursor is None:
+                return pages
+
+    def test_asc_walk_visits_every_message_once(self):
+        self.assertEqual(self.walk('asc', 2), [self.messages[0:2], self.messages[2:4], self.messages[4:]])
+
+    def test_desc_walk_visits_every_message_once(self):
+        newest_first = self.messages[::-1]
+        self.assertEqual(self.walk('desc', 2), [newest_first[0:2], newest_first[2:4], newest_first[4:]])
+
+    def test_no_next_page_when_last_page_is_full(self):
+        # Exactly page_size rows left: the look-ahead row is missing, so no cursor
+        self.assertEqual(self.walk('asc', 5), [self.messages])
+        messages, cursor = paginate_messages(self.conversation.messages.all(), None, 4, 'asc')
+        self.assertIsNotNone(cursor)
+        self.assertEqual(paginate_messages(self.conversation.messages.all(), cursor, 1, 'asc')[1], None)
+
+    def test_legacy_page_matches_cursor_pages(self):
+        pages = self.walk('desc', 2)
+        for number, expected in enumerate(pages, start=1):
+            with self.subTest(page=number):
+                messages = page_messages(self.conversation.messages.all(), number, 2, 'desc')
+                self.assertEqual([message.pk for message in messages], expected)
+
+
+class ConversationMessageCountTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='counts', password='x')
+        self.conversation = Conversation.objects.create(user=user, title='Counts')
+        self.first = ChatMessage.objects.create(conversation=self.conversation, role='user', content='hi')
+        self.second = ChatMessage.objects.create(conversation=self.conversation, role='assistant', content='hello')
+
+    def test_deleting_a_message_recomputes_last_message_at(self):
+        self.second.delete()
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 1)
+        self.assertEqual(self.conversation.last_message_at, self.first.created_at)
+
+        self.first.delete()
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 0)
+        self.assertIsNone(self.conversation.last_message_at)
+
+    def test_conversation_delete_does_not_update_per_message(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.conversation.delete()
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+        self.assertFalse(ChatMessage.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are checked against PostgreSQL")
+class HotQueryPlanTests(TestCase):
+    """
+    Regression guard for the chat indexes: on a seeded, analyzed database the
+    hot conversation and message lookups must use their indexes, not Seq Scans
+    """
+
+    USERS = 200
+    CONVERSATIONS_PER_USER = 25
+    MESSAGES_PER_CONVERSATION = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f'plan-user-{i}') for i in range(cls.USERS)])
+        now = timezone.now()
+        conversations = Conversation.objects.bulk_create([
+            Conversation(
+                user=user,
+                title=f'Conversation {c}',
+                deleted_at=now if c % 5 == 0 else None,
+            )
+            for user in users
+            for c in range(cls.CONVERSATIONS_PER_USER)
+        ])
+        ChatMessage.objects.bulk_create([
+            ChatMessage(
+                conversation=conversation,
+                role='user' if m % 2 == 0 else 'assistant',
+                content=f'Message {m}',
+            )
+            for conversation in conversations[:cls.USERS * 2]
+            for m in range(cls.MESSAGES_PER_CONVERSATION)
+        ])
+        with connection.cursor() as cursor:
+            for model in (User, Conversation, ChatMessage):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        cls.user = users[len(users) // 2]
+        cls.conversation = conversations[0]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on {queryset.model._meta.db_table}', plan, plan)
+        self.assertIn(index_name, plan, plan)
+
+    def test_live_conversations_use_partial_index(self):
+        queryset = Conversation.objects.filter(user=self.user, deleted_at__isnull=True).order_by('-updated_at')[:20]
+        self.assertUsesIndex(queryset, 'conv_user_live_updated_idx')
+
+    def test_recent_conversations_use_created_index(self):
+        queryset = Conversation.objects.filter(user=self.user).order_by('-created_at')[:10]
+        self.assertUsesIndex(queryset, 'conv_user_created_idx')
+
+    def test_message_history_uses_keyset_index(self):
+        queryset = ChatMessage.objects.filter(conversation=self.conversation).order_by('-created_at', '-id')[:51]
+        self.assertUsesIndex(queryset, 'chatmsg_conv_created_id_idx')
+
+
+class LangGraphRuntimeRegistryTests(SimpleTestCase):
+    def setUp(self):
+        from . import langgraph_runtime
+
+        self.registry = langgraph_runtime
+        self.addCleanup(langgraph_runtime.reset_runtime, 'test')
+
+    def runtime(self):
+        from .langgraph_runtime import LangGraphRuntime
+
+        return LangGraphRuntime(llm=object(), llm_with_tools=None, checkpointer=None,
+                                postgres_store=None, workflow=None, graph=object())
+
+    def test_concurrent_first_requests_build_once(self):
+        builds = []
+        started = threading.Barrier(8)
+
+        def builder():
+            builds.append(1)
+            return self.runtime()
+
+        def request(results):
+            started.wait()
+            results.append(self.registry.get_runtime('test', builder))
+
+        results = []
+        threads = [threading.Thread(target=request, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertTrue(all(runtime is results[0] for runtime in results))
+
+    def test_reset_forces_a_rebuild(self):
+        first = self.registry.get_runtime('test', self.runtime)
+        self.assertIs(self.registry.peek_runtime('test'), first)
+
+        self.registry.reset_runtime('test')
+        self.assertIsNone(self.registry.peek_runtime('test'))
+        self.assertIsNot(self.registry.get_runtime('test', self.runtime), first)
+
+    def test_failed_build_is_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            self.registry.get_runtime('test', mock.Mock(side_effect=RuntimeError('no API key')))
+        self.assertIsNone(self.registry.peek_runtime('test'))
+
+    def test_warm_up_reports_failure_instead_of_raising(self):
+        with mock.patch('ad_expert.views.LanggraphView.get_runtime', side_effect=RuntimeError('no API key')):
+            self.assertFalse(self.registry.warm_up())
+
+
+class ChatEventStreamTests(SimpleTestCase):
+    def view(self, chunks):
+        from .views import LanggraphView
+
+        view = LanggraphView.__new__(LanggraphView)
+        view.graph = mock.Mock()
+        view.graph.stream.return_value = iter(chunks)
+        view._save_graph_result = mock.Mock(return_value={'response': 'Spend is up 4%'})
+        return view
+
+    @staticmethod
+    def events(stream):
+        import json
+
+        parsed = []
+        for event in stream:
+            name, data = event.rstrip('\n').split('\n')
+            parsed.append((name[len('event: '):], json.loads(data[len('data: '):])))
+        return parsed
+
+    def test_events_follow_the_graph_and_end_with_done(self):
+        from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+        tool_call = {'name': 'get_campaigns', 'args': {'access_token': 'secret-token'}, 'id': 'call_1'}
+        view = self.view([
+            ('updates', {'agent': {'messages': [AIMessage(content='', tool_calls=[tool_call])], 'current_step': 'agent'}}),
+            ('updates', {'tools': {'messages': [ToolMessage(content='[]', name='get_campaigns', tool_call_id='call_1')]}}),
+            ('messages', (AIMessageChunk(content='Spend'), {'langgraph_node': 'agent'})),
+            ('values', {'messages': []}),
+        ])
+        conversation = SimpleNamespace(id=7)
+
+        events = self.events(view._stream_graph_events(conversation, {'user_id': 1}, {}))
+
+        self.assertEqual([name for name, _ in events], ['start', 'node', 'tool_start', 'node', 'tool_end', 'token', 'done'])
+        self.assertEqual(events[0][1], {'conversation_id': 7})
+        self.assertEqual(events[2][1], {'tool': 'get_campaigns', 'tool_call_id': 'call_1'})
+        self.assertEqual(events[5][1], {'node': 'agent', 'content': 'Spend'})
+        self.assertEqual(events[-1][1], {'response': 'Spend is up 4%'})
+        view._save_graph_result.assert_called_once_with(conversation, {'messages': []}, None)
+
+    def test_tool_arguments_are_never_streamed(self):
+        from langchain_core.messages import AIMessage
+
+        tool_call = {'name': 'get_campaigns', 'args': {'access_token': 'secret-token'}, 'id': 'call_1'}
+        view = self.view([('updates', {'agent': {'messages': [AIMessage(content='', tool_calls=[tool_call])]}})])
+
+        stream = ''.join(view._stream_graph_events(SimpleNamespace(id=7), {'user_id': 1}, {}))
+        self.assertNotIn('secret-token', stream)
+
+    def test_graph_failure_ends_with_an_error_event(self):
+        view = self.view([])
+        view.graph.stream.side_effect = RuntimeError('model overloaded')
+
+        events = self.events(view._stream_graph_events(SimpleNamespace(id=7), {'user_id': 1}, {}))
+
+        self.assertEqual([name for name, _ in events], ['start', 'error'])
+        view._save_graph_result.assert_not_called()
+
+    def test_stream_is_requested_by_body_query_or_accept_header(self):
+        from .views import LanggraphView
+
+        view = LanggraphView.__new__(LanggraphView)
+
+        def request(data=None, query=None, accept=''):
+            return SimpleNamespace(data=data or {}, query_params=query or {}, META={'HTTP_ACCEPT': accept})
+
+        self.assertTrue(view._wants_stream(request(data={'stream': True})))
+        self.assertTrue(view._wants_stream(request(query={'stream': '1'})))
+        self.assertTrue(view._wants_stream(request(accept='text/event-stream')))
+        self.assertFalse(view._wants_stream(request(data={'stream': 'false'})))
+
+
+class GoogleAdsSessionTests(SimpleTestCase):
+    def setUp(self):
+        from .tools import GoogleAdsAPI
+
+        self.api = GoogleAdsAPI(pool_size=4, connect_timeout=2, read_timeout=30, max_retries=2, backoff_factor=0.1)
+        self.api.session.post = mock.Mock()
+
+    @staticmethod
+    def response(status_code=200, body=None):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body or {}
+        return response
+
+    def test_session_pools_connections_and_retries_transient_statuses(self):
+        adapter = self.api.session.get_adapter('https://googleads.googleapis.com/v21/customers')
+        retry = adapter.max_retries
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(retry.total, 2)
+        self.assertEqual(set(retry.status_forcelist), {429, 500, 502, 503, 504})
+        self.assertTrue(retry.respect_retry_after_header)
+        self.assertIn('gzip', self.api.session.headers['Accept-Encoding'])
+
+    def test_pages_share_the_session_and_timeouts(self):
+        self.api.session.post.side_effect = [
+            self.response(body={'results': [{'n': 1}], 'nextPageToken': 'p2'}),
+            self.response(body={'results': [{'n': 2}]}),
+        ]
+
+        data = self.api._search_uncached('customers/1234567890', 'token', 'SELECT campaign.id FROM campaign')
+
+        self.assertEqual(data['results'], [{'n': 1}, {'n': 2}])
+        self.assertNotIn('nextPageToken', data)
+        first, second = self.api.session.post.call_args_list
+        self.assertEqual(first.kwargs['timeout'], (2, 30))
+        self.assertEqual(second.kwargs['json'], {'query': 'SELECT campaign.id FROM campaign', 'pageToken': 'p2'})
+
+    def test_rejected_token_is_refreshed_once(self):
+        self.api.session.post.side_effect = [self.response(401), self.response(body={'results': []})]
+        self.api._resolve_access_token = lambda access_token, user_id=None: access_token
+        self.api._refresh_token_for_user = mock.Mock(return_value='fresh')
+
+        self.api._search_uncached('1234567890', 'stale', 'SELECT campaign.id FROM campaign', user_id=5)
+
+        self.api._refresh_token_for_user.assert_called_once_with(5, rejected_token='stale')
+        retried = self.api.session.post.call_args_list[1]
+        self.assertEqual(retried.kwargs['headers']['Authorization'], 'Bearer fresh')
+
+
+class GAQLFanOutTests(SimpleTestCase):
+    def setUp(self):
+        from .tools import GoogleAdsAPI
+
+        with mock.patch.dict('os.environ', {'GAQL_MAX_PARALLEL_QUERIES': '8', 'GAQL_MAX_CONCURRENT_PER_CUSTOMER': '2'}):
+            self.api = GoogleAdsAPI()
+
+    def test_independent_queries_overlap_and_keep_their_order(self):
+        # Every query waits for all the others, so a serial fan-out would time out
+        started = threading.Barrier(3, timeout=5)
+
+        def search(customer_id, access_token, query, user_id=None):
+            started.wait()
+            return {'query': query}
+
+        self.api.search = search
+        results = self.api.search_many('1234567890', 'token', ['q1', 'q2', 'q3'])
+
+        self.assertEqual(results, [{'query': 'q1'}, {'query': 'q2'}, {'query': 'q3'}])
+
+    def test_each_customer_is_capped(self):
+        import time
+
+        lock = threading.Lock()
+        running = {'now': 0, 'peak': 0}
+
+        def search(customer_id, access_token, query, user_id=None):
+            with self.api._customer_slot(customer_id):
+                with lock:
+                    running['now'] += 1
+                    running['peak'] = max(running['peak'], running['now'])
+                time.sleep(0.02)
+                with lock:
+                    running['now'] -= 1
+            return {}
+
+        self.api.search = search
+        self.api.search_many('customers/1234567890', 'token', [f'q{i}' for i in range(6)])
+
+        self.assertEqual(running['peak'], 2)
+
+    def test_single_query_runs_inline(self):
+        self.api.search = mock.Mock(return_value={'results': []})
+        self.api._query_executor = mock.Mock()
+
+        self.assertEqual(self.api.search_many('1234567890', 'token', ['q1']), [{'results': []}])
+        self.api._query_executor.submit.assert_not_called()
+
+
+def _turn(pk, words, reply_words=0, tool_payload=None):
+    """A user message of ``words`` words (ChatMessage pk ``pk``) and its replies"""
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    messages = [HumanMessage(content=' '.join(['ask'] * words), id=f'chat_{pk}')]
+    if tool_payload:
+        messages.append(ToolMessage(content=tool_payload, tool_call_id=f'call_{pk}', id=f'tool_{pk}'))
+    if reply_words:
+        messages.append(AIMessage(content=' '.join(['answer'] * reply_words), id=f'chat_{pk + 1}'))
+    return messages
+
+
+@override_settings(LANGGRAPH_CONTEXT_TOKEN_BUDGET=100, LANGGRAPH_CONTEXT_RETAIN_RATIO=0.5)
+class ConversationContextWindowTests(SimpleTestCase):
+    def setUp(self):
+        from .context_window import ConversationContextManager
+
+        self.manager = ConversationContextManager()
+        # One token per word keeps the arithmetic readable (plus 4 per message)
+        self.manager.count_text_tokens = lambda text: len(text.split())
+        self.manager._summary_llm = mock.Mock()
+        self.manager._summary_llm.invoke.return_value = SimpleNamespace(content=' Customer 123 picked. ')
+        self.conversation = mock.Mock(id=1, context_summary='', context_summary_until_id=None)
+
+    def test_history_within_budget_is_sent_unchanged(self):
+        messages = _turn(1, 10, 10) + _turn(3, 10, 10) + _turn(5, 10)
+
+        self.assertEqual(self.manager.prepare(self.conversation, messages), 'chat_1')
+        self.manager._summary_llm.invoke.assert_not_called()
+        self.conversation.save.assert_not_called()
+
+    def test_overflow_folds_oldest_turns_until_the_rest_fits_the_retain_ratio(self):
+        # 32 tokens per finished turn, 14 for the current one; budget 100, retain 50
+        messages = _turn(1, 12, 12) + _turn(3, 12, 12) + _turn(5, 12, 12) + _turn(7, 10)
+
+        start = self.manager.prepare(self.conversation, messages)
+
+        self.assertEqual(start, 'chat_5')
+        self.assertEqual(self.conversation.context_summary, 'Customer 123 picked.')
+        self.assertEqual(self.conversation.context_summary_until_id, 5)
+        self.conversation.save.assert_called_once_with(update_fields=['context_summary', 'context_summary_until_id'])
+        self.assertEqual(self.manager.window(messages, start), messages[4:])
+
+    def test_tool_payloads_are_not_summarised(self):
+        messages = _turn(1, 40, 40, tool_payload='{"rows": "secret-payload"}') + _turn(3, 10)
+
+        self.manager.prepare(self.conversation, messages)
+
+        prompt = self.manager._summary_llm.invoke.call_args.args[0]
+        self.assertIn('User: ask', prompt)
+        self.assertNotIn('secret-payload', prompt)
+
+    def test_summarised_turns_are_not_counted_again(self):
+        self.conversation.context_summary_until_id = 5
+        messages = _turn(1, 60, 60) + _turn(3, 60, 60) + _turn(5, 10, 10) + _turn(7, 10)
+
+        self.assertEqual(self.manager.prepare(self.conversation, messages), 'chat_5')
+        self.manager._summary_llm.invoke.assert_not_called()
+
+    def test_current_turn_is_kept_even_when_it_alone_overflows(self):
+        messages = _turn(1, 10, 10) + _turn(3, 200)
+
+        self.assertEqual(self.manager.prepare(self.conversation, messages), 'chat_3')
+
+    def test_failed_summary_still_trims_the_prompt(self):
+        self.manager._summary_llm.invoke.side_effect = RuntimeError('rate limited')
+        messages = _turn(1, 60, 60) + _turn(3, 10)
+
+        self.assertEqual(self.manager.prepare(self.conversation, messages), 'chat_3')
+        self.conversation.save.assert_not_called()
+
+
+def _perf_row(day, campaign, cost_micros, clicks='5', impressions='100'):
+    # Tools return Google's int64 metrics as strings
+    return {'date': day, 'campaign_name': campaign, 'campaign_status': '', 'impressions': impressions,
+            'clicks': clicks, 'cost_micros': str(cost_micros)}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TOOL_RESULT_ROW_THRESHOLD=5, TOOL_RESULT_TOP_N=3)
+class ToolResultShaperTests(SimpleTestCase):
+    def setUp(self):
+        import json
+
+        from django.core.cache import cache
+
+        from .tool_results import ToolResultShaper
+
+        cache.clear()
+        self.shaper = ToolResultShaper()
+        self.rows = [
+            _perf_row(f'2025-01-0{day}', f'Campaign {i}', (i + 1) * 1_000_000)
+            for day in (2, 1) for i in range(4)
+        ]
+        self.content = json.dumps({'success': True, 'query': 'SELECT ...', 'performance_data': self.rows})
+
+    def test_aggregate_totals_daily_rollup_and_top_rows(self):
+        summary = self.shaper._aggregate(self.rows)
+
+        self.assertEqual(summary['row_count'], 8)
+        self.assertEqual(summary['totals'], {
+            'impressions': 800, 'clicks': 40, 'cost_micros': 20_000_000, 'ctr': 0.05, 'average_cpc_micros': 500_000,
+        })
+        self.assertEqual(
+            summary['daily_csv'],
+            'date,impressions,clicks,cost_micros,ctr,average_cpc_micros\n'
+            '2025-01-01,400,20,10000000,0.05,500000\n'
+            '2025-01-02,400,20,10000000,0.05,500000\n'
+        )
+        self.assertEqual(summary['top_by'], 'cost_micros')
+        top = summary['top_rows_csv'].splitlines()
+        self.assertEqual(len(top), 4)
+        self.assertTrue(top[1].startswith('2025-01-02,Campaign 3,'))
+        self.assertEqual(summary['rows_omitted'], 5)
+
+    def test_summarised_payload_is_kept_for_the_ui(self):
+        import json
+
+        shaped = json.loads(self.shaper.shape_content(self.content, conversation_id=9, tool_call_id='call_1'))
+
+        self.assertNotIn('query', shaped)
+        self.assertEqual(shaped['performance_data']['row_count'], 8)
+        self.assertEqual(shaped['full_result_id'], 'call_1')
+        self.assertEqual(self.shaper.fetch(9, 'call_1')['performance_data'], self.rows)
+
+    def test_small_row_lists_are_kept_and_not_stored(self):
+        import json
+
+        content = json.dumps({'performance_data': self.rows[:2], 'query': 'SELECT ...', 'error': None})
+        shaped = json.loads(self.shaper.shape_content(content, conversation_id=9, tool_call_id='call_2'))
+
+        self.assertEqual(shaped, {'performance_data': [
+            {key: value for key, value in row.items() if value != ''} for row in self.rows[:2]
+        ]})
+        self.assertIsNone(self.shaper.fetch(9, 'call_2'))
+
+    def test_projection_that_is_not_smaller_returns_the_original(self):
+        content = '{"success":true,"message":"done"}'
+        self.assertIs(self.shaper.shape_content(content, conversation_id=9, tool_call_id='call_3'), content)
+
+    def test_failed_store_drops_the_full_result_reference(self):
+        import json
+
+        with mock.patch('ad_expert.tool_results.cache.set', side_effect=ConnectionError('redis down')):
+            shaped = json.loads(self.shaper.shape_content(self.content, conversation_id=9, tool_call_id='call_4'))
+
+        self.assertNotIn('full_result_id', shaped)
+        self.assertEqual(shaped['performance_data']['row_count'], 8)
+
+    def test_non_object_content_is_left_alone(self):
+        self.assertEqual(self.shaper.shape_content('plain text'), 'plain text')
+        self.assertEqual(self.shaper.shape_content('[1, 2]'), '[1, 2]')
+
+
+class _FakeRedisPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self):
+        return len(self.commands)
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [getattr(self.client, name)(*args, _queued=True, **kwargs) for name, args, kwargs in self.commands]
+
+
+class _FakeRedis:
+    """The subset of the redis-py client RedisService uses, counting round trips"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def _call(self, queued):
+        if not queued:
+            self.round_trips += 1
+
+    def pipeline(self, transaction=True):
+        return _FakeRedisPipeline(self)
+
+    def hset(self, key, field=None, value=None, mapping=None, _queued=False):
+        self._call(_queued)
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        self.hashes.setdefault(key, {}).update(fields)
+        return len(fields)
+
+    def hget(self, key, field, _queued=False):
+        self._call(_queued)
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, fields, _queued=False):
+        self._call(_queued)
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hdel(self, key, *fields, _queued=False):
+        self._call(_queued)
+        return sum(self.hashes.get(key, {}).pop(field, None) is not None for field in fields)
+
+    def expire(self, key, seconds, _queued=False):
+        self._call(_queued)
+        self.ttls[key] = seconds
+        return True
+
+    def delete(self, *keys, _queued=False):
+        self._call(_queued)
+        return sum(self.hashes.pop(key, None) is not None for key in keys)
+
+
+class RedisServiceTests(SimpleTestCase):
+    def setUp(self):
+        from .redis_service import RedisService
+
+        self.service = RedisService
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(RedisService, '_client', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_state_is_written_and_read_in_one_round_trip_each(self):
+        self.assertTrue(self.service.save_request_state(
+            1, 10, customer_id='customers/123', accessible_customers=['customers/123', 'customers/456'],
+            context_data={'customer_id': 'customers/123'},
+        ))
+        self.assertEqual(self.redis.round_trips, 1)
+
+        state = self.service.get_request_state(1, 10)
+
+        self.assertEqual(self.redis.round_trips, 2)
+        self.assertEqual(state['customer_selection']['customer_id'], 'customers/123')
+        self.assertEqual(state['accessible_customers'], ['customers/123', 'customers/456'])
+        self.assertEqual(state['conversation_context'], {'customer_id': 'customers/123'})
+
+    def test_each_hash_gets_its_ttl(self):
+        self.service.save_request_state(1, 10, customer_id='customers/123', accessible_customers=[],
+                                        context_data={})
+
+        self.assertEqual(self.redis.ttls, {
+            'customer_id:user_1': self.service.CUSTOMER_SELECTION_TTL,
+            'user_session:1': self.service.USER_SESSION_TTL,
+            'conversation:10': self.service.CONVERSATION_TTL,
+        })
+
+    def test_empty_save_skips_redis(self):
+        self.assertTrue(self.service.save_request_state(1, 10))
+        self.assertEqual(self.redis.round_trips, 0)
+
+    def test_selections_of_several_conversations_come_from_one_hmget(self):
+        self.service.save_customer_id(1, 10, 'customers/123')
+        self.service.save_customer_id(1, 11, 'customers/456')
+        self.redis.round_trips = 0
+
+        selections = self.service.get_customer_ids(1, [10, 11, 12])
+
+        self.assertEqual(self.redis.round_trips, 1)
+        self.assertEqual({cid: data['customer_id'] for cid, data in selections.items()},
+                         {10: 'customers/123', 11: 'customers/456'})
+
+    def test_clearing_a_user_drops_only_their_hashes(self):
+        self.service.save_request_state(1, 10, customer_id='customers/123', accessible_customers=['customers/123'],
+                                        context_data={'note': 'kept'})
+        self.service.save_customer_id(2, 20, 'customers/789')
+
+        self.assertTrue(self.service.clear_user_data(1))
+
+        self.assertIsNone(self.service.get_customer_id(1, 10))
+        self.assertIsNone(self.service.get_accessible_customers(1))
+        self.assertEqual(self.service.get_conversation_context(10), {'note': 'kept'})
+        self.assertEqual(self.service.get_customer_id(2, 20)['customer_id'], 'customers/789')
+
+    def test_unreachable_redis_degrades_to_empty_state(self):
+        self.redis.pipeline = mock.Mock(side_effect=ConnectionError('redis down'))
+
+        self.assertEqual(self.service.get_request_state(1, 10), {
+            'customer_selection': None, 'accessible_customers': None, 'conversation_context': None,
+        })
+        self.assertFalse(self.service.save_request_state(1, 10, customer_id='customers/123'))
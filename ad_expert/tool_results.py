@@ -0,0 +1,216 @@
+"""
+Tool result shaping
+Projects tool payloads into a compact form before they re-enter the LLM and keeps
+the full payload in a side store (Redis cache) the UI can fetch
+"""
+
+import csv
+import io
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultShaper:
+    """
+    Compact projection of tool payloads
+
+    - null/empty values and echo fields (the GAQL ``query``) are dropped
+    - row lists above ``row_threshold`` become totals, a per-day rollup (when
+      rows carry a date) and the top rows by spend, as CSV
+    - when rows were summarised away, the full payload is stored under
+      (conversation_id, tool_call_id)
+    """
+
+    KEY_PREFIX = "tool_result"
+    ECHO_FIELDS = {"query", "queries", "access_token", "user_id"}
+    # Metrics that can be summed across rows; rates are recomputed from the sums
+    SUMMABLE_METRICS = (
+        "impressions", "clicks", "cost_micros", "conversions", "conversions_value",
+        "all_conversions", "view_through_conversions", "interactions", "amount_micros",
+    )
+    # Columns used to pick the top rows, in order of preference
+    RANK_METRICS = ("cost_micros", "conversions", "clicks", "impressions")
+    DATE_FIELDS = ("date", "segments_date")
+
+    def __init__(self):
+        self.row_threshold = getattr(settings, 'TOOL_RESULT_ROW_THRESHOLD', 25)
+        self.top_n = getattr(settings, 'TOOL_RESULT_TOP_N', 20)
+        self.store_seconds = getattr(settings, 'TOOL_RESULT_STORE_SECONDS', 86400)
+
+    def _key(self, conversation_id, tool_call_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{conversation_id}:{tool_call_id}"
+
+    def store(self, conversation_id, tool_call_id: str, payload: Any) -> bool:
+        """Keep the full payload for the UI"""
+        try:
+            cache.set(self._key(conversation_id, tool_call_id), payload, timeout=self.store_seconds)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to store full tool result {tool_call_id}: {e}")
+            return False
+
+    def fetch(self, conversation_id, tool_call_id: str) -> Optional[Any]:
+        """Full payload stored for a tool call, if it has not expired"""
+        return cache.get(self._key(conversation_id, tool_call_id))
+
+    def shape_content(self, content: Any, conversation_id=None, tool_call_id: str = None) -> Any:
+        """
+        Shape a ToolMessage's content
+
+        Args:
+            content: ToolMessage content (JSON text for dict-returning tools)
+            conversation_id: Conversation the tool ran in
+            tool_call_id: Tool call the content answers
+
+        Returns:
+            Compact JSON text, or the content unchanged if it is not a JSON object
+        """
+        if not isinstance(content, str):
+            return content
+        try:
+            payload = json.loads(content)
+        except ValueError:
+            return content
+        if not isinstance(payload, dict):
+            return content
+
+        compact, lossy = self._compact(payload)
+        if lossy and conversation_id is not None and tool_call_id:
+            compact["full_result_id"] = tool_call_id
+
+        shaped = self._dumps(compact)
+        if len(shaped) >= len(content):
+            return content
+        # Only payloads the projection summarised need a side copy for the UI
+        if "full_result_id" in compact and not self.store(conversation_id, tool_call_id, payload):
+            del compact["full_result_id"]
+            shaped = self._dumps(compact)
+        return shaped
+
+    @staticmethod
+    def _dumps(compact: Dict[str, Any]) -> str:
+        return json.dumps(compact, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def compact(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact projection of a tool payload"""
+        return self._compact(payload)[0]
+
+    def _compact(self, payload: Dict[str, Any]):
+        """(compact projection, whether any row list was summarised rather than kept)"""
+        compact = {}
+        lossy = False
+        for key, value in payload.items():
+            if key in self.ECHO_FIELDS:
+                continue
+            if self._is_row_list(value):
+                rows = [row for row in (self._drop_empty(row) for row in value) if row]
+                if len(rows) > self.row_threshold:
+                    compact[key] = self._aggregate(rows)
+                    lossy = True
+                else:
+                    compact[key] = rows
+                continue
+            value = self._drop_empty(value)
+            if value is not None:
+                compact[key] = value
+        return compact, lossy
+
+    @staticmethod
+    def _is_row_list(value: Any) -> bool:
+        return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+    def _drop_empty(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            cleaned = {k: self._drop_empty(v) for k, v in value.items() if k not in self.ECHO_FIELDS}
+            cleaned = {k: v for k, v in cleaned.items() if v is not None}
+            return cleaned or None
+        if isinstance(value, list):
+            cleaned = [v for v in (self._drop_empty(item) for item in value) if v is not None]
+            return cleaned or None
+        if value == "":
+            return None
+        return value
+
+    @staticmethod
+    def _number(value: Any) -> Optional[float]:
+        # The Google Ads REST API returns int64 metrics as strings
+        if isinstance(value, bool):
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _flatten(self, row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        flat = {}
+        for key, value in row.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat.update(self._flatten(value, f"{name}_"))
+            elif isinstance(value, list):
+                flat[name] = json.dumps(value, default=str)
+            else:
+                flat[name] = value
+        return flat
+
+    def _sum_metrics(self, rows: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Any]:
+        totals = {}
+        for column in columns:
+            if column in self.SUMMABLE_METRICS:
+                values = [self._number(row.get(column)) for row in rows]
+                total = sum(v for v in values if v is not None)
+                totals[column] = int(total) if float(total).is_integer() else round(total, 2)
+        if totals.get("impressions"):
+            totals["ctr"] = round(totals.get("clicks", 0) / totals["impressions"], 4)
+        if totals.get("clicks") and "cost_micros" in totals:
+            totals["average_cpc_micros"] = round(totals["cost_micros"] / totals["clicks"])
+        return totals
+
+    @staticmethod
+    def _to_csv(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    def _aggregate(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        flat_rows = [self._flatten(row) for row in rows]
+        columns = list(OrderedDict.fromkeys(column for row in flat_rows for column in row))
+        summary = {
+            "row_count": len(flat_rows),
+            "totals": self._sum_metrics(flat_rows, columns),
+        }
+
+        date_field = next((field for field in self.DATE_FIELDS if field in columns), None)
+        metric_columns = [column for column in columns if column in self.SUMMABLE_METRICS]
+        if date_field and metric_columns:
+            by_day = OrderedDict()
+            for row in sorted(flat_rows, key=lambda r: str(r.get(date_field))):
+                by_day.setdefault(row.get(date_field), []).append(row)
+            daily = [
+                {date_field: day, **self._sum_metrics(day_rows, metric_columns)}
+                for day, day_rows in by_day.items()
+            ]
+            daily_columns = list(OrderedDict.fromkeys(column for row in daily for column in row))
+            summary["daily_csv"] = self._to_csv(daily, daily_columns)
+
+        rank_metric = next((metric for metric in self.RANK_METRICS if metric in columns), None)
+        if rank_metric:
+            top_rows = sorted(flat_rows, key=lambda r: self._number(r.get(rank_metric)) or 0, reverse=True)
+            summary["top_by"] = rank_metric
+        else:
+            top_rows = flat_rows
+        summary["top_rows_csv"] = self._to_csv(top_rows[:self.top_n], columns)
+        summary["rows_omitted"] = max(len(flat_rows) - self.top_n, 0)
+        return summary
+
+
+tool_result_shaper = ToolResultShaper()
@@ -3,11 +3,17 @@ Google Ads Tools using GAQL (Google Ads Query Language)
 Contains all Google Ads API operations as LangChain tools
 """
 
+import codecs
 import logging
 from typing import Dict, Any, List, Optional
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 from dotenv import load_dotenv
@@ -20,11 +26,55 @@ load_dotenv()
 class GoogleAdsAPI:
     """Google Ads API client for making GAQL requests with automatic token refresh"""
     
-    def __init__(self):
+    # Transient statuses retried with exponential backoff (Retry-After is honoured)
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None,
+                 max_retries: int = None, backoff_factor: float = None):
         self.base_url = "https://googleads.googleapis.com/v21"
         self.developer_token = os.getenv('GOOGLE_ADS_DEVELOPER_TOKEN')
         self.login_customer_id = os.getenv('GOOGLE_ADS_LOGIN_CUSTOMER_ID', '9762343117')
         
+        self.pool_size = pool_size or int(os.getenv('GOOGLE_ADS_HTTP_POOL_SIZE', '20'))
+        self.timeout = (
+            connect_timeout or float(os.getenv('GOOGLE_ADS_HTTP_CONNECT_TIMEOUT', '5')),
+            read_timeout or float(os.getenv('GOOGLE_ADS_HTTP_READ_TIMEOUT', '60'))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('GOOGLE_ADS_HTTP_MAX_RETRIES', '3'))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.getenv('GOOGLE_ADS_HTTP_BACKOFF_FACTOR', '0.5'))
+        self.session = self._build_session()
+        
+        # Independent queries fan out on a bounded pool; each customer gets a
+        # concurrency cap so one account cannot exhaust its per-customer quota
+        self.max_parallel_queries = int(os.getenv('GAQL_MAX_PARALLEL_QUERIES', '8'))
+        self.max_concurrent_per_customer = int(os.getenv('GAQL_MAX_CONCURRENT_PER_CUSTOMER', '4'))
+        self._query_executor = ThreadPoolExecutor(max_workers=self.max_parallel_queries, thread_name_prefix="gaql")
+        self._customer_semaphores = {}
+        self._customer_semaphores_lock = threading.Lock()
+    
+    def _build_session(self) -> requests.Session:
+        """Create a keep-alive session so GAQL calls reuse pooled TCP/TLS connections"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'POST'}),  # GAQL search is read-only, safe to retry
+            respect_retry_after_header=True,
+            raise_on_status=False  # Hand the final response back so errors are logged as before
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        return session
+    
     def _get_headers(self, access_token: str) -> Dict[str, str]:
         """Get headers for API requests"""
         return {
@@ -34,72 +84,313 @@ class GoogleAdsAPI:
             'login-customer-id': self.login_customer_id
         }
     
-    def _refresh_token_for_user(self, user_id: int) -> Optional[str]:
-        """Refresh access token for a user"""
+    def _refresh_token_for_user(self, user_id: int, rejected_token: str = None) -> Optional[str]:
+        """Get a replacement for a rejected access token through the token broker"""
         try:
-            from accounts.google_oauth_service import UserGoogleAuthService
-            from django.contrib.auth.models import User
-            
-            user = User.objects.get(id=user_id)
-            auth_record = UserGoogleAuthService.refresh_user_tokens(user)
+            from accounts.token_broker import token_broker
+            return token_broker.get_access_token(user_id, rejected_token=rejected_token)
+        except Exception as e:
+            logger.error(f"Error refreshing token for user {user_id}: {str(e)}")
+            return None
+    
+    def _resolve_access_token(self, access_token: str, user_id: int = None) -> str:
+        """Prefer the broker's current token for the user over the one passed in"""
+        if not user_id:
+            return access_token
+        try:
+            from accounts.token_broker import token_broker
+            return token_broker.get_access_token(user_id) or access_token
+        except Exception as e:
+            logger.warning(f"Token broker unavailable for user {user_id}, using supplied token: {e}")
+            return access_token
+    
+    @contextmanager
+    def _customer_slot(self, customer_id: str):
+        """Hold one of the customer's concurrent-request slots"""
+        clean_customer_id = customer_id.replace('customers/', '') if customer_id.startswith('customers/') else customer_id
+        with self._customer_semaphores_lock:
+            semaphore = self._customer_semaphores.get(clean_customer_id)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_concurrent_per_customer)
+                self._customer_semaphores[clean_customer_id] = semaphore
+        with semaphore:
+            yield
+    
+    def search_many(self, customer_id: str, access_token: str, queries: List[str],
+                    user_id: int = None) -> List[Dict[str, Any]]:
+        """
+        Execute independent GAQL queries concurrently
+        
+        Wall time is the slowest query rather than the sum of all of them.
+        
+        Returns:
+            Results in the same order as queries (error dicts included)
+        """
+        if len(queries) <= 1:
+            return [self.search(customer_id, access_token, query, user_id) for query in queries]
+        
+        futures = [
+            self._query_executor.submit(self.search, customer_id, access_token, query, user_id)
+            for query in queries
+        ]
+        return [future.result() for future in futures]
+    
+    def _customer_url(self, customer_id: str, method: str) -> str:
+        """Build the googleAds:<method> URL for a customer"""
+        # Clean customer_id to remove 'customers/' prefix if present
+        clean_customer_id = customer_id.replace('customers/', '') if customer_id.startswith('customers/') else customer_id
+        return f"{self.base_url}/customers/{clean_customer_id}/googleAds:{method}"
+    
+    def _post_with_refresh(self, url: str, access_token: str, payload: Dict[str, Any], user_id: int = None,
+                           stream: bool = False):
+        """POST a GAQL request, refreshing the user's token once on 401/403"""
+        # Tokens are renewed ahead of expiry, so the 401 path below is only for revoked tokens
+        access_token = self._resolve_access_token(access_token, user_id)
+        response = self.session.post(url, headers=self._get_headers(access_token), json=payload,
+                                     timeout=self.timeout, stream=stream)
+        
+        # Handle 401 Unauthorized - try to refresh token
+        if response.status_code in (401, 403) and user_id:
+            logger.warning(f"{response.status_code} error for user {user_id}, attempting token refresh")
             
-            if auth_record:
-                logger.info(f"Successfully refreshed token for user {user_id}")
-                return auth_record.access_token
+            # Try to refresh the token
+            new_access_token = self._refresh_token_for_user(user_id, rejected_token=access_token)
+            if new_access_token:
+                # Retry with new token
+                response.close()
+                access_token = new_access_token
+                response = self.session.post(url, headers=self._get_headers(access_token), json=payload,
+                                             timeout=self.timeout, stream=stream)
+                logger.info(f"Retried request with refreshed token for user {user_id}")
             else:
                 logger.error(f"Failed to refresh token for user {user_id}")
-                return None
-                
+        
+        response.raise_for_status()
+        return response, access_token
+    
+    def search(self, customer_id: str, access_token: str, query: str, user_id: int = None,
+               max_rows: int = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Execute GAQL search query with automatic token refresh on 401 errors
+        
+        Follows nextPageToken so large result sets are not silently truncated;
+        max_rows stops paging early once enough rows have been collected.
+        Results are served from the GAQL cache when use_cache is set.
+        """
+        from .gaql_cache import gaql_cache
+        from .single_flight import gaql_single_flight
+        
+        # Cache entries and in-flight calls are shared by every user of a customer, so
+        # only callers whose own credentials reach the customer may join them
+        scope = gaql_cache.credential_scope(user_id, access_token)
+        if not gaql_cache.is_authorized(
+            customer_id, self.login_customer_id, scope,
+            lambda: self.list_accessible_customers(access_token, user_id)
+        ):
+            return self._search_uncached(customer_id, access_token, query, user_id, max_rows)
+        
+        # Identical concurrent queries for the customer (in this process or across
+        # workers) share one upstream call
+        flight_key = gaql_cache.make_key(customer_id, query, self.login_customer_id, max_rows)
+        
+        def fetch():
+            return gaql_single_flight.do(
+                flight_key,
+                lambda: self._search_uncached(customer_id, access_token, query, user_id, max_rows)
+            )
+        
+        if not use_cache:
+            return fetch()
+        
+        return gaql_cache.get_or_fetch(
+            customer_id, query, fetch,
+            login_customer_id=self.login_customer_id,
+            variant=max_rows
+        )
+    
+    def list_accessible_customers(self, access_token: str, user_id: int = None) -> Optional[List[str]]:
+        """
+        Customer ids the caller's credentials can access directly (customers:listAccessibleCustomers)
+        
+        Returns:
+            List of customer ids, or None if the request failed
+        """
+        try:
+            response = self.session.get(
+                f"{self.base_url}/customers:listAccessibleCustomers",
+                headers=self._get_headers(self._resolve_access_token(access_token, user_id)),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return [name.replace('customers/', '') for name in response.json().get('resourceNames', [])]
         except Exception as e:
-            logger.error(f"Error refreshing token for user {user_id}: {str(e)}")
+            logger.warning(f"Could not list accessible customers: {e}")
             return None
     
-    def search(self, customer_id: str, access_token: str, query: str, user_id: int = None) -> Dict[str, Any]:
-        """Execute GAQL search query with automatic token refresh on 401 errors"""
+    def _search_uncached(self, customer_id: str, access_token: str, query: str, user_id: int = None,
+                         max_rows: int = None) -> Dict[str, Any]:
+        """Run a paged googleAds:search request against the API"""
         try:
-            # Clean customer_id to remove 'customers/' prefix if present
-            clean_customer_id = customer_id.replace('customers/', '') if customer_id.startswith('customers/') else customer_id
-            url = f"{self.base_url}/customers/{clean_customer_id}/googleAds:search"
-            headers = self._get_headers(access_token)
-            
+            url = self._customer_url(customer_id, 'search')
             payload = {"query": query}
             
-            response = requests.post(url, headers=headers, json=payload)
+            results = []
+            data = {}
+            with self._customer_slot(customer_id):
+                while True:
+                    response, access_token = self._post_with_refresh(url, access_token, payload, user_id)
+                    data = response.json()
+                    results.extend(data.get("results", []))
+                    
+                    next_page_token = data.get("nextPageToken")
+                    if not next_page_token or (max_rows is not None and len(results) >= max_rows):
+                        break
+                    payload = {"query": query, "pageToken": next_page_token}
             
-            # Handle 401 Unauthorized - try to refresh token
-            if response.status_code == 401 or response.status_code == 403 and user_id:
-                logger.warning(f"401 Unauthorized error for user {user_id}, attempting token refresh")
-                
-                # Try to refresh the token
-                new_access_token = self._refresh_token_for_user(user_id)
-                logger.info("New access token: ", new_access_token)
-                if new_access_token:
-                    # Retry with new token
-                    headers = self._get_headers(new_access_token)
-                    response = requests.post(url, headers=headers, json=payload)
-                    logger.info(f"Retried request with refreshed token for user {user_id}")
-                else:
-                    logger.error(f"Failed to refresh token for user {user_id}")
+            if max_rows is not None and len(results) > max_rows:
+                results = results[:max_rows]
+                data["truncated"] = True
             
-            response.raise_for_status()
-            logger.info("Response: ", response.content.decode('utf-8'))
-            return response.json()
+            data["results"] = results
+            data.pop("nextPageToken", None)
+            logger.info(f"GAQL search returned {len(results)} rows for customer {customer_id}")
+            return data
             
         except Exception as e:
             logger.error(f"Error executing GAQL query: {e}")
-            # Log the response content for debugging
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_content = e.response.content.decode('utf-8')
-                    logger.error(f"Response content: {error_content}")
-                except:
-                    logger.error(f"Response content: {e.response.content}")
-
+            self._log_error_response(e)
             return {"error": str(e)}
+    
+    def search_stream(self, customer_id: str, access_token: str, query: str, user_id: int = None):
+        """
+        Execute a GAQL query through googleAds:searchStream, yielding result batches
+        
+        The REST response is a JSON array of batches; each batch is decoded and
+        yielded as soon as it has fully arrived, so callers can aggregate rows
+        incrementally without holding the whole result set in memory.
+        Raises on HTTP errors (callers already wrap tool bodies in try/except).
+        
+        Yields:
+            List of result rows for each streamed batch
+        """
+        url = self._customer_url(customer_id, 'searchStream')
+        with self._customer_slot(customer_id):
+            try:
+                response, _ = self._post_with_refresh(url, access_token, {"query": query}, user_id, stream=True)
+            except Exception as e:
+                logger.error(f"Error executing GAQL searchStream query: {e}")
+                self._log_error_response(e)
+                raise
+            
+            with response:
+                for batch in _iter_json_array(response.iter_content(chunk_size=65536)):
+                    yield batch.get("results", [])
+    
+    def _log_error_response(self, e: Exception):
+        """Log the API response content attached to a request exception"""
+        # Log the response content for debugging
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_content = e.response.content.decode('utf-8')
+                logger.error(f"Response content: {error_content}")
+            except Exception:
+                logger.error(f"Response content: {e.response.content}")
+
+
+def _iter_json_array(chunks):
+    """
+    Incrementally decode the elements of a top-level JSON array from UTF-8 byte chunks
+    
+    Bytes go through an incremental decoder, so a multi-byte character split
+    across two chunks is decoded once both halves have arrived (requests'
+    decode_unicode yields raw bytes when the response declares no charset).
+    Decoding is only retried after the buffer has doubled since the last
+    incomplete attempt, keeping parsing linear for multi-megabyte batches.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    retry_at = 0
+    
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += text_decoder.decode(chunk)
+        if len(buffer) < retry_at:
+            continue
+        
+        while True:
+            buffer = buffer.lstrip(" \t\r\n[,")
+            if not buffer or buffer.startswith("]"):
+                retry_at = 0
+                break
+            try:
+                element, end = decoder.raw_decode(buffer)
+            except ValueError:
+                # Element not complete yet - wait for more data
+                retry_at = len(buffer) * 2
+                break
+            retry_at = 0
+            buffer = buffer[end:]
+            yield element
+    
+    buffer += text_decoder.decode(b"", final=True)
+    buffer = buffer.strip(" \t\r\n[,]")
+    while buffer:
+        element, end = decoder.raw_decode(buffer)
+        yield element
+        buffer = buffer[end:].strip(" \t\r\n,]")
 
 # Initialize API client
 google_ads_api = GoogleAdsAPI()
 
+# Hard cap on rows a single tool hands back to the LLM (totals still cover every row)
+MAX_TOOL_ROWS = int(os.getenv('GOOGLE_ADS_TOOL_MAX_ROWS', '500'))
+
+# Metrics summed across every streamed row, keyed by their REST field name
+TOTAL_METRIC_FIELDS = {
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "conversions": "conversions",
+    "costMicros": "cost_micros",
+}
+
+
+def _stream_tool_rows(customer_id: str, access_token: str, query: str, user_id: int, build_row,
+                      max_rows: int = None) -> Dict[str, Any]:
+    """
+    Run a GAQL query via searchStream and shape rows incrementally
+    
+    Only the first max_rows rows are turned into dicts for the LLM; metric
+    totals and the row count are accumulated over every row in the stream.
+    
+    Returns:
+        Dict with rows, total_count, returned_count, truncated and totals
+    """
+    max_rows = MAX_TOOL_ROWS if max_rows is None else max_rows
+    rows = []
+    total_count = 0
+    totals = {name: 0 for name in TOTAL_METRIC_FIELDS.values()}
+    
+    for batch in google_ads_api.search_stream(customer_id, access_token, query, user_id):
+        for row in batch:
+            total_count += 1
+            metrics_data = row.get("metrics", {})
+            for field, name in TOTAL_METRIC_FIELDS.items():
+                value = metrics_data.get(field)
+                if value is not None:
+                    totals[name] += float(value)
+            if len(rows) < max_rows:
+                rows.append(build_row(row))
+    
+    return {
+        "rows": rows,
+        "total_count": total_count,
+        "returned_count": len(rows),
+        "truncated": total_count > len(rows),
+        "totals": totals
+    }
+
 # ============================================================================
 # CAMPAIGN OPERATIONS
 # ============================================================================
@@ -473,19 +764,13 @@ def get_keywords(customer_id: str, access_token: str, ad_group_id: Optional[str]
         
         query += " ORDER BY metrics.impressions DESC"
         
-        result = google_ads_api.search(customer_id, access_token, query, user_id)
-        
-        if "error" in result:
-            return {"success": False, "error": result["error"]}
-        
-        keywords = []
-        for row in result.get("results", []):
+        def build_row(row):
             ad_group_criterion_data = row.get("adGroupCriterion", {})
             keyword_data = ad_group_criterion_data.get("keyword", {})
             quality_info = ad_group_criterion_data.get("qualityInfo", {})
             metrics_data = row.get("metrics", {})
             
-            keywords.append({
+            return {
                 "criterion_id": ad_group_criterion_data.get("criterionId"),
                 "text": keyword_data.get("text"),
                 "match_type": keyword_data.get("matchType"),
@@ -505,12 +790,17 @@ def get_keywords(customer_id: str, access_token: str, ad_group_id: Optional[str]
                 "value_per_conversion": metrics_data.get("valuePerConversion"),
                 "search_absolute_top_impression_share": metrics_data.get("searchAbsoluteTopImpressionShare"),
                 "search_top_impression_share": metrics_data.get("searchTopImpressionShare")
-            })
+            }
+        
+        streamed = _stream_tool_rows(customer_id, access_token, query, user_id, build_row)
         
         return {
             "success": True,
-            "keywords": keywords,
-            "total_count": len(keywords),
+            "keywords": streamed["rows"],
+            "total_count": streamed["total_count"],
+            "returned_count": streamed["returned_count"],
+            "truncated": streamed["truncated"],
+            "totals": streamed["totals"],
             "query": query
         }
         
@@ -782,8 +1072,6 @@ def get_account_overview(customer_id: str, access_token: str, user_id: int = Non
         FROM customer
         """
         
-        customer_result = google_ads_api.search(customer_id, access_token, customer_query, user_id)
-        
         # Get account performance metrics
         metrics_query = """
         SELECT 
@@ -796,12 +1084,15 @@ def get_account_overview(customer_id: str, access_token: str, user_id: int = Non
             metrics.value_per_conversion,
             metrics.cost_per_conversion,
             metrics.search_impression_share,
-            metrics.search_rank_lost_impression_share,
+            metrics.search_rank_lost_impression_share
         FROM customer 
         WHERE segments.date DURING LAST_30_DAYS
         """
         
-        metrics_result = google_ads_api.search(customer_id, access_token, metrics_query, user_id)
+        # The two queries are independent, so run them concurrently
+        customer_result, metrics_result = google_ads_api.search_many(
+            customer_id, access_token, [customer_query, metrics_query], user_id
+        )
         
         if "error" in customer_result:
             return {"success": False, "error": customer_result["error"]}
@@ -906,17 +1197,11 @@ def get_search_terms(customer_id: str, access_token: str, campaign_id: Optional[
         
         query += " ORDER BY metrics.impressions DESC"
         
-        result = google_ads_api.search(customer_id, access_token, query, user_id)
-        
-        if "error" in result:
-            return {"success": False, "error": result["error"]}
-        
-        search_terms = []
-        for row in result.get("results", []):
+        def build_row(row):
             search_term_view_data = row.get("searchTermView", {})
             metrics_data = row.get("metrics", {})
             
-            search_terms.append({
+            return {
                 "search_term": search_term_view_data.get("searchTerm"),
                 "status": search_term_view_data.get("status"),
                 "ad_group": search_term_view_data.get("adGroup"),
@@ -929,12 +1214,17 @@ def get_search_terms(customer_id: str, access_token: str, campaign_id: Optional[
                 "average_cpc": metrics_data.get("averageCpc"),
                 "value_per_conversion": metrics_data.get("valuePerConversion"),
                 "cost_per_conversion": metrics_data.get("costPerConversion")
-            })
+            }
+        
+        streamed = _stream_tool_rows(customer_id, access_token, query, user_id, build_row)
         
         return {
             "success": True,
-            "search_terms": search_terms,
-            "total_count": len(search_terms),
+            "search_terms": streamed["rows"],
+            "total_count": streamed["total_count"],
+            "returned_count": streamed["returned_count"],
+            "truncated": streamed["truncated"],
+            "totals": streamed["totals"],
             "query": query
         }
         
@@ -1058,18 +1348,12 @@ def get_geographic_data(customer_id: str, access_token: str, campaign_id: Option
         
         query += " ORDER BY metrics.impressions DESC"
         
-        result = google_ads_api.search(customer_id, access_token, query, user_id)
-        
-        if "error" in result:
-            return {"success": False, "error": result["error"]}
-        
-        geographic_data = []
-        for row in result.get("results", []):
+        def build_row(row):
             segments_data = row.get("segments", {})
             campaign_data = row.get("campaign", {})
             metrics_data = row.get("metrics", {})
             
-            geographic_data.append({
+            return {
                 "campaign_id": campaign_data.get("id"),
                 "campaign_name": campaign_data.get("name"),
                 "date": segments_data.get("date"),
@@ -1081,12 +1365,17 @@ def get_geographic_data(customer_id: str, access_token: str, campaign_id: Option
                 "average_cpc": metrics_data.get("averageCpc"),
                 "value_per_conversion": metrics_data.get("valuePerConversion"),
                 "cost_per_conversion": metrics_data.get("costPerConversion")
-            })
+            }
+        
+        streamed = _stream_tool_rows(customer_id, access_token, query, user_id, build_row)
         
         return {
             "success": True,
-            "geographic_data": geographic_data,
-            "total_count": len(geographic_data),
+            "geographic_data": streamed["rows"],
+            "total_count": streamed["total_count"],
+            "returned_count": streamed["returned_count"],
+            "truncated": streamed["truncated"],
+            "totals": streamed["totals"],
             "query": query
         }
         
@@ -1098,10 +1387,9 @@ def get_geographic_data(customer_id: str, access_token: str, campaign_id: Option
 # IMAGE GENERATION OPERATIONS
 # ============================================================================
 
-@tool
-def generate_image(query: str, previous_image_url: str = None, user_id: int = None) -> Dict[str, Any]:
+def run_image_generation(query: str, previous_image_url: str = None, user_id: int = None) -> Dict[str, Any]:
     """
-    Generate images using OpenAI's image generation API.
+    Generate an image with OpenAI's image generation API (blocking; runs in the Celery worker)
     
     Args:
         query: Description of the image to generate
@@ -1113,9 +1401,8 @@ def generate_image(query: str, previous_image_url: str = None, user_id: int = No
     """
     try:
         from openai import OpenAI
-        import base64
-        import os
         from datetime import datetime
+        from .asset_store import asset_store
         
         # Initialize OpenAI client
         client = OpenAI()
@@ -1155,30 +1442,15 @@ def generate_image(query: str, previous_image_url: str = None, user_id: int = No
                     # Get the direct DALL-E image URL (this is the ChatGPT image URL)
                     dalle_image_url = response.data[0].url
                     
-                    # Also save a local copy for backup
-                    import requests
-                    img_response = requests.get(dalle_image_url)
-                    image_base64 = base64.b64encode(img_response.content).decode('utf-8')
-                    
-                    # Generate unique filename for local backup
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"generated_image_{timestamp}.png"
-                    
-                    # Create images directory if it doesn't exist
-                    images_dir = "generated_images"
-                    os.makedirs(images_dir, exist_ok=True)
-                    
-                    # Save image to file as backup
-                    image_path = os.path.join(images_dir, filename)
-                    with open(image_path, "wb") as f:
-                        f.write(base64.b64decode(image_base64))
+                    # Also keep a copy (DALL-E URLs expire), streamed to the asset store
+                    asset = asset_store.put_url(dalle_image_url, "png")
                     
                     return {
                         "success": True,
                         "image_url": dalle_image_url,  # Return the direct DALL-E URL
-                        "local_backup_url": f"/static/{images_dir}/{filename}",  # Local backup URL
-                        "image_path": image_path,
-                        "filename": filename,
+                        "local_backup_url": asset["url"],  # Stored copy
+                        "asset_key": asset["key"],
+                        "filename": asset["key"],
                         "query": query,
                         "previous_image_url": previous_image_url,
                         "generated_at": datetime.now().isoformat(),
@@ -1206,31 +1478,14 @@ def generate_image(query: str, previous_image_url: str = None, user_id: int = No
                 "error": "No image data received from OpenAI API"
             }
         
-        # Get the base64 image data
-        image_base64 = image_data[0]
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"generated_image_{timestamp}.png"
-        
-        # Create images directory if it doesn't exist
-        images_dir = "generated_images"
-        os.makedirs(images_dir, exist_ok=True)
-        
-        # Save image to file
-        image_path = os.path.join(images_dir, filename)
-        with open(image_path, "wb") as f:
-            f.write(base64.b64decode(image_base64))
-        
-        # For GPT-5, we'll use the local URL since it returns base64 data
-        # But we'll also provide a way to get the direct URL if available
-        image_url = f"/static/{images_dir}/{filename}"
+        # GPT-5 returns base64 data, so the stored copy is the only URL
+        asset = asset_store.put_base64(image_data[0], "png")
         
         return {
             "success": True,
-            "image_url": image_url,
-            "image_path": image_path,
-            "filename": filename,
+            "image_url": asset["url"],
+            "asset_key": asset["key"],
+            "filename": asset["key"],
             "query": query,
             "previous_image_url": previous_image_url,
             "generated_at": datetime.now().isoformat(),
@@ -1249,6 +1504,59 @@ def generate_image(query: str, previous_image_url: str = None, user_id: int = No
             "error": str(e)
         }
 
+@tool
+def generate_image(query: str, previous_image_url: str = None, user_id: int = None) -> Dict[str, Any]:
+    """
+    Generate images using OpenAI's image generation API.
+    
+    Generation runs as a background job; this returns a job_id straight away and the
+    image URL arrives through the job status endpoint (and the chat stream).
+    
+    Args:
+        query: Description of the image to generate
+        previous_image_url: Optional URL of previous image for improvements/edits
+        user_id: User ID for tracking
+    
+    Returns:
+        Job id, status and polling URL for the image generation
+    """
+    from .image_jobs import ImageJobLimitExceeded, ImageJobQueueUnavailable, submit_image_job
+
+    try:
+        job = submit_image_job(query, previous_image_url, user_id)
+    except ImageJobLimitExceeded as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    except ImageJobQueueUnavailable as e:
+        # Broker unavailable: generate inline rather than failing the request
+        logger.warning(f"Could not queue image generation, generating inline: {e}")
+        return run_image_generation(query, previous_image_url, user_id)
+    except Exception as e:
+        # Job bookkeeping (cache lock, slot accounting) failed; generating inline would
+        # bypass the per-user limit, so report the service as temporarily unavailable
+        logger.error(f"Could not submit image job: {e}")
+        return {
+            "success": False,
+            "status_code": 503,
+            "retry_after": 30,
+            "error": "Image generation is temporarily unavailable, please try again shortly"
+        }
+
+    if job["status"] == "succeeded":
+        return {**job["result"], "job_id": job["job_id"], "status": job["status"]}
+
+    return {
+        "success": True,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "deduplicated": job["deduplicated"],
+        "poll_url": f"/ad-expert/api/image-jobs/{job['job_id']}/",
+        "query": query,
+        "message": "Image generation has started; the image will appear here when it is ready."
+    }
+
 @tool
 def improve_image(improvement_query: str, original_image_url: str, user_id: int = None) -> Dict[str, Any]:
     """
@@ -1278,97 +1586,51 @@ def improve_image(improvement_query: str, original_image_url: str, user_id: int
         }
 
 @tool
-def create_data_visualization(data: str, visualization_type: str, title: str = None, user_id: int = None) -> Dict[str, Any]:
+def create_data_visualization(data: str, visualization_type: str, title: str = None, user_id: int = None,
+                              output_format: str = "png") -> Dict[str, Any]:
     """
-    Create data visualizations (pie charts, bar graphs, tables) using ChatGPT's visualization capabilities.
+    Create data visualizations (pie charts, bar graphs, line charts, tables) rendered locally from the exact data.
     
     Args:
-        data: The data to visualize (JSON string, CSV, or structured text)
+        data: The data to visualize (JSON string, CSV, or "label: value" lines)
         visualization_type: Type of visualization ('pie_chart', 'bar_graph', 'table', 'line_chart')
         title: Optional title for the visualization
         user_id: User ID for tracking
+        output_format: 'png', 'svg', or 'plotly' (interactive Plotly JSON spec)
     
     Returns:
         Visualization data with image URL and metadata
     """
     try:
-        from openai import OpenAI
-        import json
         from datetime import datetime
-        
-        # Initialize OpenAI client
-        client = OpenAI()
-        
-        # Create visualization prompt based on type
-        if visualization_type == "pie_chart":
-            prompt = f"Create a professional pie chart visualization for the following data. Make it colorful and easy to read. Title: {title or 'Data Distribution'}\n\nData: {data}"
-        elif visualization_type == "bar_graph":
-            prompt = f"Create a professional bar graph visualization for the following data. Use different colors for each bar. Title: {title or 'Data Comparison'}\n\nData: {data}"
-        elif visualization_type == "line_chart":
-            prompt = f"Create a professional line chart visualization for the following data. Show trends clearly. Title: {title or 'Data Trends'}\n\nData: {data}"
-        elif visualization_type == "table":
-            prompt = f"Create a well-formatted table visualization for the following data. Make it clean and professional. Title: {title or 'Data Table'}\n\nData: {data}"
-        else:
-            prompt = f"Create a professional {visualization_type} visualization for the following data. Title: {title or 'Data Visualization'}\n\nData: {data}"
+        from .chart_renderer import ChartDataError, chart_renderer
         
         logger.info(f"Creating {visualization_type} visualization with title: {title}")
         
-        # Generate visualization using DALL-E 3
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            size="1024x1024",
-            quality="standard",
-            n=1,
-        )
-        
-        if response.data and len(response.data) > 0:
-            # Get the direct DALL-E image URL
-            visualization_url = response.data[0].url
-            
-            # Also save a local copy for backup
-            import requests
-            img_response = requests.get(visualization_url)
-            import base64
-            image_base64 = base64.b64encode(img_response.content).decode('utf-8')
-            
-            # Generate unique filename for local backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"visualization_{visualization_type}_{timestamp}.png"
-            
-            # Create visualizations directory if it doesn't exist
-            viz_dir = "generated_visualizations"
-            os.makedirs(viz_dir, exist_ok=True)
-            
-            # Save image to file as backup
-            image_path = os.path.join(viz_dir, filename)
-            with open(image_path, "wb") as f:
-                f.write(base64.b64decode(image_base64))
-            
-            return {
-                "success": True,
-                "visualization_url": visualization_url,
-                "local_backup_url": f"/static/{viz_dir}/{filename}",
-                "image_path": image_path,
-                "filename": filename,
-                "visualization_type": visualization_type,
-                "title": title,
-                "data": data,
-                "generated_at": datetime.now().isoformat(),
-                "user_id": user_id,
-                "model_used": "dall-e-3"
-            }
-        else:
+        try:
+            render = chart_renderer.render(data, visualization_type, title, output_format)
+        except ChartDataError as e:
             return {
                 "success": False,
-                "error": "No visualization data received from DALL-E 3 API"
+                "error": str(e)
             }
         
-    except ImportError:
         return {
-            "success": False,
-            "error": "OpenAI library not installed. Please install with: pip install openai"
+            "success": True,
+            "visualization_url": render["url"],
+            "local_backup_url": render["url"],
+            "asset_key": render["key"],
+            "filename": render["key"],
+            "visualization_type": visualization_type,
+            "output_format": render["format"],
+            "content_type": render["content_type"],
+            "cached": render["cached"],
+            "title": title,
+            "generated_at": datetime.now().isoformat(),
+            "user_id": user_id,
+            "model_used": "plotly" if output_format == "plotly" else "matplotlib"
         }
+        
     except Exception as e:
         logger.error(f"Error creating visualization: {e}")
         return {
@@ -1377,68 +1639,49 @@ def create_data_visualization(data: str, visualization_type: str, title: str = N
         }
 
 @tool
-def format_tabular_data(data: str, format_type: str = "markdown", title: str = None, user_id: int = None) -> Dict[str, Any]:
+def format_tabular_data(data: str, format_type: str = "markdown", title: str = None, user_id: int = None,
+                        sort_by: str = None, max_rows: int = None) -> Dict[str, Any]:
     """
-    Format data into well-structured tables using ChatGPT's formatting capabilities.
+    Format data into well-structured tables (costs in micros shown as currency, rates as percentages).
     
     Args:
         data: The data to format (JSON string, CSV, or structured text)
         format_type: Output format ('markdown', 'html', 'json', 'csv')
         title: Optional title for the table
         user_id: User ID for tracking
+        sort_by: Optional column to sort by; prefix with '-' for descending (e.g. '-cost_micros')
+        max_rows: Optional number of rows to show before a "N more rows" footer
     
     Returns:
         Formatted table data
     """
     try:
-        from openai import OpenAI
-        import json
         from datetime import datetime
-        
-        # Initialize OpenAI client
-        client = OpenAI()
-        
-        # Create formatting prompt
-        prompt = f"""Format the following data into a well-structured {format_type} table. 
-        Make it clean, professional, and easy to read. 
-        Title: {title or 'Data Table'}
-        
-        Data to format:
-        {data}
-        
-        Please provide only the formatted table, no additional text."""
+        from .chart_renderer import ChartDataError
+        from .table_formatter import table_formatter
         
         logger.info(f"Formatting data as {format_type} table with title: {title}")
         
-        # Use ChatGPT to format the data
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a data formatting expert. Format data into clean, professional tables."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.1
-        )
-        
-        formatted_table = response.choices[0].message.content.strip()
+        try:
+            table = table_formatter.format(data, format_type, title, sort_by=sort_by, max_rows=max_rows)
+        except ChartDataError as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
         
         return {
             "success": True,
-            "formatted_table": formatted_table,
+            "formatted_table": table["formatted_table"],
             "format_type": format_type,
             "title": title,
-            "original_data": data,
+            "row_count": table["row_count"],
+            "truncated_rows": table["truncated_rows"],
             "generated_at": datetime.now().isoformat(),
             "user_id": user_id,
-            "model_used": "gpt-4o"
+            "model_used": "local"
         }
         
-    except ImportError:
-        return {
-            "success": False,
-            "error": "OpenAI library not installed. Please install with: pip install openai"
-        }
     except Exception as e:
         logger.error(f"Error formatting tabular data: {e}")
         return {
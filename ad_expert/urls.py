@@ -9,6 +9,9 @@ urlpatterns = [
     path('api/conversations/', views.get_conversations, name='conversations'),
     path('api/conversations/<int:conversation_id>/', views.get_conversation_messages, name='conversation_messages'),
     path('api/conversations/<int:conversation_id>/delete/', views.delete_conversation, name='delete_conversation'),
+    path('api/conversations/<int:conversation_id>/tool-results/<str:tool_call_id>/', views.get_tool_result, name='tool_result'),
+    path('api/image-jobs/<str:job_id>/', views.get_image_job_status, name='image_job_status'),
+    path('assets/<str:key>', views.serve_asset, name='generated_asset'),
     
     # RAG Chat endpoint with Intent Mapping
     path('api/rag/chat/', views.LanggraphView.as_view(), name='rag_chat'),
@@ -19,6 +22,9 @@ urlpatterns = [
     # LangGraph Chat endpoint with advanced state management
     path('api/langgraph/chat/', views.LanggraphView.as_view(), name='langgraph_chat'),
     
+    # Async LangGraph Chat endpoint (serve with an ASGI server such as uvicorn)
+    path('api/langgraph/chat/async/', views.LanggraphAsyncView.as_view(), name='langgraph_chat_async'),
+    
     # Conversation History endpoints
     path('api/conversations/history/', views.ConversationHistoryView.as_view(), name='conversation_history'),
     path('api/conversations/history/<int:conversation_id>/', views.ConversationHistoryView.as_view(), name='conversation_detail'),
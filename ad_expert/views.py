@@ -1,29 +1,44 @@
 """
 ChatBotView for Ad Expert - Privacy-first chat system with in-memory analytics
 """
+import asyncio
+import contextvars
+import functools
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from typing import Dict, Any, List, Optional
 
-from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.db import transaction
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
+from asgiref.sync import sync_to_async
 from langgraph.graph.state import StateGraph
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework.renderers import BaseRenderer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from .models import Conversation, ChatMessage
+from .message_pagination import (
+    encode_cursor, page_messages, paginate_messages, serialize_message, without_structured_data
+)
 # from .llm_orchestrator import LLMOrchestrator
 # from .redis_service import RedisService
 # from .message_builder import CustomerSelectionMessageBuilder, IntentMappingMessageBuilder, MessageBuilder  # Not used in LanggraphView
@@ -169,7 +184,7 @@ def get_conversations(request):
                 'title': conv.title,
                 'created_at': conv.created_at.isoformat(),
                 'updated_at': conv.updated_at.isoformat(),
-                'message_count': conv.messages.count()
+                'message_count': conv.message_count
             })
         
         return Response(data)
@@ -184,7 +199,14 @@ def get_conversations(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_conversation_messages(request, conversation_id):
-    """Get messages for a specific conversation"""
+    """
+    Get messages for a specific conversation, oldest first
+    
+    Query Parameters:
+    - limit: Page size; without it every message is returned
+    - cursor: X-Next-Cursor header of the previous page
+    - include_structured_data: 'false' omits structured_data bodies (default: true)
+    """
     try:
         conversation = Conversation.objects.get(
             id=conversation_id,
@@ -192,25 +214,33 @@ def get_conversation_messages(request, conversation_id):
             deleted_at__isnull=True
         )
         
-        messages = conversation.messages.order_by('created_at')
-        data = []
+        include_structured_data = request.GET.get('include_structured_data', 'true').lower() != 'false'
+        limit = request.GET.get('limit')
+        if limit is None:
+            messages = conversation.messages.order_by('created_at', 'id')
+            if not include_structured_data:
+                messages = without_structured_data(messages)
+            next_cursor = None
+        else:
+            messages, next_cursor = paginate_messages(
+                conversation.messages.all(), request.GET.get('cursor') or None,
+                max(min(int(limit), 100), 1), 'asc', include_structured_data
+            )
         
-        for msg in messages:
-            data.append({
-                'id': msg.id,
-                'role': msg.role,
-                'content': msg.content,
-                'response_type': msg.response_type,
-                'structured_data': msg.structured_data,
-                'created_at': msg.created_at.isoformat()
-            })
-        
-        return Response(data)
+        response = Response([serialize_message(msg, include_structured_data) for msg in messages])
+        if next_cursor:
+            response['X-Next-Cursor'] = next_cursor
+        return response
         
     except Conversation.DoesNotExist:
         return Response({
             'error': 'Conversation not found'
         }, status=404)
+    except ValueError as e:
+        return Response({
+            'error': 'Invalid pagination parameters',
+            'details': str(e)
+        }, status=400)
     except Exception as e:
         logger.error(f"Get messages error: {str(e)}")
         return Response({
@@ -218,10 +248,81 @@ def get_conversation_messages(request, conversation_id):
         }, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_tool_result(request, conversation_id, tool_call_id):
+    """Get the full payload of a tool call (the LLM only sees a compact projection)"""
+    try:
+        Conversation.objects.get(
+            id=conversation_id,
+            user=request.user,
+            deleted_at__isnull=True
+        )
+        
+        payload = tool_result_shaper.fetch(conversation_id, tool_call_id)
+        if payload is None:
+            return Response({
+                'error': 'Tool result not found or expired'
+            }, status=404)
+        
+        return Response(payload)
+        
+    except Conversation.DoesNotExist:
+        return Response({
+            'error': 'Conversation not found'
+        }, status=404)
+    except Exception as e:
+        logger.error(f"Get tool result error: {str(e)}")
+        return Response({
+            'error': 'Failed to fetch tool result'
+        }, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_image_job_status(request, job_id):
+    """Get the status (and, once finished, the result) of an image generation job"""
+    try:
+        job = get_image_job(job_id)
+        if job is None or job.get('user_id') != request.user.id:
+            return Response({
+                'error': 'Image job not found or expired'
+            }, status=404)
+        
+        return Response(public_job(job))
+        
+    except Exception as e:
+        logger.error(f"Get image job error: {str(e)}")
+        return Response({
+            'error': 'Failed to fetch image job'
+        }, status=500)
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_asset(request, key):
+    """Serve a generated asset; keys are content hashes, so responses never change"""
+    if not asset_store.is_valid_key(key):
+        raise Http404("Asset not found")
+    
+    etag = f'"{key.partition(".")[0]}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified()
+    
+    try:
+        content = asset_store.open(key)
+    except Exception:
+        raise Http404("Asset not found")
+    
+    response = FileResponse(content, content_type=asset_store.content_type(key))
+    response['Cache-Control'] = f"public, max-age={getattr(settings, 'ASSET_STORE_CACHE_SECONDS', 31536000)}, immutable"
+    response['ETag'] = etag
+    return response
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_conversation(request, conversation_id):
-    """Soft delete a conversation"""
+    """Delete a conversation, its messages and its LangGraph thread"""
     try:
         conversation = Conversation.objects.get(
             id=conversation_id,
@@ -229,10 +330,9 @@ def delete_conversation(request, conversation_id):
             deleted_at__isnull=True
         )
         
-        conversation.deleted_at = datetime.now()
-        conversation.save()
-        
-        conversation.messages.all().delete()
+        delete_conversation_thread(conversation.id)
+        # Messages go with the conversation by cascade; the message-count
+        # receiver skips cascaded deletes
         conversation.delete()
         
         return Response({
@@ -1818,22 +1918,26 @@ class ConversationHistoryView(APIView):
                         'error': 'Conversation not found'
                     }, status=404)
             else:
-                # Get all conversations for the user
+                # Get all conversations for the user, with their messages in one extra query
                 conversations = Conversation.objects.filter(
                     user=request.user
-                ).order_by('-updated_at')[:50]  # Limit to last 50 conversations
+                ).order_by('-updated_at').prefetch_related(
+                    Prefetch('messages', queryset=ChatMessage.objects.order_by('created_at'), to_attr='ordered_messages')
+                )[:50]  # Limit to last 50 conversations
             
             # Serialize conversations
             conversation_data = []
             for conv in conversations:
-                messages = conv.messages.order_by('created_at')
+                messages = getattr(conv, 'ordered_messages', None)
+                if messages is None:
+                    messages = conv.messages.order_by('created_at')
                 conversation_data.append({
                     'id': conv.id,
                     'title': conv.title,
                     'customer_id': conv.customer_id,
                     'created_at': conv.created_at.isoformat(),
                     'updated_at': conv.updated_at.isoformat(),
-                    'message_count': messages.count(),
+                    'message_count': conv.message_count,
                     'messages': [
                         {
                             'id': msg.id,
@@ -1907,7 +2011,7 @@ except ImportError:
     POSTGRES_SAVER_AVAILABLE = False
     logger.warning("PostgresSaver not available. Long-term memory will use Redis and database only.")
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 class State(TypedDict):
     messages : Annotated[list, add_messages]
@@ -1915,9 +2019,33 @@ class State(TypedDict):
 
 # Import all Google Ads tools
 from .tools import ALL_TOOLS, TOOL_MAPPING
+from .langgraph_runtime import LangGraphRuntime, get_runtime as get_langgraph_runtime
+from .checkpointing import (
+    delete_conversation_thread, get_async_checkpointer, get_checkpointer, thread_id_for_conversation
+)
+from .context_window import chat_message_id, context_manager
+from .tool_results import tool_result_shaper
+from .image_jobs import TERMINAL_STATUSES, get_image_job, public_job
+from .asset_store import asset_store
+
+# Tools whose results are image generation jobs
+IMAGE_JOB_TOOLS = ('generate_image', 'improve_image')
 
 tools = ALL_TOOLS
 
+# Upper bound on ChatMessage rows read when (re)seeding a conversation's history
+HISTORY_MAX_MESSAGES = int(os.getenv('LANGGRAPH_HISTORY_MAX_MESSAGES', '100'))
+# Upper bound on tool calls from a single LLM turn executed at the same time
+MAX_PARALLEL_TOOL_CALLS = int(os.getenv('LANGGRAPH_MAX_PARALLEL_TOOL_CALLS', '8'))
+# The tools are blocking (requests, OpenAI SDK). Under LanggraphAsyncView they run on
+# this pool rather than the event loop's default executor, so at most
+# LANGGRAPH_ASYNC_TOOL_WORKERS tool calls per process block a thread at once (across
+# all requests); further calls queue here instead of starving sync_to_async and the
+# other run_in_executor users. Size it for the number of concurrent chats times
+# MAX_PARALLEL_TOOL_CALLS that should make progress together.
+ASYNC_TOOL_WORKERS = int(os.getenv('LANGGRAPH_ASYNC_TOOL_WORKERS', '32'))
+_async_tool_executor = ThreadPoolExecutor(max_workers=ASYNC_TOOL_WORKERS, thread_name_prefix="langgraph-tool")
+
 # Try to import IPython display functions, but make them optional
 try:
     from IPython.display import Image, display
@@ -1991,29 +2119,91 @@ class LangGraphState(TypedDict):
     current_step: str
     error_count: int
     max_retries: int
+    context_summary: str
+    context_start_id: Optional[str]
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients negotiate text/event-stream; non-streamed payloads are sent as a single event"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"data: {json.dumps(data, default=str)}\n\n".encode(self.charset)
 
 
 class LanggraphView(APIView):
     """
     Advanced LangGraph view with continuous feedback loops, 
     short-term memory (checkpoints), and long-term memory (PostgresStore)
+    
+    Send "stream": true (or Accept: text/event-stream) to receive node, tool
+    and token events as server-sent events instead of a single JSON response.
     """
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer]
+    
+    RUNTIME_NAME = "langgraph_chat"
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.llm = init_chat_model("gpt-4o")
-        self.llm_with_tools = self.llm.bind_tools(ALL_TOOLS)
+        # DRF builds a view instance per request; the LLM clients, store and
+        # compiled graph are shared process-wide via the runtime registry
+        runtime = self.get_runtime()
+        self.llm = runtime.llm
+        self.llm_with_tools = runtime.llm_with_tools
+        self.checkpointer = runtime.checkpointer
+        self.postgres_store = runtime.postgres_store
+        self.workflow = runtime.workflow
+        self.graph = runtime.graph
+    
+    @classmethod
+    def get_runtime(cls) -> LangGraphRuntime:
+        """Get the shared LangGraph runtime, building it once per worker"""
+        return get_langgraph_runtime(cls.RUNTIME_NAME, cls._build_runtime)
+    
+    @classmethod
+    def _build_runtime(cls) -> LangGraphRuntime:
+        """Build the LLM clients, long-term store and compiled graph shared by all requests"""
+        # Graph nodes close over this owner instance rather than a per-request
+        # view, so the shared graph never holds on to request state
+        owner = cls.__new__(cls)
+        owner.llm = init_chat_model("gpt-4o")
+        owner.llm_with_tools = owner.llm.bind_tools(ALL_TOOLS)
         
-        # Initialize checkpointer for short-term memory
-        self.checkpointer = MemorySaver()
+        # Pooled Postgres checkpointer shared by every request in the worker;
+        # None when unavailable, in which case state is rebuilt from ChatMessage rows
+        owner.checkpointer = get_checkpointer()
         
         # Initialize PostgresStore for long-term memory
-        self._init_postgres_store()
+        owner._init_postgres_store()
         
         # Build the state graph
-        self._build_graph()
+        owner._build_graph()
+        
+        return LangGraphRuntime(
+            llm=owner.llm,
+            llm_with_tools=owner.llm_with_tools,
+            checkpointer=owner.checkpointer,
+            postgres_store=owner.postgres_store,
+            workflow=owner.workflow,
+            graph=owner.graph
+        )
+    
+    async def aget_graph(self):
+        """Graph compiled against the async checkpointer, for ainvoke/astream"""
+        runtime = self.get_runtime()
+        if runtime.async_graph is None:
+            async_checkpointer = await get_async_checkpointer()
+            if async_checkpointer is None:
+                return self.graph
+            if self.postgres_store:
+                runtime.async_graph = self.workflow.compile(checkpointer=async_checkpointer, store=self.postgres_store)
+            else:
+                runtime.async_graph = self.workflow.compile(checkpointer=async_checkpointer)
+        return runtime.async_graph
     
     def _init_postgres_store(self):
         """Initialize PostgresStore for long-term memory"""
@@ -2044,41 +2234,84 @@ class LanggraphView(APIView):
     def _build_graph(self):
         """Build the LangGraph state graph with nodes and edges"""
         # Define nodes
+        def prepare_chat_messages(state: LangGraphState) -> List[Any]:
+            """Prepend the context-aware system prompt to the conversation"""
+            # Add system message with context at the beginning
+            system_message = SystemMessage(content=self._build_system_prompt(state))
+            
+            # Combine system message with the budgeted window of the conversation
+            # Don't duplicate system messages if they already exist
+            messages = context_manager.window(state["messages"], state.get("context_start_id"))
+            messages = list(messages)  # Make a copy to avoid modifying the original
+            if not messages or not isinstance(messages[0], SystemMessage):
+                messages = [system_message] + messages
+            else:
+                # Update existing system message with current context
+                messages[0] = system_message
+            
+            # Earlier turns outside the window reach the model as a rolling summary
+            summary_message = context_manager.summary_message(state.get("context_summary"))
+            if summary_message:
+                messages.insert(1, summary_message)
+            
+            # Log conversation context for debugging
+            logger.info(f"Chat node processing {len(messages)} messages")
+            logger.info(f"Current customer_id: {state.get('customer_id')}")
+            logger.info(f"User query context preserved: {any('analyze' in str(msg.content).lower() or 'campaign' in str(msg.content).lower() for msg in messages if hasattr(msg, 'content'))}")
+            return messages
+        
+        def chat_node_error(state: LangGraphState, e: Exception) -> LangGraphState:
+            logger.error(f"Error in chat_node: {e}")
+            error_message = AIMessage(content=f"I encountered an error: {str(e)}")
+            return {
+                "messages": [error_message],
+                "current_step": "error",
+                "error_count": state.get("error_count", 0) + 1
+            }
+        
         def chat_node(state: LangGraphState) -> LangGraphState:
             """Main chat node that processes user messages with LLM"""
             try:
-                # Add system message with context at the beginning
-                system_message = SystemMessage(content=self._build_system_prompt(state))
-                
-                # Combine system message with conversation history
-                # Don't duplicate system messages if they already exist
-                messages = state["messages"].copy()  # Make a copy to avoid modifying the original
-                if not messages or not isinstance(messages[0], SystemMessage):
-                    messages = [system_message] + messages
-                else:
-                    # Update existing system message with current context
-                    messages[0] = system_message
-                
-                # Log conversation context for debugging
-                logger.info(f"Chat node processing {len(messages)} messages")
-                logger.info(f"Current customer_id: {state.get('customer_id')}")
-                logger.info(f"User query context preserved: {any('analyze' in str(msg.content).lower() or 'campaign' in str(msg.content).lower() for msg in messages if hasattr(msg, 'content'))}")
-                
                 # Get LLM response
-                response = self.llm_with_tools.invoke(messages)
+                response = self.llm_with_tools.invoke(prepare_chat_messages(state))
                 
                 return {
                     "messages": [response],  # This will be appended to existing messages by add_messages
                     "current_step": "chat_completed"
                 }
             except Exception as e:
-                logger.error(f"Error in chat_node: {e}")
-                error_message = AIMessage(content=f"I encountered an error: {str(e)}")
+                return chat_node_error(state, e)
+        
+        async def achat_node(state: LangGraphState) -> LangGraphState:
+            """Async chat node used by graph.ainvoke/astream"""
+            try:
+                response = await self.llm_with_tools.ainvoke(prepare_chat_messages(state))
+                
                 return {
-                    "messages": [error_message],
-                    "current_step": "error",
-                    "error_count": state.get("error_count", 0) + 1
+                    "messages": [response],
+                    "current_step": "chat_completed"
                 }
+            except Exception as e:
+                return chat_node_error(state, e)
+        
+        def shape_tool_messages(state: LangGraphState, messages: List[Any]) -> List[Any]:
+            """Compact tool payloads before they reach the LLM; full payloads go to the side store"""
+            for message in messages:
+                message.content = tool_result_shaper.shape_content(
+                    message.content,
+                    conversation_id=state.get("conversation_id"),
+                    tool_call_id=getattr(message, 'tool_call_id', None)
+                )
+            return messages
+        
+        def tool_node_error(state: LangGraphState, e: Exception) -> LangGraphState:
+            logger.error(f"Error in tool_node: {e}")
+            error_message = AIMessage(content=f"Tool execution error: {str(e)}")
+            return {
+                "messages": [error_message],
+                "current_step": "error",
+                "error_count": state.get("error_count", 0) + 1
+            }
         
         def tool_node(state: LangGraphState) -> LangGraphState:
             """Tool execution node with user_id injection for token refresh"""
@@ -2093,10 +2326,14 @@ class LanggraphView(APIView):
                     # Create tools with user_id injection
                     enhanced_tools = self._create_enhanced_tools_with_user_id(user_id)
                     tool_node_instance = ToolNode(enhanced_tools)
-                    tool_response = tool_node_instance.invoke({"messages": [last_message]})
+                    # Tool calls from one LLM turn run concurrently on a bounded pool
+                    tool_response = tool_node_instance.invoke(
+                        {"messages": [last_message]},
+                        config={"max_concurrency": MAX_PARALLEL_TOOL_CALLS}
+                    )
                     
                     return {
-                            "messages": tool_response["messages"],
+                            "messages": shape_tool_messages(state, tool_response["messages"]),
                             "current_step": "tools_completed"
                         }
                 else:
@@ -2105,19 +2342,41 @@ class LanggraphView(APIView):
                         "current_step": "no_tools"
                     }
             except Exception as e:
-                logger.error(f"Error in tool_node: {e}")
-                error_message = AIMessage(content=f"Tool execution error: {str(e)}")
+                return tool_node_error(state, e)
+        
+        async def atool_node(state: LangGraphState) -> LangGraphState:
+            """Async tool node; the blocking tool bodies run on _async_tool_executor so the event loop stays free"""
+            try:
+                last_message = state["messages"][-1]
+                
+                if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
+                    enhanced_tools = self._create_enhanced_tools_with_user_id(state.get("user_id"))
+                    tool_response = await ToolNode(enhanced_tools).ainvoke(
+                        {"messages": [last_message]},
+                        config={"max_concurrency": MAX_PARALLEL_TOOL_CALLS}
+                    )
+                    
+                    return {
+                        "messages": shape_tool_messages(state, tool_response["messages"]),
+                        "current_step": "tools_completed"
+                    }
                 return {
-                    "messages": [error_message],
-                    "current_step": "error",
-                    "error_count": state.get("error_count", 0) + 1
+                    "current_step": "no_tools"
                 }
+            except Exception as e:
+                return tool_node_error(state, e)
         
         def context_node(state: LangGraphState) -> LangGraphState:
             """Node to enrich context with user-specific data and ensure accessible customers are in long-term memory"""
             try:
+                # Customer selection and cached accessible customers in one Redis round trip
+                conversation_id = state.get("conversation_id")
+                request_state = self._get_request_state(state["user_id"], conversation_id)
+                selection = request_state.get("customer_selection") or {}
+                customer_id = state.get("customer_id") or selection.get("customer_id")
+                
                 # Get user context from long-term memory (this may already include accessible customers)
-                user_context = self._get_user_context(state["user_id"])
+                user_context = self._get_user_context(state["user_id"], request_state)
                 
                 # Check if we already have accessible customers in long-term memory
                 accessible_customers = user_context.get("accessible_customers", [])
@@ -2131,7 +2390,9 @@ class LanggraphView(APIView):
                     if accessible_customers:
                         success = self._save_accessible_customers_to_long_term_memory(
                             state["user_id"], 
-                            accessible_customers
+                            accessible_customers,
+                            conversation_id=conversation_id,
+                            customer_id=customer_id
                         )
                         if success:
                             logger.info(f"Successfully saved {len(accessible_customers)} accessible customers to long-term memory for user {state['user_id']}")
@@ -2142,11 +2403,12 @@ class LanggraphView(APIView):
                 else:
                     logger.info(f"Retrieved {len(accessible_customers)} accessible customers from long-term memory for user {state['user_id']}")
                 
-                    return {
-                        "user_context": user_context,
-                        "accessible_customers": accessible_customers,
-                        "current_step": "context_enriched"
-                    }
+                return {
+                    "user_context": user_context,
+                    "accessible_customers": accessible_customers,
+                    "customer_id": customer_id,
+                    "current_step": "context_enriched"
+                }
             except Exception as e:
                 logger.error(f"Error in context_node: {e}")
             return {
@@ -2331,8 +2593,9 @@ Include specific metrics, percentages, and data points in text format.
         
         # Add nodes
         self.workflow.add_node("context", context_node)
-        self.workflow.add_node("chat", chat_node)
-        self.workflow.add_node("tools", tool_node)
+        # Chat and tool nodes carry async variants so graph.ainvoke never blocks the event loop
+        self.workflow.add_node("chat", RunnableLambda(chat_node, afunc=achat_node, name="chat"))
+        self.workflow.add_node("tools", RunnableLambda(tool_node, afunc=atool_node, name="tools"))
         self.workflow.add_node("data_analysis", data_analysis_node)
         self.workflow.add_node("report_generation", report_generation_node)
         
@@ -2396,11 +2659,12 @@ Include specific metrics, percentages, and data points in text format.
             logger.info("Graph compiled with PostgresStore for long-term memory")
         else:
             self.graph = self.workflow.compile(checkpointer=self.checkpointer)
-            logger.info("Graph compiled with MemorySaver checkpointer only")
+            logger.info("Graph compiled without long-term store")
     
     def _create_enhanced_tools_with_user_id(self, user_id: int):
         """Create enhanced tools that automatically inject user_id for token refresh"""
         from langchain_core.tools import StructuredTool
+        from accounts.token_broker import token_broker
         
         enhanced_tools = []
         
@@ -2412,11 +2676,22 @@ Include specific metrics, percentages, and data points in text format.
                     # Inject user_id if not already present
                     if 'user_id' not in kwargs and user_id is not None:
                         kwargs['user_id'] = user_id
+                    # Hand Google Ads tools the user's current token rather than whatever the model passed
+                    if 'access_token' in original_tool.args and kwargs.get('user_id') is not None:
+                        access_token = token_broker.get_access_token(kwargs['user_id'])
+                        if access_token:
+                            kwargs['access_token'] = access_token
                     return original_tool.func(*args, **kwargs)
                 
+                async def enhanced_tool_coroutine(*args, **kwargs):
+                    """Async entry point (atool_node): the blocking body runs on the dedicated tool pool"""
+                    call = functools.partial(contextvars.copy_context().run, enhanced_tool_func, *args, **kwargs)
+                    return await asyncio.get_running_loop().run_in_executor(_async_tool_executor, call)
+                
                 # Create new tool with same metadata but enhanced function
                 enhanced_tool = StructuredTool.from_function(
                     enhanced_tool_func,
+                    coroutine=enhanced_tool_coroutine,
                     name=original_tool.name,
                     description=original_tool.description,
                     args_schema=original_tool.args_schema
@@ -2483,8 +2758,8 @@ You have access to 15 powerful tools, but you should use them intelligently:
 3. **Report Generation**: Create formatted reports with charts, graphs, and recommendations
 4. **Image Generation**: Create custom images, posters, and visual content using OpenAI's image generation
 5. **Image Improvement**: Modify and enhance existing generated images based on user feedback
-6. **Data Visualization**: Create pie charts, bar graphs, line charts, and tables using ChatGPT
-7. **Tabular Formatting**: Format data into professional tables with ChatGPT
+6. **Data Visualization**: Create pie charts, bar graphs, line charts, and tables rendered locally from the exact data
+7. **Tabular Formatting**: Format data into professional tables (currency and percentage columns typed automatically)
 8. **General Queries**: Answer general questions directly without tools when appropriate
 
 Available tools:
@@ -2499,10 +2774,10 @@ Available tools:
 - get_search_terms: Get search terms data
 - get_demographic_data: Get demographic insights
 - get_geographic_data: Get geographic data
-- generate_image: Generate images using OpenAI's image generation API
+- generate_image: Generate images using OpenAI's image generation API (runs in the background; tell the user the image is being generated rather than inventing a URL)
 - improve_image: Improve or modify existing generated images
-- create_data_visualization: Create pie charts, bar graphs, line charts using ChatGPT
-- format_tabular_data: Format data into professional tables using ChatGPT
+- create_data_visualization: Create pie charts, bar graphs, line charts and tables rendered locally from the exact data (output_format 'png', 'svg' or 'plotly'); pass the fetched rows as JSON
+- format_tabular_data: Format data into markdown, HTML, JSON or CSV tables locally; pass raw API values (cost_micros, fractional rates like ctr) and use sort_by/max_rows instead of pre-sorting
 
 
 When responding, use the appropriate tools to fetch live data and provide comprehensive analysis.
@@ -2577,14 +2852,25 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
             current_step=state.get("current_step", "start")
         )
     
-    def _get_user_context(self, user_id: int) -> Dict[str, Any]:
+    def _get_request_state(self, user_id: int, conversation_id: Optional[str]) -> Dict[str, Any]:
+        """Redis state of a chat request (customer selection, accessible customers, context), one round trip"""
+        if not conversation_id:
+            return {}
+        try:
+            from .redis_service import RedisService
+            return RedisService.get_request_state(user_id, conversation_id)
+        except Exception as e:
+            logger.warning(f"Could not read request state from Redis: {e}")
+            return {}
+    
+    def _get_user_context(self, user_id: int, request_state: Dict[str, Any] = None) -> Dict[str, Any]:
         """Get user-specific context from long-term memory"""
         try:
             # Try to get context from PostgresStore if available
             if self.postgres_store:
                 try:
                     # Check if we have stored accessible customers in long-term memory
-                    stored_customers = self._get_accessible_customers_from_long_term_memory(user_id)
+                    stored_customers = self._get_accessible_customers_from_long_term_memory(user_id, request_state)
                     if stored_customers:
                         logger.info(f"Retrieved {len(stored_customers)} accessible customers from long-term memory for user {user_id}")
                         return {
@@ -2634,13 +2920,19 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
             logger.error(f"Error getting accessible customers: {e}")
             return []
     
-    def _save_accessible_customers_to_long_term_memory(self, user_id: int, accessible_customers: List[str]) -> bool:
-        """Save accessible customers to long-term memory using Redis and database"""
+    def _save_accessible_customers_to_long_term_memory(self, user_id: int, accessible_customers: List[str],
+                                                       conversation_id: str = None, customer_id: str = None) -> bool:
+        """Save accessible customers (and the conversation's selected customer) to Redis and the database"""
         try:
             # First, try to save to Redis for fast access
             try:
                 from .redis_service import RedisService
-                RedisService.save_accessible_customers(user_id, accessible_customers)
+                if conversation_id:
+                    # Selection and accessible customers in one pipelined round trip
+                    RedisService.save_request_state(user_id, conversation_id, customer_id=customer_id,
+                                                    accessible_customers=accessible_customers)
+                else:
+                    RedisService.save_accessible_customers(user_id, accessible_customers)
                 logger.info(f"Saved {len(accessible_customers)} accessible customers to Redis for user {user_id}")
             except Exception as e:
                 logger.warning(f"Could not save to Redis: {e}")
@@ -2688,13 +2980,17 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
             logger.error(f"Error saving accessible customers to long-term memory: {e}")
             return False
     
-    def _get_accessible_customers_from_long_term_memory(self, user_id: int) -> List[str]:
+    def _get_accessible_customers_from_long_term_memory(self, user_id: int,
+                                                        request_state: Dict[str, Any] = None) -> List[str]:
         """Get accessible customers from long-term memory (Redis, database, PostgresStore)"""
         try:
-            # First, try to get from Redis for fast access
+            # First, try Redis for fast access (already read with the request state when available)
             try:
                 from .redis_service import RedisService
-                cached_customers = RedisService.get_accessible_customers(user_id)
+                if request_state:
+                    cached_customers = request_state.get('accessible_customers')
+                else:
+                    cached_customers = RedisService.get_accessible_customers(user_id)
                 if cached_customers:
                     logger.info(f"Retrieved {len(cached_customers)} accessible customers from Redis for user {user_id}")
                     return cached_customers
@@ -2804,122 +3100,295 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
                     'error': 'Query is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get or create conversation
-            logger.info(f"Looking up conversation - conversation_id: {conversation_id}, user: {request.user.id}")
-            conversation = self._get_or_create_conversation(request.user, conversation_id)
-            logger.info(f"Using conversation - ID: {conversation.id}, customer_id: {conversation.customer_id}")
-            
-            # Load conversation history for context (before saving current message)
-            conversation_messages = self._load_conversation_history(conversation)
-            
-            # Add current user message to the conversation
-            conversation_messages.append(HumanMessage(content=query))
-            
-            # Check if user is selecting a customer ID
-            detected_customer_id = self._detect_customer_id_selection(query, conversation_messages)
-            if detected_customer_id:
-                # Update conversation with selected customer ID
-                conversation.customer_id = detected_customer_id
-                conversation.save()
-                logger.info(f"Updated conversation {conversation.id} with customer ID: {detected_customer_id}")
-            
-            # Save user message to database
-            user_message = ChatMessage.objects.create(
-            conversation=conversation,
-                role='user',
-                content=query
+            conversation, initial_state, config = self._prepare_graph_run(
+                request.user, query, conversation_id, customer_id
             )
             
-            # Get accessible customers for the initial state
-            accessible_customers = self._get_accessible_customers(request.user.id)
-            
-            # Prepare initial state with full conversation history
-            initial_state = {
-                "messages": conversation_messages,
-                "user_id": request.user.id,
-                "conversation_id": str(conversation.id),
-                "customer_id": conversation.customer_id or customer_id,  # Prioritize stored customer_id
-                "accessible_customers": accessible_customers,
-                "user_context": {},
-                "current_step": "start",
-                "error_count": 0,
-                "max_retries": 3
-            }
-            
-            # Configure with consistent thread ID for checkpointing
-            # Use a stable thread ID that doesn't change with conversation ID
-            config: RunnableConfig = {
-                "configurable": {
-                    "thread_id": f"user_{request.user.id}_langgraph"
-                }
-            }
-            
-            # Log the initial state for debugging
-            logger.info(f"LangGraph initial state - User: {request.user.id}, Conversation: {conversation.id}")
-            logger.info(f"Customer ID: {initial_state['customer_id']}")
-            logger.info(f"Accessible Customers: {len(initial_state['accessible_customers'])}")
-            logger.info(f"Messages: {len(initial_state['messages'])}")
+            if self._wants_stream(request):
+                response = StreamingHttpResponse(
+                    self._stream_graph_events(conversation, initial_state, config, customer_id),
+                    content_type='text/event-stream'
+                )
+                response['Cache-Control'] = 'no-cache'
+                response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering so events flush immediately
+                return response
             
             # Invoke the graph
             logger.info(f"Invoking LangGraph for user {request.user.id}, conversation {conversation.id}")
             result = self.graph.invoke(initial_state, config=config)
             
-            # Extract final response
-            final_messages = result.get("messages", [])
-            if final_messages:
-                # Get the last AI message
-                last_ai_message = None
-                for msg in reversed(final_messages):
-                    if isinstance(msg, AIMessage):
-                        last_ai_message = msg
-                        break
-                
-                if last_ai_message:
-                    response_content = last_ai_message.content
-                else:
-                    response_content = "I processed your request but couldn't generate a response."
-            else:
-                response_content = "I processed your request but couldn't generate a response."
-            
-            # Save assistant response
-            assistant_message = ChatMessage.objects.create(
-                conversation=conversation,
-                role='assistant',
-                    content=response_content,
-                    response_type='langgraph_response',
-                    structured_data={
-                        'langgraph_result': {
-                            'current_step': result.get('current_step'),
-                            'error_count': result.get('error_count', 0),
-                            'user_context': result.get('user_context', {}),
-                            'accessible_customers': result.get('accessible_customers', [])
-                    }
-                }
-            )
-            
-            # Update conversation
-            conversation.updated_at = datetime.now()
-            if customer_id and not conversation.customer_id:
-                conversation.customer_id = customer_id
-            conversation.save()
+            return Response(self._save_graph_result(conversation, result, customer_id))
             
+        except Exception as e:
+            logger.error(f"Error in LanggraphView: {e}")
             return Response({
-                'message_id': assistant_message.id,
-            'conversation_id': conversation.id,
-                'response': response_content,
-                'langgraph_state': {
+                'error': f'An error occurred: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _prepare_graph_run(self, user, query: str, conversation_id=None, customer_id=None):
+        """Persist the user message and build the initial graph state and config"""
+        # Get or create conversation
+        logger.info(f"Looking up conversation - conversation_id: {conversation_id}, user: {user.id}")
+        conversation = self._get_or_create_conversation(user, conversation_id)
+        logger.info(f"Using conversation - ID: {conversation.id}, customer_id: {conversation.customer_id}")
+        
+        # One checkpoint thread per conversation
+        config: RunnableConfig = {
+            "configurable": {
+                "thread_id": thread_id_for_conversation(conversation.id)
+            }
+        }
+        
+        # With a live checkpoint the graph already holds the history and only the
+        # new turn is sent; otherwise seed the thread from ChatMessage rows
+        checkpoint_messages = self._get_checkpoint_messages(config)
+        if checkpoint_messages:
+            conversation_messages = list(checkpoint_messages)
+        else:
+            # Load conversation history for context (before saving current message)
+            conversation_messages = self._load_conversation_history(conversation)
+        
+        # Check if user is selecting a customer ID
+        detected_customer_id = self._detect_customer_id_selection(query, conversation_messages)
+        if detected_customer_id:
+            # Update conversation with selected customer ID
+            conversation.customer_id = detected_customer_id
+            conversation.save(update_fields=['customer_id', 'updated_at'])
+            logger.info(f"Updated conversation {conversation.id} with customer ID: {detected_customer_id}")
+        
+        # Save user message to database
+        user_message = ChatMessage.objects.create(
+            conversation=conversation,
+            role='user',
+            content=query
+        )
+        
+        # Add current user message to the conversation
+        current_message = HumanMessage(content=query, id=chat_message_id(user_message.id))
+        conversation_messages.append(current_message)
+        new_messages = [current_message] if checkpoint_messages else conversation_messages
+        
+        # Keep the prompt within the token budget, folding older turns into the summary
+        context_start_id = context_manager.prepare(conversation, conversation_messages)
+        
+        # Get accessible customers for the initial state
+        accessible_customers = self._get_accessible_customers(user.id)
+        
+        # Prepare initial state (full history only when seeding a new thread)
+        initial_state = {
+            "messages": new_messages,
+            "user_id": user.id,
+            "conversation_id": str(conversation.id),
+            "customer_id": conversation.customer_id or customer_id,  # Prioritize stored customer_id
+            "accessible_customers": accessible_customers,
+            "user_context": {},
+            "current_step": "start",
+            "error_count": 0,
+            "max_retries": 3,
+            "context_summary": conversation.context_summary,
+            "context_start_id": context_start_id
+        }
+        
+        # Log the initial state for debugging
+        logger.info(f"LangGraph initial state - User: {user.id}, Conversation: {conversation.id}")
+        logger.info(f"Customer ID: {initial_state['customer_id']}")
+        logger.info(f"Accessible Customers: {len(initial_state['accessible_customers'])}")
+        logger.info(f"Messages: {len(initial_state['messages'])}")
+        
+        return conversation, initial_state, config
+    
+    def _get_checkpoint_messages(self, config: RunnableConfig) -> List[Any]:
+        """Messages held by the conversation's checkpoint thread (empty if it must be reseeded)"""
+        if self.checkpointer is None:
+            return []
+        thread_id = config["configurable"]["thread_id"]
+        try:
+            messages = self.graph.get_state(config).values.get("messages", [])
+        except Exception as e:
+            logger.warning(f"Could not read checkpoint for {thread_id}: {e}")
+            return []
+        
+        # A run that died mid-tool leaves unanswered tool calls, which the LLM rejects
+        if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+            logger.warning(f"Discarding interrupted checkpoint thread {thread_id}")
+            self.checkpointer.delete_thread(thread_id)
+            return []
+        return messages
+    
+    def _save_graph_result(self, conversation, result: Dict[str, Any], customer_id=None) -> Dict[str, Any]:
+        """Save the final assistant message and build the response payload"""
+        # Extract final response
+        final_messages = result.get("messages", [])
+        if final_messages:
+            # Get the last AI message
+            last_ai_message = None
+            for msg in reversed(final_messages):
+                if isinstance(msg, AIMessage):
+                    last_ai_message = msg
+                    break
+            
+            if last_ai_message:
+                response_content = last_ai_message.content
+            else:
+                response_content = "I processed your request but couldn't generate a response."
+        else:
+            response_content = "I processed your request but couldn't generate a response."
+        
+        # Save assistant response
+        assistant_message = ChatMessage.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=response_content,
+            response_type='langgraph_response',
+            structured_data={
+                'langgraph_result': {
                     'current_step': result.get('current_step'),
                     'error_count': result.get('error_count', 0),
+                    'user_context': result.get('user_context', {}),
                     'accessible_customers': result.get('accessible_customers', [])
-                },
-                'timestamp': assistant_message.created_at.isoformat()
-            })
+                }
+            }
+        )
+        
+        # Update conversation
+        conversation.updated_at = datetime.now()
+        if customer_id and not conversation.customer_id:
+            conversation.customer_id = customer_id
+        conversation.save(update_fields=['updated_at', 'customer_id'])
+        
+        return {
+            'message_id': assistant_message.id,
+            'conversation_id': conversation.id,
+            'response': response_content,
+            'langgraph_state': {
+                'current_step': result.get('current_step'),
+                'error_count': result.get('error_count', 0),
+                'accessible_customers': result.get('accessible_customers', [])
+            },
+            'timestamp': assistant_message.created_at.isoformat()
+        }
+    
+    def _wants_stream(self, request) -> bool:
+        """Check whether the client asked for a server-sent event stream"""
+        stream = request.data.get('stream', request.query_params.get('stream', False))
+        if isinstance(stream, str):
+            stream = stream.lower() in ('1', 'true', 'yes')
+        return bool(stream) or 'text/event-stream' in request.META.get('HTTP_ACCEPT', '')
+    
+    @staticmethod
+    def _sse_event(event: str, data: Dict[str, Any]) -> str:
+        """Format a single server-sent event"""
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    
+    def _stream_graph_events(self, conversation, initial_state: Dict[str, Any], config: RunnableConfig, customer_id=None):
+        """
+        Run the graph and yield server-sent events as it progresses
+        
+        Events:
+        - start: conversation id, sent before any LLM work
+        - node: a graph node finished (with its current_step)
+        - tool_start / tool_end: tool calls requested by the LLM and their results
+        - token: LLM output tokens as they are generated
+        - done: the same payload as the non-streaming response
+        - image_job: current status and poll_url of image jobs queued during the run, after done
+        - error: the run failed
+        """
+        yield self._sse_event('start', {'conversation_id': conversation.id})
+        
+        result = initial_state
+        image_job_ids = []
+        try:
+            logger.info(f"Streaming LangGraph for user {initial_state['user_id']}, conversation {conversation.id}")
+            for mode, chunk in self.graph.stream(
+                initial_state,
+                config=config,
+                stream_mode=["updates", "messages", "values"]
+            ):
+                if mode == "values":
+                    # Keep the latest full state for the final save
+                    result = chunk
+                else:
+                    if mode == "updates":
+                        image_job_ids.extend(self._image_job_ids(chunk))
+                    yield from self._stream_chunk_events(mode, chunk)
+            
+            yield self._sse_event('done', self._save_graph_result(conversation, result, customer_id))
+            
+            # Report each job's current status once and let the client poll its poll_url;
+            # waiting here would pin this WSGI worker for the whole generation
+            if image_job_ids:
+                events, _ = self._poll_image_jobs(image_job_ids, {})
+                yield from events
             
         except Exception as e:
-            logger.error(f"Error in LanggraphView: {e}")
-            return Response({
-                'error': f'An error occurred: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.error(f"Error streaming LanggraphView response: {e}")
+            yield self._sse_event('error', {'error': f'An error occurred: {str(e)}'})
+    
+    @staticmethod
+    def _image_job_ids(chunk) -> List[str]:
+        """Ids of unfinished image jobs returned by tool messages in an "updates" chunk"""
+        job_ids = []
+        for update in chunk.values():
+            for message in (update or {}).get('messages', []):
+                if getattr(message, 'type', None) != 'tool' or getattr(message, 'name', None) not in IMAGE_JOB_TOOLS:
+                    continue
+                try:
+                    payload = json.loads(message.content)
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(payload, dict) and payload.get('job_id') and payload.get('status') not in TERMINAL_STATUSES:
+                    job_ids.append(payload['job_id'])
+        return job_ids
+    
+    def _poll_image_jobs(self, job_ids: List[str], last_status: Dict[str, str]):
+        """
+        Check image jobs once
+        
+        Returns:
+            (image_job events for jobs whose status changed, ids still unfinished)
+        """
+        events, pending = [], []
+        for job_id in job_ids:
+            job = get_image_job(job_id)
+            if job is None:
+                continue
+            if job['status'] != last_status.get(job_id):
+                last_status[job_id] = job['status']
+                events.append(self._sse_event('image_job', public_job(job)))
+            if job['status'] not in TERMINAL_STATUSES:
+                pending.append(job_id)
+        return events, pending
+    
+    def _stream_chunk_events(self, mode: str, chunk):
+        """Translate one graph.stream "messages"/"updates" chunk into server-sent events"""
+        if mode == "messages":
+            message_chunk, metadata = chunk
+            content = getattr(message_chunk, 'content', None)
+            if isinstance(message_chunk, AIMessage) and isinstance(content, str) and content:
+                yield self._sse_event('token', {
+                    'node': metadata.get('langgraph_node'),
+                    'content': content
+                })
+        elif mode == "updates":
+            for node_name, update in chunk.items():
+                update = update or {}
+                yield self._sse_event('node', {
+                    'node': node_name,
+                    'current_step': update.get('current_step')
+                })
+                for message in update.get('messages', []):
+                    # Tool arguments are not echoed: they carry access tokens
+                    for tool_call in getattr(message, 'tool_calls', None) or []:
+                        yield self._sse_event('tool_start', {
+                            'tool': tool_call.get('name'),
+                            'tool_call_id': tool_call.get('id')
+                        })
+                    if getattr(message, 'type', None) == 'tool':
+                        yield self._sse_event('tool_end', {
+                            'tool': getattr(message, 'name', None),
+                            'tool_call_id': getattr(message, 'tool_call_id', None),
+                            'status': getattr(message, 'status', 'success')
+                        })
     
     def _detect_customer_id_selection(self, query: str, conversation_messages: List) -> Optional[str]:
         """Detect if user is selecting a customer ID from a list"""
@@ -2967,18 +3436,22 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
     def _load_conversation_history(self, conversation):
         """Load conversation history as LangChain messages"""
         try:
-            # Get last 20 messages from the conversation for context
-            messages = conversation.messages.all().order_by('created_at')[:20]
+            # Latest messages not yet folded into the conversation summary; the
+            # context manager trims them to the token budget
+            messages = conversation.messages.only('id', 'role', 'content')
+            if conversation.context_summary_until_id:
+                messages = messages.filter(id__gte=conversation.context_summary_until_id)
+            messages = list(messages.order_by('-created_at', '-id')[:HISTORY_MAX_MESSAGES])[::-1]
             
             conversation_messages = []
             
             for msg in messages:
                 if msg.role == 'user':
-                    conversation_messages.append(HumanMessage(content=msg.content))
+                    conversation_messages.append(HumanMessage(content=msg.content, id=chat_message_id(msg.id)))
                 elif msg.role == 'assistant':
-                    conversation_messages.append(AIMessage(content=msg.content))
+                    conversation_messages.append(AIMessage(content=msg.content, id=chat_message_id(msg.id)))
                 elif msg.role == 'system':
-                    conversation_messages.append(SystemMessage(content=msg.content))
+                    conversation_messages.append(SystemMessage(content=msg.content, id=chat_message_id(msg.id)))
             
             logger.info(f"Loaded {len(conversation_messages)} messages from conversation history")
             return conversation_messages
@@ -3015,6 +3488,129 @@ IMPORTANT: You have access to the full conversation history. Use it to provide c
         return new_conversation
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class LanggraphAsyncView(View):
+    """
+    Async variant of LanggraphView for ASGI deployments
+    
+    The graph runs with ainvoke/astream, so LLM calls await the async OpenAI
+    client and ORM work goes through sync_to_async; an idle chat does not pin
+    a worker thread while it waits on OpenAI or Google Ads.
+    Accepts the same JSON body (and "stream" flag) as LanggraphView.
+    """
+    
+    async def post(self, request):
+        """Handle LangGraph requests on the event loop"""
+        user = await self._authenticate(request)
+        if user is None:
+            return JsonResponse({
+                'detail': 'Authentication credentials were not provided or are invalid.'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({
+                    'error': 'Invalid JSON body'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            query = str(data.get('query', '')).strip()
+            conversation_id = data.get('conversation_id')
+            customer_id = data.get('customer_id')
+            
+            logger.info(f"LanggraphAsyncView request - User: {user.id}, Query: {query[:50]}...")
+            
+            if not query:
+                return JsonResponse({
+                    'error': 'Query is required'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # The first view in a worker builds the shared runtime (LLM clients, checkpointer
+            # pool and its setup()), which blocks; keep that off the event loop
+            chat_view = await sync_to_async(LanggraphView)()
+            conversation, initial_state, config = await sync_to_async(chat_view._prepare_graph_run)(
+                user, query, conversation_id, customer_id
+            )
+            
+            stream = data.get('stream', request.GET.get('stream', False))
+            if isinstance(stream, str):
+                stream = stream.lower() in ('1', 'true', 'yes')
+            if stream or 'text/event-stream' in request.META.get('HTTP_ACCEPT', ''):
+                response = StreamingHttpResponse(
+                    self._astream_graph_events(chat_view, conversation, initial_state, config, customer_id),
+                    content_type='text/event-stream'
+                )
+                response['Cache-Control'] = 'no-cache'
+                response['X-Accel-Buffering'] = 'no'
+                return response
+            
+            logger.info(f"Invoking LangGraph (async) for user {user.id}, conversation {conversation.id}")
+            graph = await chat_view.aget_graph()
+            result = await graph.ainvoke(initial_state, config=config)
+            
+            payload = await sync_to_async(chat_view._save_graph_result)(conversation, result, customer_id)
+            return JsonResponse(payload)
+            
+        except Exception as e:
+            logger.error(f"Error in LanggraphAsyncView: {e}")
+            return JsonResponse({
+                'error': f'An error occurred: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    async def _authenticate(self, request):
+        """Authenticate the JWT bearer token (same scheme as LanggraphView)"""
+        try:
+            auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            logger.warning(f"LanggraphAsyncView authentication failed: {e}")
+            return None
+        return auth[0] if auth else None
+    
+    async def _astream_graph_events(self, chat_view, conversation, initial_state, config, customer_id=None):
+        """
+        Async counterpart of LanggraphView._stream_graph_events
+        
+        Waiting costs no worker here, so image_job events follow each status change
+        for up to IMAGE_JOB_STREAM_WAIT_SECONDS after done.
+        """
+        yield chat_view._sse_event('start', {'conversation_id': conversation.id})
+        
+        result = initial_state
+        image_job_ids = []
+        try:
+            graph = await chat_view.aget_graph()
+            async for mode, chunk in graph.astream(
+                initial_state,
+                config=config,
+                stream_mode=["updates", "messages", "values"]
+            ):
+                if mode == "values":
+                    result = chunk
+                else:
+                    if mode == "updates":
+                        image_job_ids.extend(chat_view._image_job_ids(chunk))
+                    for event in chat_view._stream_chunk_events(mode, chunk):
+                        yield event
+            
+            payload = await sync_to_async(chat_view._save_graph_result)(conversation, result, customer_id)
+            yield chat_view._sse_event('done', payload)
+            
+            deadline = time.monotonic() + getattr(settings, 'IMAGE_JOB_STREAM_WAIT_SECONDS', 90)
+            last_status = {}
+            while image_job_ids:
+                events, image_job_ids = await sync_to_async(chat_view._poll_image_jobs)(image_job_ids, last_status)
+                for event in events:
+                    yield event
+                if not image_job_ids or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(1)
+            
+        except Exception as e:
+            logger.error(f"Error streaming LanggraphAsyncView response: {e}")
+            yield chat_view._sse_event('error', {'error': f'An error occurred: {str(e)}'})
+
+
 class RecentConversationsView(APIView):
     """
     API endpoint to get top 10 recent conversations with 2 chat messages each
@@ -3027,22 +3623,28 @@ class RecentConversationsView(APIView):
         try:
             user = request.user
             
-            # Get top 10 recent conversations for the user
+            # First 2 messages of each conversation, numbered per conversation in SQL
+            preview_queryset = ChatMessage.objects.annotate(
+                position=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('conversation_id')],
+                    order_by=F('created_at').asc()
+                )
+            ).filter(position__lte=2).order_by('created_at')
+            
+            # Get top 10 recent conversations for the user (2 queries in total)
             recent_conversations = Conversation.objects.filter(
                 user=user
-            ).order_by('-created_at')[:10]
+            ).order_by('-created_at').prefetch_related(
+                Prefetch('messages', queryset=preview_queryset, to_attr='preview_messages')
+            )[:10]
             
             conversations_data = []
             
             for conversation in recent_conversations:
-                # Get the first 2 messages for preview
-                preview_messages = ChatMessage.objects.filter(
-                    conversation=conversation
-                ).order_by('created_at')[:2]
-                
                 # Format messages for frontend
                 messages_preview = []
-                for msg in preview_messages:
+                for msg in conversation.preview_messages:
                     messages_preview.append({
                         'id': msg.id,
                         'role': msg.role,
@@ -3052,8 +3654,8 @@ class RecentConversationsView(APIView):
                     })
                 
                 # Get conversation metadata
-                total_messages = ChatMessage.objects.filter(conversation=conversation).count()
-                last_activity = conversation.updated_at or conversation.created_at
+                total_messages = conversation.message_count
+                last_activity = conversation.last_message_at or conversation.updated_at or conversation.created_at
                 
                 conversations_data.append({
                     'id': conversation.id,
@@ -3084,23 +3686,30 @@ class RecentConversationsView(APIView):
 
 class ChatHistoryView(APIView):
     """
-    API endpoint to get chat messages for a specific conversation with pagination
-    - Returns latest 100 messages by default
-    - Supports pagination with page and page_size parameters
+    API endpoint to get chat messages for a specific conversation with cursor pagination
+    - Returns the latest 50 messages by default
+    - Pages by (created_at, id) cursor, so deep pages cost the same as the first
     - Only returns messages for conversations owned by the authenticated user
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request, conversation_id):
         """
-        Get chat messages for a specific conversation with pagination
+        Get chat messages for a specific conversation with cursor pagination
         
         GET /ad-expert/api/conversations/{conversation_id}/messages/
         
         Query Parameters:
-        - page: Page number (default: 1)
+        - cursor: next_cursor from the previous page (omit for the first page)
         - page_size: Number of messages per page (default: 50, max: 100)
-        - order: Order of messages ('asc' for oldest first, 'desc' for newest first, default: 'desc')
+        - order: 'desc' pages from the newest message back (default), 'asc' from the oldest forward;
+          messages within a page are always oldest first
+        - include_structured_data: 'false' omits structured_data bodies and returns a
+          has_structured_data flag instead (default: true)
+        - include_total: 'true' adds an approximate total_messages (default: false)
+        - page: Deprecated, removed in the next release. Without cursor, returns that
+          page by offset with the old current_page/total_pages/has_previous fields
+          (plus next_cursor, to switch over)
         
         Response:
         {
@@ -3108,12 +3717,11 @@ class ChatHistoryView(APIView):
             "conversation_id": 123,
             "messages": [...],
             "pagination": {
-                "current_page": 1,
                 "page_size": 50,
-                "total_messages": 150,
-                "total_pages": 3,
+                "order": "desc",
                 "has_next": true,
-                "has_previous": false
+                "next_cursor": "MjAyNi0xMC0xNlQxMjowMDowMCswMDowMHw0Mg",
+                "total_messages": 150
             }
         }
         """
@@ -3121,13 +3729,12 @@ class ChatHistoryView(APIView):
             user = request.user
             
             # Get pagination parameters
-            page = int(request.GET.get('page', 1))
-            page_size = min(int(request.GET.get('page_size', 50)), 100)  # Max 100 messages per page
-            order = request.GET.get('order', 'desc')  # 'asc' or 'desc'
-            
-            # Validate page number
-            if page < 1:
-                page = 1
+            cursor = request.GET.get('cursor') or None
+            page = request.GET.get('page') if not cursor else None
+            page_size = max(min(int(request.GET.get('page_size', 50)), 100), 1)  # Max 100 messages per page
+            order = 'asc' if request.GET.get('order', 'desc') == 'asc' else 'desc'
+            include_structured_data = request.GET.get('include_structured_data', 'true').lower() != 'false'
+            include_total = request.GET.get('include_total', 'false').lower() == 'true'
             
             # Get the conversation and verify ownership
             try:
@@ -3142,65 +3749,40 @@ class ChatHistoryView(APIView):
                     'conversation_id': conversation_id
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Get total count of messages for this conversation
-            total_messages = ChatMessage.objects.filter(conversation=conversation).count()
-            
-            # Calculate pagination
-            total_pages = (total_messages + page_size - 1) // page_size
-            offset = (page - 1) * page_size
-            
-            # Determine ordering
-            order_field = 'created_at' if order == 'asc' else '-created_at'
-            
-            # Get messages with pagination
-            messages = ChatMessage.objects.filter(
-                conversation=conversation
-            ).order_by(order_field)[offset:offset + page_size]
-            
-            # Format messages for response
-            messages_data = []
-            for message in messages:
-                message_data = {
-                    'id': message.id,
-                    'role': message.role,
-                    'content': message.content,
-                    'response_type': message.response_type,
-                    'created_at': message.created_at.isoformat(),
-                    'updated_at': message.updated_at.isoformat() if message.updated_at else None
+            if page is not None:
+                messages, pagination = self._legacy_page(
+                    conversation, max(int(page), 1), page_size, order, include_structured_data
+                )
+            else:
+                messages, next_cursor = paginate_messages(
+                    ChatMessage.objects.filter(conversation=conversation),
+                    cursor, page_size, order, include_structured_data
+                )
+                pagination = {
+                    'page_size': page_size,
+                    'order': order,
+                    'has_next': next_cursor is not None,
+                    'next_cursor': next_cursor,
                 }
-                
-                # Include structured data if available
-                if message.structured_data:
-                    message_data['structured_data'] = message.structured_data
-                
-                messages_data.append(message_data)
+                if include_total:
+                    # Maintained by the ChatMessage signals, so no count() per page
+                    pagination['total_messages'] = conversation.message_count
+            
+            messages_data = [serialize_message(message, include_structured_data) for message in messages]
             
-            # If order is 'desc', reverse the list to show newest first
+            # Newest-first pages are fetched backwards; show them oldest first
             if order == 'desc':
                 messages_data.reverse()
             
-            # Calculate pagination info
-            has_next = page < total_pages
-            has_previous = page > 1
-            
             response_data = {
                 'success': True,
                 'conversation_id': conversation_id,
                 'conversation_title': conversation.title,
                 'messages': messages_data,
-                'pagination': {
-                    'current_page': page,
-                    'page_size': page_size,
-                    'total_messages': total_messages,
-                    'total_pages': total_pages,
-                    'has_next': has_next,
-                    'has_previous': has_previous,
-                    'next_page': page + 1 if has_next else None,
-                    'previous_page': page - 1 if has_previous else None
-                }
+                'pagination': pagination
             }
             
-            logger.info(f"Retrieved {len(messages_data)} messages for conversation {conversation_id} (page {page}/{total_pages}) for user {user.id}")
+            logger.info(f"Retrieved {len(messages_data)} messages for conversation {conversation_id} (cursor={'yes' if cursor else 'no'}, page={page}) for user {user.id}")
             
             return Response(response_data, status=status.HTTP_200_OK)
             
@@ -3218,4 +3800,27 @@ class ChatHistoryView(APIView):
                 'success': False,
                 'error': 'Failed to retrieve chat history',
                 'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _legacy_page(self, conversation, page, page_size, order, include_structured_data):
+        """Deprecated ?page= offset paging, with the pre-cursor pagination fields"""
+        messages = page_messages(
+            ChatMessage.objects.filter(conversation=conversation), page, page_size, order, include_structured_data
+        )
+        total_messages = conversation.message_count
+        total_pages = (total_messages + page_size - 1) // page_size
+        has_next = page < total_pages
+        has_previous = page > 1
+        return messages, {
+            'current_page': page,
+            'page_size': page_size,
+            'order': order,
+            'total_messages': total_messages,
+            'total_pages': total_pages,
+            'has_next': has_next,
+            'has_previous': has_previous,
+            'next_page': page + 1 if has_next else None,
+            'previous_page': page - 1 if has_previous else None,
+            'next_cursor': encode_cursor(messages[-1]) if has_next and messages else None,
+            'deprecation': "'page' is deprecated and will be removed in the next release; use 'cursor' with next_cursor",
+        }
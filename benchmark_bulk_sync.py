@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the google_ads_app bulk sync engine
+Syncs a synthetic account (100k keywords by default) through BulkSyncEngine and,
+for comparison, a sample of keywords through the old per-row get_or_create path.
+Everything runs in a transaction that is rolled back at the end.
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketing_assistant_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from google_ads_app.bulk_sync import BulkSyncEngine
+from google_ads_app.models import GoogleAdsAccount, GoogleAdsKeyword
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _synthetic_account(campaigns: int, ad_groups_per_campaign: int, keywords_per_ad_group: int, days: int):
+    """Rows shaped like GoogleAdsService.list_* / get_performance_data output"""
+    campaign_rows, ad_group_rows, keyword_rows, performance_rows = [], [], [], []
+    end_date = date.today()
+    for c in range(1, campaigns + 1):
+        campaign_rows.append({
+            'campaign_id': c, 'campaign_name': f'Campaign {c}', 'status': 'ENABLED', 'type': 'SEARCH',
+            'start_date': '2024-01-01', 'end_date': None, 'budget_amount': 100.0, 'budget_type': 'STANDARD',
+        })
+        for g in range(ad_groups_per_campaign):
+            ad_group_id = c * 1000 + g
+            ad_group_rows.append({
+                'ad_group_id': ad_group_id, 'ad_group_name': f'Ad group {ad_group_id}',
+                'status': 'ENABLED', 'type': 'SEARCH_STANDARD', 'campaign_id': c,
+            })
+            for k in range(keywords_per_ad_group):
+                keyword_rows.append({
+                    'keyword_id': k + 1, 'keyword_text': f'keyword {ad_group_id}-{k}', 'match_type': 'BROAD',
+                    'status': 'ENABLED', 'quality_score': 7, 'ad_group_id': ad_group_id,
+                })
+        for d in range(days):
+            performance_rows.append({
+                'customer_id': 1, 'campaign_id': c, 'ad_group_id': None, 'keyword_id': None,
+                'date': end_date - timedelta(days=d), 'impressions': 1000, 'clicks': 50,
+                'cost_micros': 25_000_000, 'conversions': 2.0, 'conversion_value': 80.0,
+            })
+    return campaign_rows, ad_group_rows, keyword_rows, performance_rows
+
+
+def _legacy_keywords(ad_group_ids: dict, keyword_rows: list) -> None:
+    """The old sync_account_data keyword loop: get_or_create plus save per row"""
+    for row in keyword_rows:
+        keyword, created = GoogleAdsKeyword.objects.get_or_create(
+            ad_group_id=ad_group_ids[row['ad_group_id']],
+            keyword_id=row['keyword_id'],
+            defaults={
+                'keyword_text': row['keyword_text'],
+                'match_type': row['match_type'],
+                'status': row['status'],
+                'quality_score': row['quality_score'],
+            }
+        )
+        if not created:
+            keyword.keyword_text = row['keyword_text']
+            keyword.save()
+
+
+def main():
+    keywords_per_ad_group = 50
+    total_keywords = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    legacy_sample = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    campaigns, ad_groups_per_campaign, days = 50, max(total_keywords // (50 * keywords_per_ad_group), 1), 30
+
+    campaign_rows, ad_group_rows, keyword_rows, performance_rows = _synthetic_account(
+        campaigns, ad_groups_per_campaign, keywords_per_ad_group, days
+    )
+
+    print("⏱️  Bulk sync benchmark")
+    print("=" * 80)
+    print(f"Campaigns: {len(campaign_rows)}   Ad groups: {len(ad_group_rows)}   "
+          f"Keywords: {len(keyword_rows)}   Performance rows: {len(performance_rows)}")
+
+    engine = BulkSyncEngine()
+    try:
+        with transaction.atomic():
+            user = get_user_model().objects.create(username=f'bulk-sync-benchmark-{time.time_ns()}')
+            account = GoogleAdsAccount.objects.create(
+                user=user, customer_id='0000000000', account_name='Benchmark', currency_code='USD',
+                time_zone='UTC'
+            )
+
+            for label in ("Initial sync", "Re-sync (all updates)"):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    engine.sync(
+                        account, campaign_rows, ad_group_rows, keyword_rows, performance=performance_rows,
+                        start_date=date.today() - timedelta(days=days), end_date=date.today()
+                    )
+                    elapsed = time.perf_counter() - started
+                print(f"{label:<28} {elapsed:8.2f} s   {len(queries):6d} queries")
+
+            ad_group_ids = engine.upsert_ad_groups(engine.upsert_campaigns(account, campaign_rows), ad_group_rows)
+            sample = keyword_rows[:legacy_sample]
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                _legacy_keywords(ad_group_ids, sample)
+                elapsed = time.perf_counter() - started
+            projected = elapsed * len(keyword_rows) / max(len(sample), 1)
+            print(f"{'Per-row keywords (sample)':<28} {elapsed:8.2f} s   {len(queries):6d} queries "
+                  f"for {len(sample)} keywords (~{projected:.0f} s projected for all)")
+
+            raise _Rollback()
+    except _Rollback:
+        print("Rolled back benchmark data")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark LanggraphView per-request setup cost
+Compares building the LLM clients, store and compiled graph on every request
+(the old behaviour) with reusing the process-wide LangGraph runtime.
+"""
+
+import os
+import sys
+import statistics
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# init_chat_model only needs a key to construct the client; no API call is made
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark-placeholder')
+
+# Set Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketing_assistant_project.settings')
+
+import django
+django.setup()
+
+from ad_expert.langgraph_runtime import reset_runtime
+from ad_expert.views import LanggraphView
+
+
+def _time_view_setup(iterations: int, cold: bool) -> list:
+    """Time LanggraphView construction, optionally dropping the shared runtime each time"""
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            reset_runtime(LanggraphView.RUNTIME_NAME)
+        started = time.perf_counter()
+        LanggraphView()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list):
+    print(f"{label:<32} mean {statistics.mean(timings):8.2f} ms   "
+          f"p50 {statistics.median(timings):8.2f} ms   max {max(timings):8.2f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    print("⏱️  LanggraphView per-request setup benchmark")
+    print("=" * 80)
+    print(f"Iterations: {iterations}")
+
+    before = _time_view_setup(iterations, cold=True)
+    # Build once, then measure the warm path every request now takes
+    reset_runtime(LanggraphView.RUNTIME_NAME)
+    LanggraphView.get_runtime()
+    after = _time_view_setup(iterations, cold=False)
+
+    _report("Before (build per request)", before)
+    _report("After (shared runtime)", after)
+    print(f"Speed-up: {statistics.mean(before) / max(statistics.mean(after), 1e-6):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
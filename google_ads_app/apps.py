@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class GoogleAdsAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'google_ads_app'
+    verbose_name = 'Google Ads Data'
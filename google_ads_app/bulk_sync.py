@@ -0,0 +1,215 @@
+"""
+Bulk upsert sync engine
+Writes one account's campaigns, ad groups, keywords, performance rows and
+daily rollups with
+batched bulk_create(update_conflicts=True), resolving foreign keys through
+in-memory id maps instead of per-row lookups
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import (
+    GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsAdGroup,
+    GoogleAdsKeyword, GoogleAdsPerformance,
+    DailyAccountRollup, DailyCampaignRollup, DailyKeywordRollup
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_METRICS = ('impressions', 'clicks', 'cost_micros', 'conversions', 'conversion_value')
+
+
+def _gid(value) -> Optional[str]:
+    """Google Ads ids arrive as ints but are stored (and mapped) as strings"""
+    return str(value) if value is not None else None
+
+
+class BulkSyncEngine:
+    """
+    Upserts one level of the account hierarchy per call
+
+    Each ``upsert_*`` method returns a map from Google Ads id (as a string) to
+    database pk, which the next level uses to set its foreign keys. Rows whose parent is not
+    in the map (e.g. removed campaigns) are skipped.
+    """
+
+    def __init__(self, batch_size: int = 2000):
+        self.batch_size = batch_size
+
+    def _upsert(self, model, objects: List[Any], unique_fields: List[str], update_fields: List[str]):
+        for start in range(0, len(objects), self.batch_size):
+            model.objects.bulk_create(
+                objects[start:start + self.batch_size],
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+
+    def upsert_campaigns(self, account: GoogleAdsAccount, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert campaigns; returns {campaign_id: pk}"""
+        campaigns = [
+            GoogleAdsCampaign(
+                account=account,
+                campaign_id=_gid(row['campaign_id']),
+                campaign_name=row['campaign_name'],
+                campaign_status=row['status'],
+                campaign_type=row['type'],
+                start_date=row['start_date'],
+                end_date=row['end_date'],
+                budget_amount=row['budget_amount'],
+                budget_type=row['budget_type'],
+            )
+            for row in rows
+        ]
+        self._upsert(
+            GoogleAdsCampaign, campaigns,
+            unique_fields=['account', 'campaign_id'],
+            update_fields=['campaign_name', 'campaign_status', 'campaign_type', 'start_date', 'end_date',
+                           'budget_amount', 'budget_type'],
+        )
+        return dict(
+            GoogleAdsCampaign.objects.filter(account=account).values_list('campaign_id', 'id')
+        )
+
+    def upsert_ad_groups(self, campaign_ids: Dict[str, int], rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert ad groups; returns {ad_group_id: pk}"""
+        ad_groups = [
+            GoogleAdsAdGroup(
+                campaign_id=campaign_ids[_gid(row['campaign_id'])],
+                ad_group_id=_gid(row['ad_group_id']),
+                ad_group_name=row['ad_group_name'],
+                status=row['status'],
+                type=row['type'],
+            )
+            for row in rows
+            if _gid(row['campaign_id']) in campaign_ids
+        ]
+        self._upsert(
+            GoogleAdsAdGroup, ad_groups,
+            unique_fields=['campaign', 'ad_group_id'],
+            update_fields=['ad_group_name', 'status', 'type'],
+        )
+        return dict(
+            GoogleAdsAdGroup.objects.filter(campaign_id__in=campaign_ids.values()).values_list('ad_group_id', 'id')
+        )
+
+    def upsert_keywords(self, ad_group_ids: Dict[str, int], rows: List[Dict[str, Any]]) -> Dict[tuple, int]:
+        """Upsert keywords; returns {(ad_group_id, keyword_id): pk} (criterion ids are only unique per ad group)"""
+        keywords = [
+            GoogleAdsKeyword(
+                ad_group_id=ad_group_ids[_gid(row['ad_group_id'])],
+                keyword_id=_gid(row['keyword_id']),
+                keyword_text=row['keyword_text'],
+                match_type=row['match_type'],
+                status=row['status'],
+                quality_score=row['quality_score'],
+            )
+            for row in rows
+            if _gid(row['ad_group_id']) in ad_group_ids
+        ]
+        self._upsert(
+            GoogleAdsKeyword, keywords,
+            unique_fields=['ad_group', 'keyword_id'],
+            update_fields=['keyword_text', 'match_type', 'status', 'quality_score'],
+        )
+        pk_to_ad_group = {pk: ad_group_id for ad_group_id, pk in ad_group_ids.items()}
+        return {
+            (pk_to_ad_group[ad_group_pk], keyword_id): pk
+            for ad_group_pk, keyword_id, pk in GoogleAdsKeyword.objects.filter(
+                ad_group_id__in=ad_group_ids.values()
+            ).values_list('ad_group_id', 'keyword_id', 'id').iterator(chunk_size=self.batch_size)
+        }
+
+    def load_id_maps(self, account: GoogleAdsAccount):
+        """(campaign, ad group, keyword) id maps of an already-synced account, without writing"""
+        campaign_ids = self.upsert_campaigns(account, [])
+        ad_group_ids = self.upsert_ad_groups(campaign_ids, [])
+        return campaign_ids, ad_group_ids, self.upsert_keywords(ad_group_ids, [])
+
+    def replace_performance(self, account: GoogleAdsAccount, start_date: date, end_date: date,
+                            rows: List[Dict[str, Any]], campaign_ids: Dict[str, int],
+                            ad_group_ids: Dict[str, int], keyword_ids: Dict[tuple, int],
+                            refresh_rollups: bool = True) -> int:
+        """
+        Replace the account's performance rows for a date range
+
+        Performance rows are keyed on nullable foreign keys (account-level rows have
+        no campaign), and NULLs never conflict, so an upsert would duplicate them.
+        The window is deleted and re-inserted instead, inside the caller's transaction,
+        and the daily rollups of the window are rebuilt from the new rows unless
+        ``refresh_rollups`` is False (callers writing many chunks refresh once at the end).
+        """
+        performance = []
+        for row in rows:
+            keyword_key = (_gid(row['ad_group_id']), _gid(row['keyword_id']))
+            performance.append(GoogleAdsPerformance(
+                account=account,
+                date=row['date'],
+                campaign_id=campaign_ids.get(_gid(row['campaign_id'])),
+                ad_group_id=ad_group_ids.get(_gid(row['ad_group_id'])),
+                keyword_id=keyword_ids.get(keyword_key),
+                impressions=row['impressions'],
+                clicks=row['clicks'],
+                cost_micros=row['cost_micros'],
+                conversions=row['conversions'],
+                conversion_value=row['conversion_value'],
+            ))
+
+        GoogleAdsPerformance.objects.filter(account=account, date__range=[start_date, end_date]).delete()
+        GoogleAdsPerformance.objects.bulk_create(performance, batch_size=self.batch_size)
+        if refresh_rollups:
+            self.refresh_rollups(account, start_date, end_date)
+        return len(performance)
+
+    def refresh_rollups(self, account: GoogleAdsAccount, start_date: date, end_date: date) -> None:
+        """Rebuild the account's daily account, campaign and keyword rollups for a date range"""
+        performance = GoogleAdsPerformance.objects.filter(
+            account=account, date__range=[start_date, end_date]
+        ).order_by()
+        sums = {f'sum_{metric}': Sum(metric) for metric in ROLLUP_METRICS}
+        levels = [
+            (DailyAccountRollup, performance.values('date')),
+            (DailyCampaignRollup, performance.filter(campaign__isnull=False).values('campaign_id', 'date')),
+            (DailyKeywordRollup, performance.filter(keyword__isnull=False).values('keyword_id', 'date')),
+        ]
+
+        with transaction.atomic():
+            for model, grouped in levels:
+                model.objects.filter(account=account, date__range=[start_date, end_date]).delete()
+                rollups = []
+                for row in grouped.annotate(**sums):
+                    metrics = {metric: row.pop(f'sum_{metric}') or 0 for metric in ROLLUP_METRICS}
+                    rollups.append(model(account=account, **row, **metrics))
+                model.objects.bulk_create(rollups, batch_size=self.batch_size)
+
+    def sync(self, account: GoogleAdsAccount, campaigns: List[Dict[str, Any]], ad_groups: List[Dict[str, Any]],
+             keywords: List[Dict[str, Any]], performance: Optional[List[Dict[str, Any]]] = None,
+             start_date: date = None, end_date: date = None) -> Dict[str, int]:
+        """
+        Write one account's fetched data in a single transaction
+
+        Returns:
+            Dict with the number of campaigns, ad groups and keywords fetched and
+            performance rows written
+        """
+        with transaction.atomic():
+            campaign_ids = self.upsert_campaigns(account, campaigns)
+            ad_group_ids = self.upsert_ad_groups(campaign_ids, ad_groups)
+            keyword_ids = self.upsert_keywords(ad_group_ids, keywords)
+            performance_synced = 0
+            if performance is not None:
+                performance_synced = self.replace_performance(
+                    account, start_date, end_date, performance, campaign_ids, ad_group_ids, keyword_ids
+                )
+
+        return {
+            'campaigns': len(campaigns),
+            'ad_groups': len(ad_groups),
+            'keywords': len(keywords),
+            'performance': performance_synced,
+        }
@@ -13,7 +13,9 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from .services import GoogleAdsService
-from .models import GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsPerformance
+from .models import (
+    GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsPerformance, DailyAccountRollup, DailyCampaignRollup
+)
 
 # Set up detailed logging
 logging.basicConfig(level=logging.DEBUG)
@@ -166,20 +168,18 @@ IMPORTANT RULES:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=30)
             
-            performance_data = GoogleAdsPerformance.objects.filter(
-                account__in=accounts,
-                date__range=[start_date, end_date]
-            ).select_related('campaign', 'ad_group', 'keyword')
+            # Daily rollups maintained by BulkSyncEngine, not the per-keyword rows
+            window = {'account__in': accounts, 'date__range': [start_date, end_date]}
             
-            # Aggregate data
-            total_spend = sum(p.cost_micros for p in performance_data) / 1000000
-            total_impressions = sum(p.impressions for p in performance_data)
-            total_clicks = sum(p.clicks for p in performance_data)
-            total_conversions = sum(p.conversions for p in performance_data)
+            totals = GoogleAdsService.aggregate_performance_totals(DailyAccountRollup.objects.filter(**window))
+            total_spend = totals['cost_micros'] / 1000000
+            total_impressions = totals['impressions']
+            total_clicks = totals['clicks']
+            total_conversions = totals['conversions']
             
             # Campaign performance
             from django.db import models
-            campaign_data = performance_data.values('campaign__campaign_name').annotate(
+            campaign_data = DailyCampaignRollup.objects.filter(**window).values('campaign__campaign_name').annotate(
                 spend=models.Sum('cost_micros'),
                 impressions=models.Sum('impressions'),
                 clicks=models.Sum('clicks'),
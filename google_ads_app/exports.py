@@ -0,0 +1,264 @@
+"""
+Performance data exports
+Streams GoogleAdsPerformance rows straight off the database cursor as CSV,
+Parquet or Arrow IPC, either into an HTTP response or to a file for background jobs
+"""
+
+import csv
+import io
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import GoogleAdsAccount, GoogleAdsPerformance
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+# (column name, queryset lookup); cost stays in micros so no precision is lost
+EXPORT_COLUMNS = (
+    ("date", "date"),
+    ("customer_id", "account__customer_id"),
+    ("campaign_id", "campaign__campaign_id"),
+    ("campaign_name", "campaign__campaign_name"),
+    ("ad_group_id", "ad_group__ad_group_id"),
+    ("ad_group_name", "ad_group__ad_group_name"),
+    ("keyword_id", "keyword__keyword_id"),
+    ("keyword_text", "keyword__keyword_text"),
+    ("impressions", "impressions"),
+    ("clicks", "clicks"),
+    ("cost_micros", "cost_micros"),
+    ("conversions", "conversions"),
+    ("conversion_value", "conversion_value"),
+)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def performance_export_queryset(user_id: int, filters: Dict[str, Any]):
+    """The user's performance rows matching PerformanceFilterSerializer data, newest first"""
+    queryset = GoogleAdsPerformance.objects.filter(
+        account__in=GoogleAdsAccount.objects.filter(user_id=user_id, is_active=True)
+    )
+    if filters.get('start_date'):
+        queryset = queryset.filter(date__gte=filters['start_date'])
+    if filters.get('end_date'):
+        queryset = queryset.filter(date__lte=filters['end_date'])
+    if filters.get('account'):
+        queryset = queryset.filter(account_id=filters['account'])
+    if filters.get('campaign'):
+        queryset = queryset.filter(campaign_id=filters['campaign'])
+    if filters.get('ad_group'):
+        queryset = queryset.filter(ad_group_id=filters['ad_group'])
+    if filters.get('keyword'):
+        queryset = queryset.filter(keyword_id=filters['keyword'])
+    return queryset.order_by('-date')
+
+
+class PerformanceExporter:
+    """Writes an export query in chunks; memory use is bounded by ``chunk_size`` rows"""
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = chunk_size or getattr(settings, 'PERFORMANCE_EXPORT_CHUNK_SIZE', 5000)
+
+    def _rows(self, queryset):
+        # values_list + iterator: tuples straight off a server-side cursor, no model instances
+        return queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS)).iterator(chunk_size=self.chunk_size)
+
+    def _batches(self, queryset) -> Iterator[list]:
+        batch = []
+        for row in self._rows(queryset):
+            batch.append(row)
+            if len(batch) >= self.chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_csv(self, queryset) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow([name for name, _ in EXPORT_COLUMNS])
+        for batch in self._batches(queryset):
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def _schema(self):
+        types = {
+            "date": pa.date32(), "impressions": pa.int64(), "clicks": pa.int64(), "cost_micros": pa.int64(),
+            "conversions": pa.float64(), "conversion_value": pa.float64(),
+        }
+        return pa.schema([(name, types.get(name, pa.string())) for name, _ in EXPORT_COLUMNS])
+
+    def _record_batch(self, schema, batch: list):
+        columns = list(zip(*batch))
+        arrays = []
+        for index, field in enumerate(schema):
+            values = columns[index]
+            if pa.types.is_string(field.type):
+                values = [None if value is None else str(value) for value in values]
+            elif pa.types.is_floating(field.type):
+                values = [None if value is None else float(value) for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _iter_arrow(self, queryset, open_writer) -> Iterator[bytes]:
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required for Parquet/Arrow exports; install with: pip install pyarrow")
+        schema = self._schema()
+        sink = io.BytesIO()
+        writer = open_writer(sink, schema)
+
+        def drain():
+            chunk = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return chunk
+
+        for batch in self._batches(queryset):
+            writer.write_batch(self._record_batch(schema, batch))
+            yield drain()
+        writer.close()
+        yield drain()
+
+    def iter_parquet(self, queryset) -> Iterator[bytes]:
+        # Each chunk becomes one row group, flushed as soon as it is written
+        return self._iter_arrow(queryset, lambda sink, schema: pq.ParquetWriter(sink, schema, compression="snappy"))
+
+    def iter_arrow(self, queryset) -> Iterator[bytes]:
+        return self._iter_arrow(queryset, lambda sink, schema: pa.ipc.new_stream(sink, schema))
+
+    def iter_export(self, queryset, export_format: str) -> Iterator[Any]:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{export_format}'; use one of {', '.join(EXPORT_FORMATS)}")
+        return getattr(self, f"iter_{export_format}")(queryset)
+
+    def write_file(self, queryset, export_format: str, path: str) -> int:
+        """Write an export to ``path`` (via a temp file); returns the file size"""
+        temp_path = f"{path}.tmp"
+        mode = "w" if export_format == "csv" else "wb"
+        with open(temp_path, mode, **({"encoding": "utf-8", "newline": ""} if mode == "w" else {})) as f:
+            for chunk in self.iter_export(queryset, export_format):
+                f.write(chunk)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+
+def export_dir() -> str:
+    path = getattr(settings, 'PERFORMANCE_EXPORT_DIR', 'performance_exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def export_path(job_id: str, export_format: str) -> str:
+    return os.path.join(export_dir(), f"performance_{job_id}.{EXPORT_FORMATS[export_format][1]}")
+
+
+def evict_expired_exports(max_age_seconds: int = None) -> Dict[str, int]:
+    """
+    Delete export files (and temp files of crashed writes) older than
+    ``max_age_seconds``, default PERFORMANCE_EXPORT_TTL_SECONDS; by then their job
+    record has expired and nothing links to them
+
+    Returns:
+        Dict with the number of files and bytes removed
+    """
+    if max_age_seconds is None:
+        max_age_seconds = getattr(settings, 'PERFORMANCE_EXPORT_TTL_SECONDS', 86400)
+    cutoff = time.time() - max_age_seconds
+    stats = {"files": 0, "bytes": 0}
+    with os.scandir(export_dir()) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.startswith("performance_"):
+                continue
+            try:
+                info = entry.stat()
+                if info.st_mtime >= cutoff:
+                    continue
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            stats["files"] += 1
+            stats["bytes"] += info.st_size
+    if stats["files"]:
+        logger.info(f"Evicted {stats['files']} expired performance exports ({stats['bytes']} bytes)")
+    return stats
+
+
+EXPORT_JOB_KEY_PREFIX = "performance_export"
+
+
+def get_export_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Background export job record, or None if unknown or expired"""
+    return cache.get(f"{EXPORT_JOB_KEY_PREFIX}:{job_id}")
+
+
+def is_stale(job: Dict[str, Any]) -> bool:
+    """
+    True if a running export has run longer than PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS;
+    its worker is assumed dead and a redelivered task may take it over
+    """
+    started_at = job.get("started_at") or job["updated_at"]
+    return time.time() - started_at > getattr(settings, 'PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS', 1800)
+
+
+def update_export_job(job_id: str, **fields) -> Optional[Dict[str, Any]]:
+    job = get_export_job(job_id)
+    if job is None:
+        return None
+    job.update(fields, updated_at=time.time())
+    cache.set(f"{EXPORT_JOB_KEY_PREFIX}:{job_id}", job, timeout=getattr(settings, 'PERFORMANCE_EXPORT_TTL_SECONDS', 86400))
+    return job
+
+
+def submit_export_job(user_id: int, params: Dict[str, Any], export_format: str) -> Dict[str, Any]:
+    """
+    Queue a background export (for ranges too large to stream in one request)
+
+    Args:
+        user_id: Requesting user
+        params: Raw filter query params (re-validated by the task)
+        export_format: 'csv', 'parquet' or 'arrow'
+    """
+    from .tasks import export_performance_data
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "user_id": user_id,
+        "status": "queued",
+        "format": export_format,
+        "params": params,
+        "size": None,
+        "error": None,
+        "attempts": 0,
+        "started_at": None,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    cache.set(f"{EXPORT_JOB_KEY_PREFIX}:{job_id}", job, timeout=getattr(settings, 'PERFORMANCE_EXPORT_TTL_SECONDS', 86400))
+    export_performance_data.apply_async(args=[job_id], task_id=job_id)
+    return job
+
+
+performance_exporter = PerformanceExporter()
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import random
 
+from google_ads_app.bulk_sync import BulkSyncEngine
 from google_ads_app.models import (
     GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsAdGroup,
     GoogleAdsKeyword, GoogleAdsPerformance
@@ -213,6 +214,9 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f'✅ Successfully created {performance_records_created} performance records')
             )
             
+            # Dashboards read the daily rollups, not the performance rows
+            BulkSyncEngine().refresh_rollups(account, start_date, end_date)
+            
             # Update account sync status
             account.last_sync_at = timezone.now()
             account.sync_status = 'completed'
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import logging
+
+from google_ads_app.exports import evict_expired_exports
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delete background performance export files whose job has expired (Daily cron job)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-hours',
+            type=int,
+            default=getattr(settings, 'PERFORMANCE_EXPORT_TTL_SECONDS', 86400) // 3600,
+            help='Remove export files older than this many hours (default: PERFORMANCE_EXPORT_TTL_SECONDS)',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('🧹 Evicting expired performance exports')
+        )
+        
+        try:
+            stats = evict_expired_exports(max_age_seconds=options['max_age_hours'] * 3600)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Removed {stats['files']} export files ({stats['bytes'] / (1024 * 1024):.1f} MB)"
+                )
+            )
+        except Exception as e:
+            logger.error(f"Performance export eviction failed: {e}")
+            self.stdout.write(
+                self.style.ERROR(f'❌ Performance export eviction failed: {e}')
+            )
+            raise
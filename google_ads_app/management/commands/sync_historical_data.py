@@ -29,6 +29,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Sync all active accounts',
         )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help='Fan the sync out as Celery tasks (one per account and date chunk) and return immediately',
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -75,6 +80,15 @@ class Command(BaseCommand):
                 )
                 return 0
             
+            if options['parallel'] and not options['dry_run']:
+                from google_ads_app.tasks import start_multi_account_sync
+                
+                run_id = start_multi_account_sync(list(accounts.values_list('id', flat=True)), weeks)
+                self.stdout.write(
+                    self.style.SUCCESS(f'🚀 Queued parallel sync run {run_id} ({accounts.count()} accounts)')
+                )
+                return 0
+            
             # Perform sync for each account
             total_success = 0
             total_failed = 0
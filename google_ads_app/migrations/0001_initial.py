@@ -0,0 +1,325 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+
+def rate(numerator, denominator, scale=1.0):
+    return Case(
+        When(**{f"{denominator}__gt": 0},
+             then=Cast(F(numerator), FloatField()) * Value(scale) / Cast(F(denominator), FloatField())),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoogleAdsAccount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "customer_id",
+                    models.CharField(help_text="Google Ads customer ID (digits only)", max_length=20, unique=True),
+                ),
+                ("account_name", models.CharField(max_length=255)),
+                ("currency_code", models.CharField(default="USD", max_length=3)),
+                ("time_zone", models.CharField(default="UTC", max_length=64)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "sync_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("syncing", "Syncing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("last_sync_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="google_ads_accounts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["account_name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsCampaign",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("campaign_id", models.CharField(max_length=50)),
+                ("campaign_name", models.CharField(max_length=255)),
+                ("campaign_status", models.CharField(max_length=20)),
+                ("campaign_type", models.CharField(max_length=50)),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("budget_amount", models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ("budget_type", models.CharField(blank=True, max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="campaigns",
+                        to="google_ads_app.googleadsaccount",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["campaign_name"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("account", "campaign_id"), name="gads_campaign_account_id_uniq"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsAdGroup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("ad_group_id", models.CharField(max_length=50)),
+                ("ad_group_name", models.CharField(max_length=255)),
+                ("status", models.CharField(max_length=20)),
+                ("type", models.CharField(max_length=50)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ad_groups",
+                        to="google_ads_app.googleadscampaign",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["ad_group_name"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("campaign", "ad_group_id"), name="gads_adgroup_campaign_id_uniq"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsKeyword",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("keyword_id", models.CharField(max_length=50)),
+                ("keyword_text", models.CharField(max_length=255)),
+                ("match_type", models.CharField(max_length=20)),
+                ("status", models.CharField(max_length=20)),
+                ("quality_score", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "ad_group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="keywords",
+                        to="google_ads_app.googleadsadgroup",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["keyword_text"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("ad_group", "keyword_id"), name="gads_keyword_adgroup_id_uniq"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsPerformance",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("impressions", models.BigIntegerField(default=0)),
+                ("clicks", models.BigIntegerField(default=0)),
+                ("cost_micros", models.BigIntegerField(default=0)),
+                ("conversions", models.FloatField(default=0)),
+                ("conversion_value", models.FloatField(default=0)),
+                (
+                    "ctr",
+                    models.GeneratedField(
+                        db_persist=True, expression=rate("clicks", "impressions"), output_field=models.FloatField()
+                    ),
+                ),
+                (
+                    "cpc",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=rate("cost_micros", "clicks", 1 / 1_000_000),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                (
+                    "cpm",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=rate("cost_micros", "impressions", 1 / 1_000),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                (
+                    "conversion_rate",
+                    models.GeneratedField(
+                        db_persist=True, expression=rate("conversions", "clicks"), output_field=models.FloatField()
+                    ),
+                ),
+                (
+                    "roas",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=rate("conversion_value", "cost_micros", 1_000_000),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="performance",
+                        to="google_ads_app.googleadsaccount",
+                    ),
+                ),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="performance",
+                        to="google_ads_app.googleadscampaign",
+                    ),
+                ),
+                (
+                    "ad_group",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="performance",
+                        to="google_ads_app.googleadsadgroup",
+                    ),
+                ),
+                (
+                    "keyword",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="performance",
+                        to="google_ads_app.googleadskeyword",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [models.Index(fields=["account", "date"], name="gads_perf_account_date_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsReport",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=255)),
+                ("report_type", models.CharField(max_length=50)),
+                ("status", models.CharField(default="active", max_length=20)),
+                ("schedule", models.CharField(blank=True, max_length=50)),
+                ("last_run", models.DateTimeField(blank=True, null=True)),
+                ("next_run", models.DateTimeField(blank=True, null=True)),
+                ("parameters", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="google_ads_reports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="GoogleAdsAlert",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("alert_type", models.CharField(max_length=50)),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[("low", "Low"), ("medium", "Medium"), ("high", "High"), ("critical", "Critical")],
+                        default="medium",
+                        max_length=10,
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("message", models.TextField()),
+                ("is_read", models.BooleanField(default=False)),
+                ("is_resolved", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alerts",
+                        to="google_ads_app.googleadsaccount",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="DataSyncLog",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("sync_type", models.CharField(max_length=30)),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("results", models.JSONField(blank=True, default=dict)),
+                ("status", models.CharField(max_length=20)),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_logs",
+                        to="google_ads_app.googleadsaccount",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def metric_fields():
+    return [
+        ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+        ("date", models.DateField()),
+        ("impressions", models.BigIntegerField(default=0)),
+        ("clicks", models.BigIntegerField(default=0)),
+        ("cost_micros", models.BigIntegerField(default=0)),
+        ("conversions", models.FloatField(default=0)),
+        ("conversion_value", models.FloatField(default=0)),
+        (
+            "account",
+            models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="google_ads_app.googleadsaccount",
+            ),
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("google_ads_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAccountRollup",
+            fields=metric_fields(),
+            options={
+                "ordering": ["-date"],
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(fields=("account", "date"), name="gads_account_rollup_uniq"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyCampaignRollup",
+            fields=metric_fields() + [
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="google_ads_app.googleadscampaign",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "abstract": False,
+                "indexes": [models.Index(fields=["account", "date"], name="gads_campaign_rollup_acct_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("campaign", "date"), name="gads_campaign_rollup_uniq"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyKeywordRollup",
+            fields=metric_fields() + [
+                (
+                    "keyword",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="google_ads_app.googleadskeyword",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "abstract": False,
+                "indexes": [models.Index(fields=["account", "date"], name="gads_keyword_rollup_acct_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("keyword", "date"), name="gads_keyword_rollup_uniq"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,313 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+
+def _rate(numerator: str, denominator: str, scale: float = 1.0):
+    """numerator * scale / denominator as a float, 0 when the denominator is 0"""
+    return Case(
+        When(**{f"{denominator}__gt": 0},
+             then=Cast(F(numerator), FloatField()) * Value(scale) / Cast(F(denominator), FloatField())),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+class GoogleAdsAccount(models.Model):
+    """Google Ads customer account linked to a user"""
+    SYNC_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('syncing', 'Syncing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='google_ads_accounts')
+    customer_id = models.CharField(max_length=20, unique=True, help_text="Google Ads customer ID (digits only)")
+    account_name = models.CharField(max_length=255)
+    currency_code = models.CharField(max_length=3, default='USD')
+    time_zone = models.CharField(max_length=64, default='UTC')
+    is_active = models.BooleanField(default=True)
+    sync_status = models.CharField(max_length=20, choices=SYNC_STATUS_CHOICES, default='pending')
+    last_sync_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['account_name']
+
+    def __str__(self):
+        return f"{self.account_name} ({self.customer_id})"
+
+
+class GoogleAdsCampaign(models.Model):
+    """Campaign of a Google Ads account"""
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, related_name='campaigns')
+    campaign_id = models.CharField(max_length=50)
+    campaign_name = models.CharField(max_length=255)
+    campaign_status = models.CharField(max_length=20)
+    campaign_type = models.CharField(max_length=50)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    budget_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    budget_type = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['campaign_name']
+        # Conflict target of BulkSyncEngine.upsert_campaigns
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'campaign_id'], name='gads_campaign_account_id_uniq'),
+        ]
+
+    def __str__(self):
+        return self.campaign_name
+
+
+class GoogleAdsAdGroup(models.Model):
+    """Ad group of a campaign"""
+    campaign = models.ForeignKey(GoogleAdsCampaign, on_delete=models.CASCADE, related_name='ad_groups')
+    ad_group_id = models.CharField(max_length=50)
+    ad_group_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20)
+    type = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['ad_group_name']
+        # Conflict target of BulkSyncEngine.upsert_ad_groups
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'ad_group_id'], name='gads_adgroup_campaign_id_uniq'),
+        ]
+
+    def __str__(self):
+        return self.ad_group_name
+
+
+class GoogleAdsKeyword(models.Model):
+    """Keyword criterion of an ad group (criterion ids are only unique per ad group)"""
+    ad_group = models.ForeignKey(GoogleAdsAdGroup, on_delete=models.CASCADE, related_name='keywords')
+    keyword_id = models.CharField(max_length=50)
+    keyword_text = models.CharField(max_length=255)
+    match_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    quality_score = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['keyword_text']
+        # Conflict target of BulkSyncEngine.upsert_keywords
+        constraints = [
+            models.UniqueConstraint(fields=['ad_group', 'keyword_id'], name='gads_keyword_adgroup_id_uniq'),
+        ]
+
+    def __str__(self):
+        return self.keyword_text
+
+
+class GoogleAdsPerformance(models.Model):
+    """
+    Daily metrics at account, campaign, ad group or keyword level
+
+    The rate columns are generated by the database, so rows written with
+    bulk_create (which skips save()) still get them.
+    """
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, related_name='performance')
+    campaign = models.ForeignKey(GoogleAdsCampaign, on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='performance')
+    ad_group = models.ForeignKey(GoogleAdsAdGroup, on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='performance')
+    keyword = models.ForeignKey(GoogleAdsKeyword, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='performance')
+    date = models.DateField()
+    impressions = models.BigIntegerField(default=0)
+    clicks = models.BigIntegerField(default=0)
+    cost_micros = models.BigIntegerField(default=0)
+    conversions = models.FloatField(default=0)
+    conversion_value = models.FloatField(default=0)
+    ctr = models.GeneratedField(
+        expression=_rate('clicks', 'impressions'), output_field=FloatField(), db_persist=True
+    )
+    cpc = models.GeneratedField(
+        expression=_rate('cost_micros', 'clicks', 1 / 1_000_000), output_field=FloatField(), db_persist=True
+    )
+    cpm = models.GeneratedField(
+        expression=_rate('cost_micros', 'impressions', 1 / 1_000), output_field=FloatField(), db_persist=True
+    )
+    conversion_rate = models.GeneratedField(
+        expression=_rate('conversions', 'clicks'), output_field=FloatField(), db_persist=True
+    )
+    roas = models.GeneratedField(
+        expression=_rate('conversion_value', 'cost_micros', 1_000_000), output_field=FloatField(), db_persist=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date']
+        indexes = [
+            # Date-window deletes in BulkSyncEngine.replace_performance and dashboard ranges
+            models.Index(fields=['account', 'date'], name='gads_perf_account_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.date}"
+
+
+class DailyRollup(models.Model):
+    """
+    Daily metric sums maintained by BulkSyncEngine.refresh_rollups
+
+    Dashboards and the chat context read these instead of aggregating
+    GoogleAdsPerformance, which has one row per keyword per day.
+    """
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    impressions = models.BigIntegerField(default=0)
+    clicks = models.BigIntegerField(default=0)
+    cost_micros = models.BigIntegerField(default=0)
+    conversions = models.FloatField(default=0)
+    conversion_value = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['-date']
+
+
+class DailyAccountRollup(DailyRollup):
+    """All of an account's performance rows for one day"""
+
+    class Meta(DailyRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'date'], name='gads_account_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.date}"
+
+
+class DailyCampaignRollup(DailyRollup):
+    """A campaign's performance rows (all its ad groups and keywords) for one day"""
+    campaign = models.ForeignKey(GoogleAdsCampaign, on_delete=models.CASCADE, related_name='daily_rollups')
+
+    class Meta(DailyRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'date'], name='gads_campaign_rollup_uniq'),
+        ]
+        indexes = [
+            # Window deletes in refresh_rollups and dashboard ranges
+            models.Index(fields=['account', 'date'], name='gads_campaign_rollup_acct_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} {self.date}"
+
+
+class DailyKeywordRollup(DailyRollup):
+    """A keyword's performance rows for one day"""
+    keyword = models.ForeignKey(GoogleAdsKeyword, on_delete=models.CASCADE, related_name='daily_rollups')
+
+    class Meta(DailyRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'date'], name='gads_keyword_rollup_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['account', 'date'], name='gads_keyword_rollup_acct_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.keyword_id} {self.date}"
+
+
+class GoogleAdsReport(models.Model):
+    """Saved or scheduled report definition"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='google_ads_reports')
+    name = models.CharField(max_length=255)
+    report_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, default='active')
+    schedule = models.CharField(max_length=50, blank=True)
+    last_run = models.DateTimeField(null=True, blank=True)
+    next_run = models.DateTimeField(null=True, blank=True)
+    parameters = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
+
+
+class GoogleAdsAlert(models.Model):
+    """Alert raised for an account (budget, performance drops, policy issues)"""
+    SEVERITY_CHOICES = [
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+        ('critical', 'Critical'),
+    ]
+
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, related_name='alerts')
+    alert_type = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default='medium')
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    is_read = models.BooleanField(default=False)
+    is_resolved = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.title
+
+
+class DataSyncLog(models.Model):
+    """Record of one sync run (daily, historical or forced)"""
+    sync_type = models.CharField(max_length=30)
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='sync_logs')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    results = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20)
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.sync_type} {self.status} ({self.created_at:%Y-%m-%d %H:%M})"
+
+    def get_summary(self):
+        return self.results or {}
+
+
+class SyncWatermark(models.Model):
+    """
+    How far the last successful sync of one entity of an account got
+
+    ``synced_at`` is set for campaigns, ad groups and keywords (lower bound of
+    the next change_status query); ``synced_until`` for performance (last
+    synced date). See sync_watermarks.SyncWatermarks.
+    """
+    account = models.ForeignKey(GoogleAdsAccount, on_delete=models.CASCADE, related_name='sync_watermarks')
+    entity = models.CharField(max_length=20)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    synced_until = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'entity'], name='gads_sync_watermark_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.entity}"
@@ -0,0 +1,128 @@
+from rest_framework import serializers
+
+from .models import (
+    GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsAdGroup,
+    GoogleAdsKeyword, GoogleAdsPerformance, GoogleAdsReport, GoogleAdsAlert
+)
+
+
+class GoogleAdsAccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsAccount
+        fields = [
+            'id', 'customer_id', 'account_name', 'currency_code', 'time_zone',
+            'is_active', 'sync_status', 'last_sync_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['sync_status', 'last_sync_at', 'created_at', 'updated_at']
+
+
+class GoogleAdsCampaignSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsCampaign
+        fields = [
+            'id', 'account', 'campaign_id', 'campaign_name', 'campaign_status', 'campaign_type',
+            'start_date', 'end_date', 'budget_amount', 'budget_type', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class GoogleAdsAdGroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsAdGroup
+        fields = ['id', 'campaign', 'ad_group_id', 'ad_group_name', 'status', 'type', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class GoogleAdsKeywordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsKeyword
+        fields = [
+            'id', 'ad_group', 'keyword_id', 'keyword_text', 'match_type', 'status',
+            'quality_score', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class GoogleAdsPerformanceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsPerformance
+        fields = [
+            'id', 'account', 'campaign', 'ad_group', 'keyword', 'date',
+            'impressions', 'clicks', 'cost_micros', 'conversions', 'conversion_value',
+            'ctr', 'cpc', 'cpm', 'conversion_rate', 'roas'
+        ]
+        read_only_fields = fields
+
+
+class GoogleAdsReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsReport
+        fields = [
+            'id', 'name', 'report_type', 'status', 'schedule', 'last_run', 'next_run',
+            'parameters', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['last_run', 'next_run', 'created_at', 'updated_at']
+
+
+class GoogleAdsAlertSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoogleAdsAlert
+        fields = [
+            'id', 'account', 'alert_type', 'severity', 'title', 'message',
+            'is_read', 'is_resolved', 'created_at', 'resolved_at'
+        ]
+        read_only_fields = ['created_at', 'resolved_at']
+
+
+class DashboardMetricsSerializer(serializers.Serializer):
+    """Output of GoogleAdsService.get_dashboard_metrics"""
+    total_accounts = serializers.IntegerField()
+    total_campaigns = serializers.IntegerField()
+    total_spend = serializers.FloatField()
+    total_impressions = serializers.IntegerField()
+    total_clicks = serializers.IntegerField()
+    total_conversions = serializers.FloatField()
+    total_conversion_value = serializers.FloatField()
+    overall_ctr = serializers.FloatField()
+    overall_cpc = serializers.FloatField()
+    overall_roas = serializers.FloatField()
+    performance_trend = serializers.ListField(child=serializers.DictField())
+    top_campaigns = serializers.ListField(child=serializers.DictField())
+    top_keywords = serializers.ListField(child=serializers.DictField())
+    warning = serializers.CharField(required=False)
+
+
+class AccountSyncSerializer(serializers.Serializer):
+    customer_id = serializers.CharField(max_length=20)
+    force_sync = serializers.BooleanField(required=False, default=False)
+
+
+class CampaignCreateSerializer(serializers.Serializer):
+    account = serializers.IntegerField()
+    name = serializers.CharField(max_length=255)
+    type = serializers.CharField(max_length=50, default='SEARCH')
+    budget_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    budget_type = serializers.ChoiceField(choices=['STANDARD', 'ACCELERATED'], default='STANDARD')
+    start_date = serializers.DateField()
+    status = serializers.ChoiceField(choices=['ENABLED', 'PAUSED'], default='ENABLED')
+
+
+class KeywordCreateSerializer(serializers.Serializer):
+    ad_group = serializers.IntegerField()
+    keyword_text = serializers.CharField(max_length=255)
+    match_type = serializers.ChoiceField(choices=['EXACT', 'PHRASE', 'BROAD'], default='BROAD')
+
+
+class PerformanceFilterSerializer(serializers.Serializer):
+    """Query parameters of PerformanceExportView (also stored on background export jobs)"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    account = serializers.IntegerField(required=False)
+    campaign = serializers.IntegerField(required=False)
+    ad_group = serializers.IntegerField(required=False)
+    keyword = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('start_date') and attrs.get('end_date') and attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError('start_date must be on or before end_date')
+        return attrs
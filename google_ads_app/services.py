@@ -8,8 +8,11 @@ from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 from .models import (
     GoogleAdsAccount, GoogleAdsCampaign, GoogleAdsAdGroup,
-    GoogleAdsKeyword, GoogleAdsPerformance
+    GoogleAdsKeyword, GoogleAdsPerformance,
+    DailyAccountRollup, DailyCampaignRollup, DailyKeywordRollup
 )
+from .bulk_sync import BulkSyncEngine
+from .sync_watermarks import ENTITY_RESOURCE_TYPES, sync_watermarks
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,31 @@ logger = logging.getLogger(__name__)
 class GoogleAdsService:
     """Service class for Google Ads API operations"""
     
-    def __init__(self, customer_id: str = None):
+    @staticmethod
+    def aggregate_performance_totals(performance_data) -> Dict[str, Any]:
+        """Sum the headline metrics of a GoogleAdsPerformance or daily rollup queryset in a single query"""
+        totals = performance_data.aggregate(
+            cost_micros=models.Sum('cost_micros'),
+            impressions=models.Sum('impressions'),
+            clicks=models.Sum('clicks'),
+            conversions=models.Sum('conversions'),
+            conversion_value=models.Sum('conversion_value')
+        )
+        return {metric: value or 0 for metric, value in totals.items()}
+    
+    def __init__(self, customer_id: str = None, strict: bool = False, before_request=None):
+        """
+        Args:
+            customer_id: Default customer
+            strict: Re-raise GoogleAdsException from the read methods instead of
+                logging it and returning an empty result, so callers can tell a
+                failed fetch from an empty account
+            before_request: Called before every Google Ads API request (e.g. to
+                take a rate limit slot); may raise to abort the request
+        """
         self.customer_id = customer_id
+        self.strict = strict
+        self.before_request = before_request
         self.client = None
         self._initialize_client()
     
@@ -39,10 +65,18 @@ class GoogleAdsService:
             logger.error(f"Failed to initialize Google Ads client: {e}")
             raise
     
+    def _search(self, customer_id: str, query: str):
+        """GoogleAdsService.search with the before_request hook applied"""
+        if self.before_request:
+            self.before_request()
+        return self.client.get_service("GoogleAdsService").search(customer_id=customer_id, query=query)
+    
     def get_customer_info(self, customer_id: str) -> Optional[Dict[str, Any]]:
         """Get customer information from Google Ads"""
         try:
             customer_service = self.client.get_service("CustomerService")
+            if self.before_request:
+                self.before_request()
             customer = customer_service.get_customer(
                 resource_name=f"customers/{customer_id}"
             )
@@ -57,12 +91,13 @@ class GoogleAdsService:
             }
         except GoogleAdsException as e:
             logger.error(f"Failed to get customer info: {e}")
+            if self.strict:
+                raise
             return None
     
     def list_campaigns(self, customer_id: str) -> List[Dict[str, Any]]:
         """List all campaigns for a customer"""
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
             query = """
                 SELECT 
                     campaign.id,
@@ -79,10 +114,7 @@ class GoogleAdsService:
             """
             
             campaigns = []
-            for row in ga_service.search(
-                customer_id=customer_id,
-                query=query
-            ):
+            for row in self._search(customer_id, query):
                 campaign = row.campaign
                 budget = row.campaign_budget
                 
@@ -100,13 +132,13 @@ class GoogleAdsService:
             return campaigns
         except GoogleAdsException as e:
             logger.error(f"Failed to list campaigns: {e}")
+            if self.strict:
+                raise
             return []
     
     def list_ad_groups(self, customer_id: str, campaign_id: str = None) -> List[Dict[str, Any]]:
         """List ad groups for a customer or specific campaign"""
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             if campaign_id:
                 query = f"""
                     SELECT 
@@ -134,10 +166,7 @@ class GoogleAdsService:
                 """
             
             ad_groups = []
-            for row in ga_service.search(
-                customer_id=customer_id,
-                query=query
-            ):
+            for row in self._search(customer_id, query):
                 ad_group = row.ad_group
                 campaign = row.campaign
                 
@@ -152,13 +181,13 @@ class GoogleAdsService:
             return ad_groups
         except GoogleAdsException as e:
             logger.error(f"Failed to list ad groups: {e}")
+            if self.strict:
+                raise
             return []
     
     def list_keywords(self, customer_id: str, ad_group_id: str = None) -> List[Dict[str, Any]]:
         """List keywords for a customer or specific ad group"""
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             if ad_group_id:
                 query = f"""
                     SELECT 
@@ -190,10 +219,7 @@ class GoogleAdsService:
                 """
             
             keywords = []
-            for row in ga_service.search(
-                customer_id=customer_id,
-                query=query
-            ):
+            for row in self._search(customer_id, query):
                 criterion = row.ad_group_criterion
                 keyword = criterion.keyword
                 ad_group = row.ad_group
@@ -211,6 +237,8 @@ class GoogleAdsService:
             return keywords
         except GoogleAdsException as e:
             logger.error(f"Failed to list keywords: {e}")
+            if self.strict:
+                raise
             return []
     
     def get_performance_data(self, customer_id: str, start_date: str, end_date: str,
@@ -218,8 +246,6 @@ class GoogleAdsService:
                            keyword_id: str = None) -> List[Dict[str, Any]]:
         """Get performance data for specified criteria"""
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             # Build query based on filters
             select_fields = [
                 'customer.id',
@@ -254,10 +280,7 @@ class GoogleAdsService:
             """
             
             performance_data = []
-            for row in ga_service.search(
-                customer_id=customer_id,
-                query=query
-            ):
+            for row in self._search(customer_id, query):
                 customer = row.customer
                 campaign = row.campaign
                 ad_group = row.ad_group
@@ -281,6 +304,8 @@ class GoogleAdsService:
             return performance_data
         except GoogleAdsException as e:
             logger.error(f"Failed to get performance data: {e}")
+            if self.strict:
+                raise
             return []
     
     def create_campaign(self, customer_id: str, campaign_data: Dict[str, Any]) -> Optional[str]:
@@ -327,8 +352,55 @@ class GoogleAdsService:
             logger.error(f"Failed to update campaign status: {e}")
             return False
     
-    def sync_account_data(self, customer_id: str, user_id: int) -> Dict[str, Any]:
-        """Sync all account data from Google Ads"""
+    def get_changed_resource_types(self, customer_id: str, since: datetime) -> Optional[set]:
+        """
+        Resource types changed since a point in time, from change_status
+        
+        Returns:
+            Set of resource type names, or None when the change list is incomplete
+            (result limit reached or query failed) and a full sync is needed
+        """
+        limit = 10000
+        try:
+            query = f"""
+                SELECT 
+                    change_status.resource_type,
+                    change_status.last_change_date_time
+                FROM change_status
+                WHERE change_status.last_change_date_time >= '{since.strftime('%Y-%m-%d %H:%M:%S')}'
+                ORDER BY change_status.last_change_date_time
+                LIMIT {limit}
+            """
+            
+            changed = set()
+            rows = 0
+            for row in self._search(customer_id, query):
+                changed.add(row.change_status.resource_type.name)
+                rows += 1
+            
+            return None if rows >= limit else changed
+        except GoogleAdsException as e:
+            logger.error(f"Failed to get change status: {e}")
+            if self.strict:
+                raise
+            return None
+    
+    def _fetch_strict(self, fetch, *args, **kwargs):
+        """Call a read method with GoogleAdsException re-raised, whatever self.strict is"""
+        strict, self.strict = self.strict, True
+        try:
+            return fetch(*args, **kwargs)
+        finally:
+            self.strict = strict
+    
+    def sync_account_data(self, customer_id: str, user_id: int, full: bool = False) -> Dict[str, Any]:
+        """
+        Sync account data from Google Ads
+        
+        Incremental by default: entity levels are only re-fetched when change_status
+        reports changes since their watermark, and performance data only from the
+        last synced date minus the restatement window. ``full=True`` ignores the watermarks.
+        """
         try:
             # Get customer info
             customer_info = self.get_customer_info(customer_id)
@@ -352,134 +424,81 @@ class GoogleAdsService:
                 account.time_zone = customer_info['time_zone']
                 account.save()
             
-            # Sync campaigns
-            campaigns_data = self.list_campaigns(customer_id)
-            campaigns_synced = 0
-            
-            for campaign_data in campaigns_data:
-                campaign, created = GoogleAdsCampaign.objects.get_or_create(
-                    account=account,
-                    campaign_id=campaign_data['campaign_id'],
-                    defaults={
-                        'campaign_name': campaign_data['campaign_name'],
-                        'campaign_status': campaign_data['status'],
-                        'campaign_type': campaign_data['type'],
-                        'start_date': campaign_data['start_date'],
-                        'end_date': campaign_data['end_date'],
-                        'budget_amount': campaign_data['budget_amount'],
-                        'budget_type': campaign_data['budget_type'],
-                    }
+            if full:
+                sync_watermarks.reset(account.id)
+            
+            # Entity levels changed since their watermarks; None means fetch everything.
+            # change_status times are in the account's time zone, hence the one-day slack.
+            sync_started = timezone.now()
+            since = [sync_watermarks.entity_since(account.id, entity, sync_started) for entity in ENTITY_RESOURCE_TYPES]
+            changed = None
+            if all(since):
+                changed = self.get_changed_resource_types(customer_id, min(since) - timedelta(days=1))
+            
+            def needs_fetch(entity):
+                return changed is None or bool(changed.intersection(ENTITY_RESOURCE_TYPES[entity]))
+            
+            # One GAQL query per level; foreign keys are resolved in memory by the engine.
+            # A level is only complete if it and every level above it were fetched, since
+            # rows whose parent is missing are skipped.
+            fetchers = {
+                'campaigns': self.list_campaigns,
+                'ad_groups': self.list_ad_groups,
+                'keywords': self.list_keywords,
+            }
+            entity_data = {}
+            complete = []
+            parents_complete = True
+            for entity in ENTITY_RESOURCE_TYPES:
+                entity_data[entity] = []
+                fetched = True
+                if needs_fetch(entity):
+                    try:
+                        entity_data[entity] = self._fetch_strict(fetchers[entity], customer_id)
+                    except GoogleAdsException:
+                        fetched = False
+                parents_complete = parents_complete and fetched
+                if parents_complete:
+                    complete.append(entity)
+            
+            # Performance data: new days plus the days Google may still restate
+            start_date, end_date = sync_watermarks.performance_window(account.id, timezone.now().date())
+            
+            # A failed fetch must not replace the stored window with nothing
+            try:
+                performance_data = self._fetch_strict(
+                    self.get_performance_data,
+                    customer_id,
+                    start_date.strftime('%Y-%m-%d'),
+                    end_date.strftime('%Y-%m-%d')
                 )
-                
-                if not created:
-                    campaign.campaign_name = campaign_data['campaign_name']
-                    campaign.campaign_status = campaign_data['status']
-                    campaign.campaign_type = campaign_data['type']
-                    campaign.start_date = campaign_data['start_date']
-                    campaign.end_date = campaign_data['end_date']
-                    campaign.budget_amount = campaign_data['budget_amount']
-                    campaign.budget_type = campaign_data['budget_type']
-                    campaign.save()
-                
-                campaigns_synced += 1
-                
-                # Sync ad groups for this campaign
-                ad_groups_data = self.list_ad_groups(customer_id, campaign_data['campaign_id'])
-                for ad_group_data in ad_groups_data:
-                    ad_group, created = GoogleAdsAdGroup.objects.get_or_create(
-                        campaign=campaign,
-                        ad_group_id=ad_group_data['ad_group_id'],
-                        defaults={
-                            'ad_group_name': ad_group_data['ad_group_name'],
-                            'status': ad_group_data['status'],
-                            'type': ad_group_data['type'],
-                        }
-                    )
-                    
-                    if not created:
-                        ad_group.ad_group_name = ad_group_data['ad_group_name']
-                        ad_group.status = ad_group_data['status']
-                        ad_group.type = ad_group_data['type']
-                        ad_group.save()
-                    
-                    # Sync keywords for this ad group
-                    keywords_data = self.list_keywords(customer_id, ad_group_data['ad_group_id'])
-                    for keyword_data in keywords_data:
-                        keyword, created = GoogleAdsKeyword.objects.get_or_create(
-                            ad_group=ad_group,
-                            keyword_id=keyword_data['keyword_id'],
-                            defaults={
-                                'keyword_text': keyword_data['keyword_text'],
-                                'match_type': keyword_data['match_type'],
-                                'status': keyword_data['status'],
-                                'quality_score': keyword_data['quality_score'],
-                            }
-                        )
-                        
-                        if not created:
-                            keyword.keyword_text = keyword_data['keyword_text']
-                            keyword.match_type = keyword_data['match_type']
-                            keyword.status = keyword_data['status']
-                            keyword.quality_score = keyword_data['quality_score']
-                            keyword.save()
-            
-            # Sync performance data for last 30 days
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=30)
-            
-            performance_data = self.get_performance_data(
-                customer_id,
-                start_date.strftime('%Y-%m-%d'),
-                end_date.strftime('%Y-%m-%d')
-            )
+            except GoogleAdsException:
+                performance_data = None
             
-            performance_synced = 0
-            for perf_data in performance_data:
-                # Get related objects
-                try:
-                    campaign = GoogleAdsCampaign.objects.get(
-                        account=account,
-                        campaign_id=perf_data['campaign_id']
-                    ) if perf_data['campaign_id'] else None
-                    
-                    ad_group = GoogleAdsAdGroup.objects.get(
-                        campaign=campaign,
-                        ad_group_id=perf_data['ad_group_id']
-                    ) if perf_data['ad_group_id'] and campaign else None
-                    
-                    keyword = GoogleAdsKeyword.objects.get(
-                        ad_group=ad_group,
-                        keyword_id=perf_data['keyword_id']
-                    ) if perf_data['keyword_id'] and ad_group else None
-                    
-                    # Create or update performance record
-                    performance, created = GoogleAdsPerformance.objects.get_or_create(
-                        account=account,
-                        date=perf_data['date'],
-                        campaign=campaign,
-                        ad_group=ad_group,
-                        keyword=keyword,
-                        defaults={
-                            'impressions': perf_data['impressions'],
-                            'clicks': perf_data['clicks'],
-                            'cost_micros': perf_data['cost_micros'],
-                            'conversions': perf_data['conversions'],
-                            'conversion_value': perf_data['conversion_value'],
-                        }
-                    )
-                    
-                    if not created:
-                        performance.impressions = perf_data['impressions']
-                        performance.clicks = perf_data['clicks']
-                        performance.cost_micros = perf_data['cost_micros']
-                        performance.conversions = perf_data['conversions']
-                        performance.conversion_value = perf_data['conversion_value']
-                        performance.save()
-                    
-                    performance_synced += 1
-                except Exception as e:
-                    logger.warning(f"Failed to sync performance data: {e}")
-                    continue
+            stats = BulkSyncEngine().sync(
+                account, entity_data['campaigns'], entity_data['ad_groups'], entity_data['keywords'],
+                performance=performance_data, start_date=start_date, end_date=end_date
+            )
+            campaigns_synced = stats['campaigns']
+            performance_synced = stats['performance']
+            
+            # Levels that failed keep their watermark and are fetched again next time
+            for entity in complete:
+                sync_watermarks.set(account.id, entity, sync_started)
+            failed = [entity for entity in ENTITY_RESOURCE_TYPES if entity not in complete]
+            if performance_data is None:
+                failed.append('performance')
+            else:
+                sync_watermarks.set(account.id, 'performance', end_date)
+            if failed:
+                return {
+                    'success': False,
+                    'account_synced': True,
+                    'campaigns_synced': campaigns_synced,
+                    'performance_synced': performance_synced,
+                    'failed': failed,
+                    'error': f"Failed to fetch {', '.join(failed)}; their stored data was left unchanged",
+                }
             
             return {
                 'success': True,
@@ -499,10 +518,12 @@ class GoogleAdsService:
             end_date = timezone.now().date()
             start_date = end_date - timedelta(days=days)
             
-            # Get user's accounts
-            accounts = GoogleAdsAccount.objects.filter(user_id=user_id, is_active=True)
+            # Get user's accounts (ids fetched once and reused by every query below)
+            account_ids = list(
+                GoogleAdsAccount.objects.filter(user_id=user_id, is_active=True).values_list('id', flat=True)
+            )
             
-            if not accounts.exists():
+            if not account_ids:
                 return {
                     'total_accounts': 0,
                     'total_campaigns': 0,
@@ -519,33 +540,17 @@ class GoogleAdsService:
                     'top_keywords': []
                 }
             
-            # Aggregate performance data
-            performance_data = GoogleAdsPerformance.objects.filter(
-                account__in=accounts,
-                date__range=[start_date, end_date]
-            )
+            # Read the daily rollups maintained by BulkSyncEngine, not the per-keyword rows
+            window = {'account_id__in': account_ids, 'date__range': [start_date, end_date]}
+            account_rollups = DailyAccountRollup.objects.filter(**window)
             
             # Calculate totals
-            total_spend_micros = performance_data.aggregate(
-                total=models.Sum('cost_micros')
-            )['total'] or 0
-            total_spend = total_spend_micros / 1000000
-            
-            total_impressions = performance_data.aggregate(
-                total=models.Sum('impressions')
-            )['total'] or 0
-            
-            total_clicks = performance_data.aggregate(
-                total=models.Sum('clicks')
-            )['total'] or 0
-            
-            total_conversions = performance_data.aggregate(
-                total=models.Sum('conversions')
-            )['total'] or 0
-            
-            total_conversion_value = performance_data.aggregate(
-                total=models.Sum('conversion_value')
-            )['total'] or 0
+            totals = self.aggregate_performance_totals(account_rollups)
+            total_spend = totals['cost_micros'] / 1000000
+            total_impressions = totals['impressions']
+            total_clicks = totals['clicks']
+            total_conversions = totals['conversions']
+            total_conversion_value = totals['conversion_value']
             
             # Calculate rates
             overall_ctr = total_clicks / total_impressions if total_impressions > 0 else 0
@@ -553,7 +558,7 @@ class GoogleAdsService:
             overall_roas = total_conversion_value / total_spend if total_spend > 0 else 0
             
             # Get performance trend
-            trend_data = performance_data.values('date').annotate(
+            trend_data = account_rollups.values('date').annotate(
                 daily_impressions=models.Sum('impressions'),
                 daily_clicks=models.Sum('clicks'),
                 daily_cost=models.Sum('cost_micros'),
@@ -571,7 +576,7 @@ class GoogleAdsService:
                 })
             
             # Get top campaigns
-            top_campaigns = performance_data.values(
+            top_campaigns = DailyCampaignRollup.objects.filter(**window).values(
                 'campaign__campaign_name'
             ).annotate(
                 total_spend=models.Sum('cost_micros'),
@@ -591,7 +596,7 @@ class GoogleAdsService:
                 })
             
             # Get top keywords
-            top_keywords = performance_data.values(
+            top_keywords = DailyKeywordRollup.objects.filter(**window).values(
                 'keyword__keyword_text'
             ).annotate(
                 total_spend=models.Sum('cost_micros'),
@@ -611,8 +616,8 @@ class GoogleAdsService:
                 })
             
             return {
-                'total_accounts': accounts.count(),
-                'total_campaigns': GoogleAdsCampaign.objects.filter(account__in=accounts).count(),
+                'total_accounts': len(account_ids),
+                'total_campaigns': GoogleAdsCampaign.objects.filter(account_id__in=account_ids).count(),
                 'total_spend': total_spend,
                 'total_impressions': total_impressions,
                 'total_clicks': total_clicks,
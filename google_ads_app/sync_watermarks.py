@@ -0,0 +1,78 @@
+"""
+Sync watermarks
+Remembers, per account and entity, how far the last successful sync got so the
+next run only fetches new or still-mutable data
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+
+from .models import SyncWatermark
+
+logger = logging.getLogger(__name__)
+
+# Entities synced through change_status and the resource types that mark them changed
+ENTITY_RESOURCE_TYPES = {
+    'campaigns': ('CAMPAIGN', 'CAMPAIGN_BUDGET'),
+    'ad_groups': ('AD_GROUP',),
+    'keywords': ('AD_GROUP_CRITERION',),
+}
+
+
+class SyncWatermarks:
+    """
+    Per-account, per-entity sync watermarks
+
+    - ``performance``: last date whose metrics were synced. The next run starts
+      ``restatement_days`` before it, since Google Ads keeps revising recent days.
+    - ``campaigns`` / ``ad_groups`` / ``keywords``: time of the last successful
+      entity sync, used as the lower bound of the change_status query.
+
+    Stored as SyncWatermark rows, so they survive cache flushes and evictions.
+    """
+
+    # change_status only covers the last 90 days; older watermarks mean a full sync
+    CHANGE_STATUS_MAX_DAYS = 89
+
+    def __init__(self):
+        self.restatement_days = getattr(settings, 'GOOGLE_ADS_RESTATEMENT_DAYS', 3)
+        self.performance_days = getattr(settings, 'GOOGLE_ADS_SYNC_DAYS', 30)
+
+    @staticmethod
+    def _field(entity: str) -> str:
+        return 'synced_until' if entity == 'performance' else 'synced_at'
+
+    def get(self, account_id, entity: str):
+        return SyncWatermark.objects.filter(account_id=account_id, entity=entity).values_list(
+            self._field(entity), flat=True
+        ).first()
+
+    def set(self, account_id, entity: str, value):
+        SyncWatermark.objects.update_or_create(
+            account_id=account_id, entity=entity, defaults={self._field(entity): value}
+        )
+
+    def reset(self, account_id):
+        """Forget an account's watermarks (the next sync is a full one)"""
+        SyncWatermark.objects.filter(account_id=account_id).delete()
+
+    def performance_window(self, account_id, end_date: date):
+        """(start_date, end_date) of performance data the next sync needs to fetch"""
+        earliest = end_date - timedelta(days=self.performance_days)
+        synced_until = self.get(account_id, 'performance')
+        if not synced_until:
+            return earliest, end_date
+        return max(synced_until - timedelta(days=self.restatement_days), earliest), end_date
+
+    def entity_since(self, account_id, entity: str, now: datetime) -> Optional[datetime]:
+        """Lower bound for a change_status query, or None if the entity needs a full sync"""
+        since = self.get(account_id, entity)
+        if not since or now - since > timedelta(days=self.CHANGE_STATUS_MAX_DAYS):
+            return None
+        return since
+
+
+sync_watermarks = SyncWatermarks()
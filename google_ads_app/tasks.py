@@ -0,0 +1,279 @@
+"""
+Celery tasks for google_ads_app
+Fans a multi-account sync out as one task per account (entities) and one per
+account and date chunk (performance), rate limited per developer token and per
+customer, with progress tracked on one DataSyncLog row per run; also runs
+background performance exports
+"""
+
+import hashlib
+import logging
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk_sync import BulkSyncEngine
+from .exports import (
+    export_path, get_export_job, is_stale, performance_export_queryset, performance_exporter, update_export_job
+)
+from .models import DataSyncLog, GoogleAdsAccount
+from .services import GoogleAdsService
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY_PREFIX = "google_ads_sync_rate"
+
+
+class RateLimited(Exception):
+    """Raised when a sync task would exceed a Google Ads request budget"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _acquire_request_slot(customer_id: str):
+    """
+    Take one request from the fixed one-minute windows of the developer token and
+    the customer; raises RateLimited with the time until the window resets, plus
+    jitter so the tasks turned away in one window do not all return at once
+    """
+    window = int(time.time() // 60)
+    retry_after = 60 - time.time() % 60 + random.uniform(0, 15)
+    developer_token = settings.GOOGLE_ADS_CONFIG.get('developer_token') or ''
+    budgets = (
+        (f"dev:{hashlib.sha256(developer_token.encode('utf-8')).hexdigest()[:16]}",
+         getattr(settings, 'GOOGLE_ADS_SYNC_REQUESTS_PER_MINUTE', 600)),
+        (f"customer:{customer_id}", getattr(settings, 'GOOGLE_ADS_SYNC_CUSTOMER_REQUESTS_PER_MINUTE', 60)),
+    )
+    for scope, limit in budgets:
+        key = f"{RATE_KEY_PREFIX}:{scope}:{window}"
+        cache.add(key, 0, timeout=120)
+        if cache.incr(key) > limit:
+            raise RateLimited(f"Request budget for {scope} exhausted", retry_after)
+
+
+def _record_progress(run_id: Optional[int], field: str):
+    """Count a finished task ("completed" or "failed") on the run's DataSyncLog row"""
+    if not run_id:
+        return
+    with transaction.atomic():
+        run = DataSyncLog.objects.select_for_update().filter(id=run_id).first()
+        if run is None:
+            return
+        run.results[field] = run.results.get(field, 0) + 1
+        run.save(update_fields=["results"])
+
+
+def get_sync_run(run_id: int) -> Optional[Dict[str, Any]]:
+    """Progress of a multi-account sync run, or None if unknown"""
+    run = DataSyncLog.objects.filter(id=run_id, sync_type="multi_account").first()
+    if run is None:
+        return None
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "start_date": run.start_date.isoformat(),
+        "end_date": run.end_date.isoformat(),
+        "started_at": run.created_at.isoformat(),
+        "error": run.error_message,
+        **run.results,
+    }
+
+
+def _date_chunks(start_date: date, end_date: date, chunk_days: int) -> List[tuple]:
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start.isoformat(), chunk_end.isoformat()))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _sync_service(customer_id: str) -> GoogleAdsService:
+    """Service for sync tasks: fetch errors raise, and every API request takes a budget slot"""
+    return GoogleAdsService(customer_id, strict=True, before_request=lambda: _acquire_request_slot(customer_id))
+
+
+def _run_with_retries(task, run_id: Optional[int], attempt: int, work):
+    """
+    Run a sync step under the request budgets
+
+    ``work`` must raise on failure (use _sync_service). Attempts that hit a
+    request budget are re-queued for the next window without using up a retry;
+    failures are retried with exponential backoff and jitter. Once retries run
+    out the failure is recorded and returned rather than raised, so one bad
+    account cannot fail the chord the whole run waits on.
+    """
+    try:
+        result = work()
+    except RateLimited as e:
+        raise task.retry(countdown=e.retry_after, max_retries=None)
+    except Exception as e:
+        max_attempts = getattr(settings, 'GOOGLE_ADS_SYNC_MAX_RETRIES', 5)
+        if attempt < max_attempts:
+            countdown = min(10 * 2 ** attempt, 600) * random.uniform(0.5, 1.0)
+            raise task.retry(
+                exc=e, countdown=countdown, max_retries=None,
+                kwargs={**task.request.kwargs, "attempt": attempt + 1}
+            )
+        logger.error(f"Sync task {task.name} failed after {attempt} retries: {e}")
+        _record_progress(run_id, "failed")
+        return {"error": str(e)}
+
+    _record_progress(run_id, "completed")
+    return result
+
+
+@shared_task(bind=True, acks_late=True)
+def sync_account_entities(self, account_id: int, run_id: int = None, attempt: int = 0) -> Dict[str, Any]:
+    """Sync one account's campaigns, ad groups and keywords (three GAQL queries, three budget slots)"""
+    account = GoogleAdsAccount.objects.filter(id=account_id).first()
+    if account is None:
+        _record_progress(run_id, "failed")
+        return {"account_id": account_id, "error": "Account not found"}
+
+    def work():
+        service = _sync_service(account.customer_id)
+        return BulkSyncEngine().sync(
+            account,
+            service.list_campaigns(account.customer_id),
+            service.list_ad_groups(account.customer_id),
+            service.list_keywords(account.customer_id),
+        )
+
+    return {"account_id": account_id, **_run_with_retries(self, run_id, attempt, work)}
+
+
+@shared_task(bind=True, acks_late=True)
+def sync_account_performance_chunk(self, account_id: int, start_date: str, end_date: str,
+                                   run_id: int = None, attempt: int = 0) -> Dict[str, Any]:
+    """Sync one account's performance rows for one date chunk (rollups are refreshed once per run)"""
+    account = GoogleAdsAccount.objects.filter(id=account_id).first()
+    if account is None:
+        _record_progress(run_id, "failed")
+        return {"account_id": account_id, "error": "Account not found"}
+
+    def work():
+        service = _sync_service(account.customer_id)
+        rows = service.get_performance_data(account.customer_id, start_date, end_date)
+        engine = BulkSyncEngine()
+        with transaction.atomic():
+            written = engine.replace_performance(
+                account, date.fromisoformat(start_date), date.fromisoformat(end_date), rows,
+                *engine.load_id_maps(account), refresh_rollups=False
+            )
+        return {"performance": written}
+
+    result = _run_with_retries(self, run_id, attempt, work)
+    return {"account_id": account_id, "start_date": start_date, "end_date": end_date, **result}
+
+
+@shared_task(bind=True)
+def fan_out_performance_sync(self, entity_results, run_id: int, account_ids: List[int], start_date: str,
+                             end_date: str):
+    """Second phase: once every account's entities exist, sync performance chunks in parallel"""
+    chunks = _date_chunks(
+        date.fromisoformat(start_date), date.fromisoformat(end_date),
+        getattr(settings, 'GOOGLE_ADS_SYNC_CHUNK_DAYS', 7)
+    )
+    tasks = [
+        sync_account_performance_chunk.s(account_id, chunk_start, chunk_end, run_id=run_id)
+        for account_id in account_ids
+        for chunk_start, chunk_end in chunks
+    ]
+    return chord(group(tasks))(finish_multi_account_sync.s(run_id)).id
+
+
+@shared_task(bind=True)
+def finish_multi_account_sync(self, chunk_results, run_id: int):
+    """Chord callback: rebuild the touched accounts' daily rollups and close the run's log row"""
+    run = DataSyncLog.objects.get(id=run_id)
+    engine = BulkSyncEngine()
+    for account in GoogleAdsAccount.objects.filter(id__in=run.results.get("account_ids", [])):
+        engine.refresh_rollups(account, run.start_date, run.end_date)
+
+    performance = sum(result.get("performance", 0) for result in chunk_results if isinstance(result, dict))
+    with transaction.atomic():
+        run = DataSyncLog.objects.select_for_update().get(id=run_id)
+        failed = run.results.get("failed", 0)
+        run.status = "completed" if failed == 0 else "partial_failure"
+        run.error_message = f"{failed} sync tasks failed" if failed else None
+        run.results.update(performance=performance, finished_at=timezone.now().isoformat())
+        run.save(update_fields=["status", "error_message", "results"])
+    logger.info(f"Multi-account sync {run_id} finished: {performance} performance rows")
+    return performance
+
+
+def start_multi_account_sync(account_ids: List[int], weeks: int = 10) -> int:
+    """
+    Start a parallel sync of several accounts
+
+    Phase one syncs every account's entities; phase two fans out one task per
+    account and date chunk. Chunks that exhaust their retries are counted as
+    failed and do not block the run from finishing.
+
+    Returns:
+        Run id (the DataSyncLog pk) for get_sync_run
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(weeks=weeks)
+    chunk_count = len(_date_chunks(start_date, end_date, getattr(settings, 'GOOGLE_ADS_SYNC_CHUNK_DAYS', 7)))
+
+    run = DataSyncLog.objects.create(
+        sync_type="multi_account",
+        start_date=start_date,
+        end_date=end_date,
+        status="running",
+        results={
+            "account_ids": account_ids,
+            "total": len(account_ids) * (1 + chunk_count),
+            "completed": 0,
+            "failed": 0,
+        },
+    )
+
+    entity_tasks = [sync_account_entities.s(account_id, run_id=run.id) for account_id in account_ids]
+    chord(group(entity_tasks))(
+        fan_out_performance_sync.s(run.id, account_ids, start_date.isoformat(), end_date.isoformat())
+    )
+    return run.id
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=True)
+def export_performance_data(self, job_id: str):
+    """Write a background performance export to PERFORMANCE_EXPORT_DIR"""
+    from .serializers import PerformanceFilterSerializer
+
+    job = get_export_job(job_id)
+    if job is None or job["status"] in ("succeeded", "failed"):
+        return
+    if job["status"] == "running":
+        # acks_late redelivers the task if its worker died mid-export; take the job
+        # over once it has run too long, otherwise another worker is still on it
+        if not is_stale(job):
+            return
+        logger.warning(f"Performance export {job_id} stuck in running; taking it over")
+
+    serializer = PerformanceFilterSerializer(data=job["params"])
+    if not serializer.is_valid():
+        update_export_job(job_id, status="failed", error=serializer.errors)
+        return
+
+    update_export_job(job_id, status="running", started_at=time.time(), attempts=job.get("attempts", 0) + 1)
+    try:
+        queryset = performance_export_queryset(job["user_id"], serializer.validated_data)
+        size = performance_exporter.write_file(queryset, job["format"], export_path(job_id, job["format"]))
+    except Exception as e:
+        logger.error(f"Performance export {job_id} failed: {e}")
+        update_export_job(job_id, status="failed", error=str(e))
+        return
+    update_export_job(job_id, status="succeeded", size=size)
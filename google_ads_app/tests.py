@@ -0,0 +1,375 @@
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from google.ads.googleads.errors import GoogleAdsException
+
+from .bulk_sync import BulkSyncEngine
+from .exports import EXPORT_JOB_KEY_PREFIX, evict_expired_exports, export_path, get_export_job, is_stale
+from .models import (
+    DailyAccountRollup, DailyCampaignRollup, DailyKeywordRollup,
+    GoogleAdsAccount, GoogleAdsKeyword, GoogleAdsPerformance
+)
+from .services import GoogleAdsService
+from .sync_watermarks import sync_watermarks
+from .tasks import (
+    RateLimited, _record_progress, _run_with_retries, _sync_service, export_performance_data,
+    finish_multi_account_sync, get_sync_run, start_multi_account_sync
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def campaign_row(campaign_id, name='Campaign'):
+    return {
+        'campaign_id': campaign_id, 'campaign_name': name, 'status': 'ENABLED', 'type': 'SEARCH',
+        'start_date': None, 'end_date': None, 'budget_amount': None, 'budget_type': '',
+    }
+
+
+def ad_group_row(ad_group_id, campaign_id):
+    return {
+        'ad_group_id': ad_group_id, 'campaign_id': campaign_id, 'ad_group_name': f'Ad group {ad_group_id}',
+        'status': 'ENABLED', 'type': 'SEARCH_STANDARD',
+    }
+
+
+def keyword_row(keyword_id, ad_group_id, text='running shoes'):
+    return {
+        'keyword_id': keyword_id, 'ad_group_id': ad_group_id, 'keyword_text': text,
+        'match_type': 'BROAD', 'status': 'ENABLED', 'quality_score': 7,
+    }
+
+
+def performance_row(day, campaign_id=None, ad_group_id=None, keyword_id=None, clicks=10):
+    return {
+        'date': day, 'campaign_id': campaign_id, 'ad_group_id': ad_group_id, 'keyword_id': keyword_id,
+        'impressions': 100, 'clicks': clicks, 'cost_micros': 5_000_000,
+        'conversions': 1.0, 'conversion_value': 20.0,
+    }
+
+
+class BulkSyncEngineTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='bulk-sync', password='x')
+        self.account = GoogleAdsAccount.objects.create(user=user, customer_id='1234567890', account_name='Test')
+        self.engine = BulkSyncEngine(batch_size=2)
+
+    def sync(self, **kwargs):
+        return self.engine.sync(
+            self.account,
+            [campaign_row(11), campaign_row(12)],
+            [ad_group_row(21, 11), ad_group_row(22, 12)],
+            [keyword_row(31, 21), keyword_row(31, 22, text='trail shoes')],
+            **kwargs
+        )
+
+    def test_api_ids_map_to_stored_rows(self):
+        self.sync()
+        campaign_ids, ad_group_ids, keyword_ids = self.engine.load_id_maps(self.account)
+        self.assertEqual(set(campaign_ids), {'11', '12'})
+        self.assertEqual(set(ad_group_ids), {'21', '22'})
+        # Criterion ids repeat across ad groups
+        self.assertEqual(set(keyword_ids), {('21', '31'), ('22', '31')})
+
+    def test_resync_updates_in_place(self):
+        self.sync()
+        self.engine.sync(self.account, [campaign_row(11, name='Renamed')], [],
+                         [keyword_row(31, 21, text='new text')])
+        self.assertEqual(self.account.campaigns.count(), 2)
+        self.assertEqual(self.account.campaigns.get(campaign_id='11').campaign_name, 'Renamed')
+        self.assertEqual(GoogleAdsKeyword.objects.get(ad_group__ad_group_id='21').keyword_text, 'new text')
+
+    def test_rows_with_unknown_parent_are_skipped(self):
+        self.engine.sync(self.account, [campaign_row(11)], [ad_group_row(21, 99)], [])
+        self.assertFalse(self.account.campaigns.get().ad_groups.exists())
+
+    def test_performance_window_is_replaced(self):
+        window = {'start_date': date(2025, 1, 1), 'end_date': date(2025, 1, 2)}
+        self.sync(performance=[performance_row(date(2025, 1, 1), 11, 21, 31), performance_row(date(2025, 1, 2))],
+                  **window)
+        self.sync(performance=[performance_row(date(2025, 1, 2), 12, 22, 31, clicks=20)], **window)
+
+        row = GoogleAdsPerformance.objects.get(account=self.account)
+        self.assertEqual(row.campaign.campaign_id, '12')
+        self.assertEqual(row.keyword.ad_group.ad_group_id, '22')
+        self.assertAlmostEqual(row.ctr, 0.2)
+        self.assertAlmostEqual(row.cpc, 0.25)
+
+    def test_rollups_follow_the_replaced_window(self):
+        window = {'start_date': date(2025, 1, 1), 'end_date': date(2025, 1, 2)}
+        self.sync(performance=[
+            performance_row(date(2025, 1, 1), 11, 21, 31),
+            performance_row(date(2025, 1, 1), 12, 22, 31, clicks=20),
+            performance_row(date(2025, 1, 2)),
+        ], **window)
+
+        days = dict(DailyAccountRollup.objects.filter(account=self.account).values_list('date', 'clicks'))
+        self.assertEqual(days, {date(2025, 1, 1): 30, date(2025, 1, 2): 10})
+        self.assertEqual(DailyCampaignRollup.objects.filter(account=self.account).count(), 2)
+        self.assertEqual(DailyKeywordRollup.objects.filter(account=self.account).count(), 2)
+
+        self.sync(performance=[performance_row(date(2025, 1, 2), 12, 22, 31, clicks=20)], **window)
+
+        rollup = DailyCampaignRollup.objects.get(account=self.account)
+        self.assertEqual((rollup.campaign.campaign_id, rollup.date, rollup.clicks), ('12', date(2025, 1, 2), 20))
+        self.assertEqual(DailyAccountRollup.objects.get(account=self.account).cost_micros, 5_000_000)
+
+    def test_dashboard_reads_rollups(self):
+        yesterday = date.today() - timedelta(days=1)
+        self.sync(performance=[performance_row(yesterday, 11, 21, 31), performance_row(yesterday, 12)],
+                  start_date=yesterday, end_date=yesterday)
+        # Rows outside a rollup refresh are not counted
+        GoogleAdsPerformance.objects.filter(account=self.account).update(clicks=1000)
+
+        with mock.patch.object(GoogleAdsService, '_initialize_client'):
+            metrics = GoogleAdsService().get_dashboard_metrics(self.account.user_id, days=7)
+
+        self.assertEqual(metrics['total_clicks'], 20)
+        self.assertAlmostEqual(metrics['total_spend'], 10.0)
+        self.assertEqual([day['clicks'] for day in metrics['performance_trend']], [20])
+        self.assertEqual(len(metrics['top_campaigns']), 2)
+        self.assertEqual([keyword['text'] for keyword in metrics['top_keywords']], ['running shoes'])
+
+
+def google_ads_error(*args, **kwargs):
+    raise GoogleAdsException(None, None, None, None)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SyncAccountDataTests(TestCase):
+    customer_id = '1234567890'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sync', password='x')
+        with mock.patch.object(GoogleAdsService, '_initialize_client'):
+            self.service = GoogleAdsService()
+        self.service.get_customer_info = lambda customer_id: {
+            'descriptive_name': 'Test', 'currency_code': 'USD', 'time_zone': 'UTC',
+        }
+        self.service.get_changed_resource_types = lambda customer_id, since: None
+        self.service.list_campaigns = lambda customer_id: [campaign_row(11)]
+        self.service.list_ad_groups = lambda customer_id: [ad_group_row(21, 11)]
+        self.service.list_keywords = lambda customer_id: [keyword_row(31, 21)]
+        self.today = date.today()
+        self.service.get_performance_data = lambda customer_id, start_date, end_date: [
+            performance_row(self.today - timedelta(days=1), 11, 21, 31)
+        ]
+
+    def account(self):
+        return GoogleAdsAccount.objects.get(customer_id=self.customer_id)
+
+    def test_failed_performance_fetch_keeps_stored_window(self):
+        self.assertTrue(self.service.sync_account_data(self.customer_id, self.user.id)['success'])
+        synced_until = sync_watermarks.get(self.account().id, 'performance')
+
+        self.service.get_performance_data = google_ads_error
+        result = self.service.sync_account_data(self.customer_id, self.user.id)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(GoogleAdsPerformance.objects.filter(account=self.account()).count(), 1)
+        self.assertEqual(sync_watermarks.get(self.account().id, 'performance'), synced_until)
+
+    def test_watermarks_survive_a_cache_flush(self):
+        self.service.sync_account_data(self.customer_id, self.user.id)
+        cache.clear()
+        self.service.get_changed_resource_types = mock.Mock(return_value=set())
+
+        self.service.sync_account_data(self.customer_id, self.user.id)
+
+        # Every level still had its watermark, so the sync asked change_status what changed
+        self.service.get_changed_resource_types.assert_called_once()
+        self.assertEqual(self.account().sync_watermarks.count(), 4)
+
+    def test_failed_level_keeps_its_watermark(self):
+        self.service.list_ad_groups = google_ads_error
+        result = self.service.sync_account_data(self.customer_id, self.user.id)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['failed'], ['ad_groups', 'keywords'])
+        account_id = self.account().id
+        self.assertIsNotNone(sync_watermarks.get(account_id, 'campaigns'))
+        # Keywords were fetched, but their ad groups were not stored
+        self.assertIsNone(sync_watermarks.get(account_id, 'ad_groups'))
+        self.assertIsNone(sync_watermarks.get(account_id, 'keywords'))
+        self.assertIsNotNone(sync_watermarks.get(account_id, 'performance'))
+
+
+class _Retry(Exception):
+    pass
+
+
+class _FakeTask:
+    name = 'sync'
+
+    def __init__(self):
+        self.request = mock.Mock(kwargs={})
+        self.retries = []
+
+    def retry(self, **kwargs):
+        self.retries.append(kwargs)
+        return _Retry()
+
+
+@override_settings(CACHES=LOCMEM_CACHE, GOOGLE_ADS_CONFIG={'developer_token': 'token'},
+                   GOOGLE_ADS_SYNC_CUSTOMER_REQUESTS_PER_MINUTE=2, GOOGLE_ADS_SYNC_MAX_RETRIES=1)
+class SyncTaskRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.task = _FakeTask()
+
+    def test_every_api_request_takes_a_budget_slot(self):
+        with mock.patch.object(GoogleAdsService, '_initialize_client'):
+            service = _sync_service('42')
+        service.client = mock.Mock()
+        service.client.get_service.return_value.search.return_value = []
+        with mock.patch('google_ads_app.tasks.time.time', return_value=600.0):
+            service.list_campaigns('42')
+            service.list_ad_groups('42')
+            with self.assertRaises(RateLimited) as raised:
+                service.list_keywords('42')
+        # Retries land after the window resets, spread out by jitter
+        self.assertGreaterEqual(raised.exception.retry_after, 60)
+        self.assertLessEqual(raised.exception.retry_after, 75)
+
+    def test_sync_service_raises_fetch_errors(self):
+        with mock.patch.object(GoogleAdsService, '_initialize_client'):
+            service = _sync_service('43')
+        service.client = mock.Mock()
+        service.client.get_service.return_value.search.side_effect = google_ads_error
+        with self.assertRaises(GoogleAdsException):
+            service.list_campaigns('43')
+
+    def test_failure_is_retried_with_next_attempt(self):
+        with self.assertRaises(_Retry):
+            _run_with_retries(self.task, None, 0, google_ads_error)
+        self.assertEqual(self.task.retries[0]['kwargs']['attempt'], 1)
+
+    def test_rate_limited_attempt_does_not_use_a_retry(self):
+        def work():
+            raise RateLimited('budget', retry_after=12)
+
+        with self.assertRaises(_Retry):
+            _run_with_retries(self.task, None, 1, work)
+        self.assertEqual(self.task.retries, [{'countdown': 12, 'max_retries': None}])
+
+    def test_failure_is_returned_once_retries_run_out(self):
+        self.assertIn('error', _run_with_retries(self.task, None, 1, google_ads_error))
+        self.assertEqual(self.task.retries, [])
+
+
+class MultiAccountSyncRunTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='sync-run', password='x')
+        self.account = GoogleAdsAccount.objects.create(user=user, customer_id='1234567890', account_name='Test')
+
+    def test_run_is_tracked_on_its_sync_log(self):
+        with mock.patch('google_ads_app.tasks.chord'):
+            run_id = start_multi_account_sync([self.account.id], weeks=1)
+        self.assertEqual(get_sync_run(run_id)['status'], 'running')
+
+        _record_progress(run_id, 'completed')
+        _record_progress(run_id, 'failed')
+        yesterday = date.today() - timedelta(days=1)
+        engine = BulkSyncEngine()
+        engine.sync(self.account, [campaign_row(11)], [], [])
+        engine.replace_performance(self.account, yesterday, yesterday, [performance_row(yesterday, 11)],
+                                   *engine.load_id_maps(self.account), refresh_rollups=False)
+        self.assertFalse(DailyAccountRollup.objects.exists())
+
+        finish_multi_account_sync([{'performance': 1}, {'error': 'quota'}], run_id)
+
+        run = get_sync_run(run_id)
+        self.assertEqual((run['status'], run['completed'], run['failed']), ('partial_failure', 1, 1))
+        self.assertEqual(run['performance'], 1)
+        self.assertEqual(DailyCampaignRollup.objects.get(account=self.account).clicks, 10)
+
+
+class PerformanceExportCleanupTests(SimpleTestCase):
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PERFORMANCE_EXPORT_DIR=self.export_dir,
+                                                   PERFORMANCE_EXPORT_TTL_SECONDS=3600,
+                                                   PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS=600)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def write(self, name, age_seconds):
+        path = os.path.join(self.export_dir, name)
+        with open(path, 'w') as f:
+            f.write('date,clicks\n')
+        modified = time.time() - age_seconds
+        os.utime(path, (modified, modified))
+        return path
+
+    def test_only_expired_exports_are_removed(self):
+        expired = self.write('performance_old.csv', 7200)
+        crashed = self.write('performance_crashed.parquet.tmp', 7200)
+        fresh = self.write('performance_new.csv', 60)
+        unrelated = self.write('notes.txt', 7200)
+
+        stats = evict_expired_exports()
+
+        self.assertEqual(stats['files'], 2)
+        self.assertFalse(os.path.exists(expired))
+        self.assertFalse(os.path.exists(crashed))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(unrelated))
+
+    def test_running_export_is_stale_after_timeout(self):
+        now = time.time()
+        self.assertFalse(is_stale({'started_at': now - 60, 'updated_at': now - 60}))
+        self.assertTrue(is_stale({'started_at': now - 900, 'updated_at': now - 900}))
+        # Jobs recorded before started_at existed fall back to updated_at
+        self.assertTrue(is_stale({'updated_at': now - 900}))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS=600)
+class PerformanceExportTakeoverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.export_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PERFORMANCE_EXPORT_DIR=self.export_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.user = User.objects.create(username='exporter')
+
+    def job(self, status, started_seconds_ago):
+        started_at = time.time() - started_seconds_ago
+        job = {
+            'job_id': 'job1', 'user_id': self.user.id, 'status': status, 'format': 'csv', 'params': {},
+            'created_at': started_at, 'updated_at': started_at, 'started_at': started_at, 'attempts': 1,
+        }
+        cache.set(f'{EXPORT_JOB_KEY_PREFIX}:job1', job)
+        return job
+
+    def test_redelivered_task_takes_over_a_stuck_export(self):
+        self.job('running', 900)
+
+        export_performance_data.run('job1')
+
+        job = get_export_job('job1')
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['attempts'], 2)
+        self.assertTrue(os.path.exists(export_path('job1', 'csv')))
+
+    def test_redelivered_task_leaves_a_live_export_alone(self):
+        self.job('running', 60)
+
+        export_performance_data.run('job1')
+
+        job = get_export_job('job1')
+        self.assertEqual((job['status'], job['attempts']), ('running', 1))
+        self.assertFalse(os.path.exists(export_path('job1', 'csv')))
+
+    def test_finished_export_is_not_rerun(self):
+        self.job('succeeded', 900)
+
+        with mock.patch('google_ads_app.tasks.performance_exporter.write_file') as write_file:
+            export_performance_data.run('job1')
+
+        write_file.assert_not_called()
@@ -53,4 +53,5 @@ urlpatterns = [
     
     # Performance export
     path('api/export-performance/', views.PerformanceExportView.as_view(), name='google-ads-export-performance'),
+    path('api/export-performance/jobs/<str:job_id>/', views.PerformanceExportJobView.as_view(), name='google-ads-export-performance-job'),
 ]
@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
@@ -30,6 +30,10 @@ from .serializers import (
 )
 from .services import GoogleAdsService
 from .chat_service import GoogleAdsChatService
+from .exports import (
+    EXPORT_FORMATS, export_path, get_export_job, performance_export_queryset,
+    performance_exporter, submit_export_job
+)
 
 logger = logging.getLogger(__name__)
 
@@ -631,7 +635,13 @@ class KeywordCreateView(APIView):
 
 
 class PerformanceExportView(APIView):
-    """Performance data export view"""
+    """
+    Performance data export view
+    
+    ?export_format=csv|parquet|arrow streams the rows as they come off the cursor;
+    adding &background=true queues a job that writes the file for later download
+    (PerformanceExportJobView). Without export_format the JSON response is unchanged.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -640,30 +650,14 @@ class PerformanceExportView(APIView):
             serializer = PerformanceFilterSerializer(data=request.query_params)
             if serializer.is_valid():
                 filters = serializer.validated_data
+                queryset = performance_export_queryset(request.user.id, filters)
                 
-                # Build queryset
-                user_accounts = GoogleAdsAccount.objects.filter(
-                    user=request.user, is_active=True
-                )
-                queryset = GoogleAdsPerformance.objects.filter(account__in=user_accounts)
-                
-                # Apply filters
-                if filters.get('start_date'):
-                    queryset = queryset.filter(date__gte=filters['start_date'])
-                if filters.get('end_date'):
-                    queryset = queryset.filter(date__lte=filters['end_date'])
-                if filters.get('account'):
-                    queryset = queryset.filter(account_id=filters['account'])
-                if filters.get('campaign'):
-                    queryset = queryset.filter(campaign_id=filters['campaign'])
-                if filters.get('ad_group'):
-                    queryset = queryset.filter(ad_group_id=filters['ad_group'])
-                if filters.get('keyword'):
-                    queryset = queryset.filter(keyword_id=filters['keyword'])
+                export_format = request.query_params.get('export_format')
+                if export_format:
+                    return self._export(request, queryset, export_format)
                 
                 # Get data
-                performance_data = queryset.order_by('-date')
-                serializer = GoogleAdsPerformanceSerializer(performance_data, many=True)
+                serializer = GoogleAdsPerformanceSerializer(queryset, many=True)
                 
                 return Response({
                     'success': True,
@@ -682,6 +676,78 @@ class PerformanceExportView(APIView):
                 'success': False,
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _export(self, request, queryset, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'success': False,
+                'error': f"Unsupported export_format; use one of {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.query_params.get('background', '').lower() in ('1', 'true', 'yes'):
+            params = {key: value for key, value in request.query_params.items()
+                      if key not in ('export_format', 'background')}
+            job = submit_export_job(request.user.id, params, export_format)
+            return Response({
+                'success': True,
+                'job_id': job['job_id'],
+                'status': job['status'],
+                'status_url': f"{request.path}jobs/{job['job_id']}/"
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            performance_exporter.iter_export(queryset, export_format),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="performance_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}"'
+        )
+        return response
+
+
+class PerformanceExportJobView(APIView):
+    """Status and download of a background performance export"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, job_id):
+        """Job status, or the file itself with ?download=true once it has succeeded"""
+        job = get_export_job(job_id)
+        if job is None or job['user_id'] != request.user.id:
+            return Response({
+                'success': False,
+                'error': 'Export job not found or expired'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.query_params.get('download', '').lower() in ('1', 'true', 'yes'):
+            if job['status'] != 'succeeded':
+                return Response({
+                    'success': False,
+                    'error': f"Export is {job['status']}"
+                }, status=status.HTTP_409_CONFLICT)
+            content_type, extension = EXPORT_FORMATS[job['format']]
+            try:
+                export_file = open(export_path(job_id, job['format']), 'rb')
+            except FileNotFoundError:
+                return Response({
+                    'success': False,
+                    'error': 'Export file has expired'
+                }, status=status.HTTP_410_GONE)
+            return FileResponse(
+                export_file,
+                as_attachment=True,
+                filename=f"performance_{job_id}.{extension}",
+                content_type=content_type
+            )
+        
+        return Response({
+            'success': True,
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'format': job['format'],
+            'size': job['size'],
+            'error': job['error']
+        })
 
 
 @login_required
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve with an ASGI server to use the async chat endpoint
+(/ad-expert/api/langgraph/chat/async/), e.g.:
+
+    uvicorn marketing_assistant_project.asgi:application --workers 1
 """
 
 import os
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     # 'google_ads_new',
     'accounts',
     'ad_expert',
+    'google_ads_app',
 ]
 
 MIDDLEWARE = [
@@ -166,6 +167,16 @@ GOOGLE_ADS_CONFIG = {
 # OpenAI Configuration for Chat Assistant
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 
+# LangGraph Configuration
+# Build the shared chat graph when the app registry is ready instead of on the first request
+LANGGRAPH_WARMUP_ON_READY = os.getenv('LANGGRAPH_WARMUP_ON_READY', 'False').lower() == 'true'
+# Prompt tokens of conversation history sent to gpt-4o; older turns are folded into a
+# rolling summary (written by LANGGRAPH_SUMMARY_MODEL) until the rest fits in budget * retain ratio
+LANGGRAPH_CONTEXT_TOKEN_BUDGET = int(os.getenv('LANGGRAPH_CONTEXT_TOKEN_BUDGET', '6000'))
+LANGGRAPH_CONTEXT_RETAIN_RATIO = float(os.getenv('LANGGRAPH_CONTEXT_RETAIN_RATIO', '0.5'))
+LANGGRAPH_SUMMARY_MODEL = os.getenv('LANGGRAPH_SUMMARY_MODEL', 'gpt-4o-mini')
+LANGGRAPH_SUMMARY_MAX_WORDS = int(os.getenv('LANGGRAPH_SUMMARY_MAX_WORDS', '300'))
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -268,6 +279,7 @@ CORS_ALLOW_HEADERS = [
 CORS_EXPOSE_HEADERS = [
     'set-cookie',
     'access-control-allow-credentials',
+    'x-next-cursor',
 ]
 
 # Additional CORS settings for development
@@ -282,6 +294,10 @@ CORS_ALLOW_METHODS = [
 
 # Redis Configuration
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Raw client pool used by ad_expert.redis_service (defaults to REDIS_URL)
+REDIS_SERVICE_URL = os.getenv('REDIS_SERVICE_URL', REDIS_URL)
+REDIS_SERVICE_MAX_CONNECTIONS = int(os.getenv('REDIS_SERVICE_MAX_CONNECTIONS', '50'))
+REDIS_SERVICE_SOCKET_TIMEOUT = float(os.getenv('REDIS_SERVICE_SOCKET_TIMEOUT', '5'))
 
 # Cache Configuration
 CACHES = {
@@ -294,6 +310,92 @@ CACHES = {
     }
 }
 
+# GAQL result cache (stored in CACHES['default'])
+GAQL_CACHE_ENABLED = os.getenv('GAQL_CACHE_ENABLED', 'True').lower() == 'true'
+# Serve expired results for up to GAQL_CACHE_STALE_SECONDS while one worker refreshes them
+GAQL_CACHE_STALE_WHILE_REVALIDATE = os.getenv('GAQL_CACHE_STALE_WHILE_REVALIDATE', 'True').lower() == 'true'
+GAQL_CACHE_STALE_SECONDS = int(os.getenv('GAQL_CACHE_STALE_SECONDS', '300'))
+# Entries are shared by users of a customer; each user's accessible customers are
+# re-checked with Google this often (seconds)
+GAQL_CACHE_ACCESS_TTL_SECONDS = int(os.getenv('GAQL_CACHE_ACCESS_TTL_SECONDS', '900'))
+
+# Single-flight coalescing of identical concurrent upstream calls
+SINGLE_FLIGHT_LOCK_SECONDS = int(os.getenv('SINGLE_FLIGHT_LOCK_SECONDS', '90'))
+SINGLE_FLIGHT_WAIT_SECONDS = int(os.getenv('SINGLE_FLIGHT_WAIT_SECONDS', '90'))
+
+# Tool results: row lists above the threshold reach the LLM as totals, daily rollups and
+# top-N CSV; full payloads are kept in the cache for the UI
+TOOL_RESULT_ROW_THRESHOLD = int(os.getenv('TOOL_RESULT_ROW_THRESHOLD', '25'))
+TOOL_RESULT_TOP_N = int(os.getenv('TOOL_RESULT_TOP_N', '20'))
+TOOL_RESULT_STORE_SECONDS = int(os.getenv('TOOL_RESULT_STORE_SECONDS', '86400'))
+
+# Local chart rendering for create_data_visualization (process pool, optionally started
+# when the app loads so the first chart doesn't pay for worker start-up)
+VISUALIZATION_RENDER_WORKERS = int(os.getenv('VISUALIZATION_RENDER_WORKERS', '2'))
+VISUALIZATION_RENDER_TIMEOUT = int(os.getenv('VISUALIZATION_RENDER_TIMEOUT', '20'))
+VISUALIZATION_WARMUP_ON_READY = os.getenv('VISUALIZATION_WARMUP_ON_READY', 'False').lower() == 'true'
+
+# format_tabular_data display options
+TABLE_CURRENCY_SYMBOL = os.getenv('TABLE_CURRENCY_SYMBOL', '$')
+TABLE_MAX_ROWS = int(os.getenv('TABLE_MAX_ROWS', '50'))
+
+# Image generation jobs (Celery): concurrent jobs per user, how long job records
+# are kept, and how long the async chat stream waits for queued images after "done"
+IMAGE_JOB_MAX_CONCURRENT_PER_USER = int(os.getenv('IMAGE_JOB_MAX_CONCURRENT_PER_USER', '2'))
+IMAGE_JOB_TTL_SECONDS = int(os.getenv('IMAGE_JOB_TTL_SECONDS', '86400'))
+IMAGE_JOB_STREAM_WAIT_SECONDS = int(os.getenv('IMAGE_JOB_STREAM_WAIT_SECONDS', '90'))
+# A running job without a worker heartbeat for this long is treated as orphaned: it stops
+# holding a concurrency slot and a redelivered task takes it over
+IMAGE_JOB_STALE_SECONDS = int(os.getenv('IMAGE_JOB_STALE_SECONDS', '120'))
+# A job still queued after this long (lost message, no workers) stops holding a slot
+# and is failed instead of run if its task turns up later
+IMAGE_JOB_QUEUED_TIMEOUT_SECONDS = int(os.getenv('IMAGE_JOB_QUEUED_TIMEOUT_SECONDS', '600'))
+
+# Generated asset store (images, visualizations): content-addressed files on the
+# local filesystem or an S3-compatible bucket, evicted by `manage.py evict_generated_assets`
+ASSET_STORE_BACKEND = os.getenv('ASSET_STORE_BACKEND', 'local')  # 'local' or 's3'
+ASSET_STORE_ROOT = os.getenv('ASSET_STORE_ROOT', str(BASE_DIR / 'generated_assets'))
+ASSET_STORE_S3_BUCKET = os.getenv('ASSET_STORE_S3_BUCKET', '')
+ASSET_STORE_S3_PREFIX = os.getenv('ASSET_STORE_S3_PREFIX', 'assets/')
+ASSET_STORE_S3_ENDPOINT_URL = os.getenv('ASSET_STORE_S3_ENDPOINT_URL', '')  # e.g. http://localhost:9000 for MinIO
+ASSET_STORE_MAX_ASSET_BYTES = int(os.getenv('ASSET_STORE_MAX_ASSET_BYTES', str(20 * 1024 * 1024)))
+ASSET_STORE_MAX_TOTAL_BYTES = int(os.getenv('ASSET_STORE_MAX_TOTAL_BYTES', str(2 * 1024 ** 3)))
+ASSET_STORE_MAX_AGE_DAYS = int(os.getenv('ASSET_STORE_MAX_AGE_DAYS', '30'))
+ASSET_STORE_CACHE_SECONDS = int(os.getenv('ASSET_STORE_CACHE_SECONDS', '31536000'))
+
+# LangGraph conversation checkpoints (Postgres, one thread per conversation)
+LANGGRAPH_CHECKPOINTER_ENABLED = os.getenv('LANGGRAPH_CHECKPOINTER_ENABLED', 'True').lower() == 'true'
+LANGGRAPH_CHECKPOINT_POOL_SIZE = int(os.getenv('LANGGRAPH_CHECKPOINT_POOL_SIZE', '10'))
+# Pruning policy applied by `manage.py prune_langgraph_checkpoints`
+LANGGRAPH_CHECKPOINT_KEEP_PER_THREAD = int(os.getenv('LANGGRAPH_CHECKPOINT_KEEP_PER_THREAD', '3'))
+LANGGRAPH_CHECKPOINT_IDLE_DAYS = int(os.getenv('LANGGRAPH_CHECKPOINT_IDLE_DAYS', '30'))
+
+# Google OAuth token broker: renew access tokens this long before expiry,
+# with one refresh per user at a time across workers
+GOOGLE_TOKEN_RENEW_MARGIN_SECONDS = int(os.getenv('GOOGLE_TOKEN_RENEW_MARGIN_SECONDS', '600'))
+GOOGLE_TOKEN_REFRESH_LOCK_SECONDS = int(os.getenv('GOOGLE_TOKEN_REFRESH_LOCK_SECONDS', '30'))
+GOOGLE_TOKEN_REFRESH_WAIT_SECONDS = int(os.getenv('GOOGLE_TOKEN_REFRESH_WAIT_SECONDS', '15'))
+
+# google_ads_app incremental sync: performance history fetched on a first/full sync,
+# and how many recent days are re-fetched on every run because Google restates them
+GOOGLE_ADS_SYNC_DAYS = int(os.getenv('GOOGLE_ADS_SYNC_DAYS', '30'))
+GOOGLE_ADS_RESTATEMENT_DAYS = int(os.getenv('GOOGLE_ADS_RESTATEMENT_DAYS', '3'))
+# Parallel multi-account sync (google_ads_app.tasks): request budgets per developer
+# token and per customer, date chunk size and retries per task
+GOOGLE_ADS_SYNC_REQUESTS_PER_MINUTE = int(os.getenv('GOOGLE_ADS_SYNC_REQUESTS_PER_MINUTE', '600'))
+GOOGLE_ADS_SYNC_CUSTOMER_REQUESTS_PER_MINUTE = int(os.getenv('GOOGLE_ADS_SYNC_CUSTOMER_REQUESTS_PER_MINUTE', '60'))
+GOOGLE_ADS_SYNC_CHUNK_DAYS = int(os.getenv('GOOGLE_ADS_SYNC_CHUNK_DAYS', '7'))
+GOOGLE_ADS_SYNC_MAX_RETRIES = int(os.getenv('GOOGLE_ADS_SYNC_MAX_RETRIES', '5'))
+
+# Performance exports: rows per database fetch / output chunk, and where background
+# export files are written (job records expire after PERFORMANCE_EXPORT_TTL_SECONDS;
+# evict_performance_exports removes files older than that). An export still running
+# after PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS is taken over by a redelivered task.
+PERFORMANCE_EXPORT_CHUNK_SIZE = int(os.getenv('PERFORMANCE_EXPORT_CHUNK_SIZE', '5000'))
+PERFORMANCE_EXPORT_DIR = os.getenv('PERFORMANCE_EXPORT_DIR', str(BASE_DIR / 'performance_exports'))
+PERFORMANCE_EXPORT_TTL_SECONDS = int(os.getenv('PERFORMANCE_EXPORT_TTL_SECONDS', '86400'))
+PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS = int(os.getenv('PERFORMANCE_EXPORT_RUNNING_TIMEOUT_SECONDS', '1800'))
+
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL